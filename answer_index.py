@@ -0,0 +1,166 @@
+"""Offline retrieval of past online answers for JARVIS"""
+
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from intent_matcher import normalize_utterance
+from startup_profile import lazy_import
+
+np = lazy_import('numpy')
+sp = lazy_import('scipy.sparse')
+feature_text = lazy_import('sklearn.feature_extraction.text')
+
+
+class Answer(NamedTuple):
+    score: float
+    question: str
+    response: str
+
+
+class AnswerIndex:
+    """TF-IDF cosine search over historical question -> answer pairs.
+
+    Questions are hashed into raw term counts once, when added; document
+    frequencies are kept as running counts, so IDF weights and row norms are
+    derived at query time and adding a turn never re-vectorizes the corpus.
+    A query only touches the columns of its own terms and the rows that
+    share one of them. New rows collect in a small tail block that is
+    searched on its own and merged into the column-major main block only
+    once it reaches a quarter of the main block's size (at least
+    ``merge_rows``), so each turn costs amortized constant merge work. The
+    index is built from ``source`` on first use (or earlier via
+    ``load_in_background``).
+    Repeated questions keep only their latest answer.
+    """
+
+    def __init__(self, source: Callable[[], Iterable[Dict]],
+                 accept: Optional[Callable[[Dict], bool]] = None,
+                 n_features: int = 2 ** 18, merge_rows: int = 64,
+                 logger: Optional[logging.Logger] = None):
+        self.source = source
+        self.accept = accept or (lambda turn: True)
+        self.n_features = n_features
+        self.merge_rows = merge_rows
+        self.logger = logger or logging.getLogger(__name__)
+        self.vectorizer = None
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._counts = None
+        self._by_column = None
+        self._tail = None
+        self._pending = []
+        self._document_frequency = np.zeros(n_features, dtype=np.float64)
+        self._questions: List[str] = []
+        self._responses: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def load_in_background(self):
+        """Build the index on a worker thread so the first search is fast"""
+        threading.Thread(target=self.ensure_loaded, name="answer-index", daemon=True).start()
+
+    def ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return
+            # Vectorizer and matrices are created here so sklearn loads off the startup path
+            self.vectorizer = feature_text.HashingVectorizer(
+                n_features=self.n_features, alternate_sign=False, norm=None,
+                stop_words='english', ngram_range=(1, 2)
+            )
+            self._counts = sp.csr_matrix((0, self.n_features), dtype=np.float64)
+            self._by_column = self._counts.tocsc()
+            self._tail = sp.csr_matrix((0, self.n_features), dtype=np.float64)
+            self._add_many(self.source())
+            self._loaded = True
+        self.logger.info(f"Answer index built with {len(self)} questions")
+
+    def add(self, turn: Dict):
+        """Index one finished turn (ignored until the index has been loaded)"""
+        with self._lock:
+            if self._loaded:
+                self._add_many([turn])
+
+    def search(self, question: str, k: int = 3) -> List[Answer]:
+        """Past answers most similar to ``question``, best first"""
+        self.ensure_loaded()
+        with self._lock:
+            self._flush()
+            if not self._questions:
+                return []
+            query = self.vectorizer.transform([question])
+            columns = query.indices
+            if columns.size == 0:
+                return []
+
+            query_weights = query.data * self._idf(columns)
+            weights = query_weights * self._idf(columns)
+            # Main block rows first, then the tail's, in index order
+            dots = np.concatenate([np.asarray(self._by_column[:, columns] @ weights).ravel(),
+                                   np.asarray(self._tail[:, columns] @ weights).ravel()])
+            candidates = np.flatnonzero(dots)
+            if candidates.size == 0:
+                return []
+
+            # TF-IDF norms only for the rows that share a term with the query
+            main_rows = self._counts.shape[0]
+            norms = np.concatenate([self._row_norms(self._counts[candidates[candidates < main_rows]]),
+                                    self._row_norms(self._tail[candidates[candidates >= main_rows] - main_rows])])
+            scores = dots[candidates] / (norms * np.linalg.norm(query_weights))
+
+            top = np.argpartition(-scores, k)[:k] if scores.size > k else np.arange(scores.size)
+            top = top[np.argsort(-scores[top])]
+            return [Answer(float(scores[i]), self._questions[candidates[i]], self._responses[candidates[i]])
+                    for i in top]
+
+    def best(self, question: str, min_score: float) -> Optional[Answer]:
+        """The closest past answer if it is similar enough"""
+        results = self.search(question, k=1)
+        if results and results[0].score >= min_score:
+            return results[0]
+        return None
+
+    def _row_norms(self, rows) -> 'np.ndarray':
+        if rows.shape[0] == 0:
+            return np.zeros(0)
+        squares = (rows.data * self._idf(rows.indices)) ** 2
+        return np.sqrt(np.add.reduceat(squares, rows.indptr[:-1]))
+
+    def _idf(self, columns: 'np.ndarray') -> 'np.ndarray':
+        return np.log((1.0 + len(self._questions)) / (1.0 + self._document_frequency[columns])) + 1.0
+
+    def _add_many(self, turns: Iterable[Dict]):
+        new_questions = []
+        for turn in turns:
+            if not turn.get('response') or not self.accept(turn):
+                continue
+            key = normalize_utterance(turn['user_input'])
+            if not key:
+                continue
+            row = self._rows.get(key)
+            if row is not None:
+                self._responses[row] = turn['response']
+                continue
+            self._rows[key] = len(self._questions)
+            self._questions.append(turn['user_input'])
+            self._responses.append(turn['response'])
+            new_questions.append(turn['user_input'])
+
+        if new_questions:
+            counts = self.vectorizer.transform(new_questions)
+            np.add.at(self._document_frequency, counts.indices, 1)
+            self._pending.append(counts)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self._tail = sp.vstack([self._tail] + self._pending, format='csr')
+        self._pending = []
+        if self._tail.shape[0] >= max(self.merge_rows, self._counts.shape[0] // 4):
+            self._counts = sp.vstack([self._counts, self._tail], format='csr')
+            self._by_column = self._counts.tocsc()
+            self._tail = sp.csr_matrix((0, self.n_features), dtype=np.float64)
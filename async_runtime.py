@@ -0,0 +1,117 @@
+"""Persistent asyncio runtime for JARVIS online calls"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Optional, Set
+
+from http_client import HTTPStats, create_session
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class AsyncRuntime:
+    """One long-lived event loop on a background thread.
+
+    Threads that are not part of the loop (the Tk thread, the voice loop, the
+    connectivity monitor) submit coroutines with ``submit`` and get a
+    ``concurrent.futures.Future`` back, which can be waited on with a timeout
+    or cancelled; cancelling it cancels the coroutine on the loop. A shared,
+    pooled ``aiohttp`` session lives on the loop for all async HTTP calls and
+    counts its connection reuse in ``http_stats``.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.loop = asyncio.new_event_loop()
+        self.http: Optional['aiohttp.ClientSession'] = None
+        self.http_stats = HTTPStats()
+
+        self._pending: Set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._start_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="async-runtime", daemon=True)
+
+    def start(self):
+        """Start the event loop thread and wait until it is running"""
+        if not self._thread.is_alive():
+            self._thread.start()
+            self._ready.wait()
+        if self._start_error is not None:
+            raise self._start_error
+
+    def stop(self):
+        """Cancel pending work, close the HTTP session and stop the loop"""
+        self.cancel_all()
+        if self.http is not None:
+            self.run(self.http.close(), timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+    @property
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop from any other thread, in the caller's context"""
+        future = asyncio.run_coroutine_threadsafe(self._in_context(contextvars.copy_context(), coro), self.loop)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        if self.in_loop_thread:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() would deadlock when called from the loop thread")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def cancel_all(self):
+        """Cancel every coroutine submitted from outside the loop that is still running"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """Run a blocking function in the default executor without stalling the loop"""
+        # Like asyncio.to_thread: the function sees the calling task's context variables
+        context = contextvars.copy_context()
+        return await self.loop.run_in_executor(None, functools.partial(context.run, func, *args))
+        
+    @staticmethod
+    async def _in_context(context: contextvars.Context, coro: Coroutine) -> Any:
+        for variable, value in context.items():
+            variable.set(value)
+        return await coro
+
+    def _discard(self, future: concurrent.futures.Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._open_session)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def _open_session(self):
+        # ClientSession must be created on the loop that will use it
+        try:
+            self.http = create_session(self.http_stats)
+        except BaseException as e:
+            self._start_error = e
+            self.loop.stop()
+        finally:
+            self._ready.set()
@@ -0,0 +1,182 @@
+"""Continuous microphone capture for JARVIS"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from vad import VADEndpointer
+
+
+class AudioRingBuffer:
+    """Fixed-capacity ring of audio frames addressed by a running frame index"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._frames = deque(maxlen=capacity)
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    @property
+    def oldest_index(self) -> int:
+        return self._next_index - len(self._frames)
+
+    def append(self, frame: bytes) -> int:
+        """Store a frame and return its index"""
+        with self._lock:
+            self._frames.append(frame)
+            self._next_index += 1
+            return self._next_index - 1
+
+    def slice(self, start: int, end: int) -> List[bytes]:
+        """Frames with indices in [start, end), clipped to what is still buffered"""
+        with self._lock:
+            oldest = self._next_index - len(self._frames)
+            start = max(start, oldest)
+            end = min(end, self._next_index)
+            return [self._frames[i - oldest] for i in range(start, end)]
+
+
+class CaptureError(RuntimeError):
+    """The microphone stream failed and could not be reopened"""
+
+
+class MicrophoneCapture:
+    """Keeps the microphone open and cuts the stream into utterances.
+
+    A single capture thread reads the microphone into a ring buffer for the
+    whole session. The ambient noise floor is measured once at start-up and
+    then tracked continuously by the ``VADEndpointer``, which also decides
+    where each utterance ends. Capture goes on while ``is_playing`` returns
+    True (JARVIS is speaking), with the endpointer in echo mode, so the user
+    can still talk over a reply, e.g. to say "stop".
+
+    At most ``max_pending`` unconsumed utterances are kept; older ones are
+    dropped first, so speech from long before a ``next_utterance`` call (or
+    before a conversation started) is not replayed as a command.
+
+    If the stream fails it is reopened up to ``max_restarts`` times in a row;
+    after that ``next_utterance`` raises ``CaptureError``.
+    """
+
+    def __init__(self, microphone, buffer_seconds: float = 90.0, calibration_seconds: float = 1.0,
+                 vad_options: Optional[Dict] = None,
+                 is_playing: Optional[Callable[[], bool]] = None, max_pending: int = 4,
+                 max_restarts: int = 3, restart_delay: float = 1.0,
+                 logger: Optional[logging.Logger] = None):
+        self.microphone = microphone
+        self.buffer_seconds = buffer_seconds
+        self.calibration_seconds = calibration_seconds
+        self.vad_options = vad_options or {}
+        self.is_playing = is_playing or (lambda: False)
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.logger = logger or logging.getLogger(__name__)
+        self.error: Optional[Exception] = None
+
+        self.sample_rate = None
+        self.sample_width = None
+
+        self.ring: Optional[AudioRingBuffer] = None
+        self.endpointer: Optional[VADEndpointer] = None
+        self._utterances = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def noise_floor(self) -> float:
+        return self.endpointer.noise_floor if self.endpointer else 0.0
+
+    def start(self):
+        """Open the microphone and start the capture thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="microphone-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing and close the microphone"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def next_utterance(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Return raw PCM of the next utterance, or None if none arrives in time.
+
+        Raises ``CaptureError`` once the capture thread has given up.
+        """
+        if self.error is not None and self._utterances.empty():
+            raise CaptureError(f"Microphone capture stopped: {self.error}") from self.error
+        try:
+            item = self._utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if isinstance(item, Exception):
+            raise CaptureError(f"Microphone capture stopped: {item}") from item
+        return item
+
+    def clear(self):
+        """Discard utterances that were captured but not consumed yet"""
+        while True:
+            try:
+                self._utterances.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._capture()
+                return
+            except Exception as e:
+                # A stream that ran for a while before failing starts a fresh count
+                failures = 1 if time.monotonic() - started > 30.0 else failures + 1
+                if failures > self.max_restarts:
+                    self.logger.error(f"Microphone capture stopped: {e}")
+                    self.error = e
+                    # Wake a caller blocked in next_utterance
+                    self._offer(e)
+                    return
+                self.logger.warning(f"Microphone capture failed ({e}), reopening the stream")
+                self._stop.wait(self.restart_delay * failures)
+
+    def _capture(self):
+        with self.microphone as source:
+            self.sample_rate = source.SAMPLE_RATE
+            self.sample_width = source.SAMPLE_WIDTH
+            frame_seconds = source.CHUNK / source.SAMPLE_RATE
+            self.ring = AudioRingBuffer(int(self.buffer_seconds / frame_seconds))
+            self.endpointer = VADEndpointer(frame_seconds, **self.vad_options)
+            self.endpointer.max_frames = min(self.endpointer.max_frames, self.ring.capacity - 1)
+
+            calibration = [source.stream.read(source.CHUNK)
+                           for _ in range(int(self.calibration_seconds / frame_seconds) or 1)]
+            self.endpointer.calibrate(calibration)
+            self.logger.info(f"Ambient noise floor calibrated at {self.noise_floor:.0f}")
+
+            while not self._stop.is_set():
+                frame = source.stream.read(source.CHUNK)
+                index = self.ring.append(frame)
+                self.endpointer.echo = self.is_playing()
+                segment = self.endpointer.process(index, frame)
+                if segment:
+                    self._offer(b"".join(self.ring.slice(*segment)))
+
+    def _offer(self, item):
+        # Only this thread puts, so after dropping the oldest there is room
+        while True:
+            try:
+                self._utterances.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._utterances.get_nowait()
+                except queue.Empty:
+                    pass
@@ -0,0 +1,195 @@
+"""In-memory gapless audio playback queue for JARVIS"""
+
+import io
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+from startup_profile import lazy_import
+
+mixer = lazy_import('pygame.mixer')
+
+# Grace period when the mixer finishes a clip slightly later than its nominal length
+_END_SLACK = 0.005
+
+
+class PlaybackHandle:
+    """Completion handle for a queued clip"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._callbacks: List[Callable[['PlaybackHandle'], None]] = []
+        self._lock = threading.Lock()
+        self.interrupted = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the clip finished playing or was interrupted"""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def add_done_callback(self, callback: Callable[['PlaybackHandle'], None]):
+        """Call ``callback(handle)`` on the player thread once the clip finished or was interrupted"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, interrupted: bool = False):
+        self.interrupted = interrupted
+        self.finished_at = time.perf_counter()
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logging.getLogger(__name__).exception("Playback callback error")
+
+
+class AudioPlayer:
+    """Plays encoded audio buffers from memory through a single mixer channel.
+
+    Clips are decoded on the worker thread and chained with ``Channel.queue``
+    so consecutive clips play back to back without gaps. End-of-clip times
+    are derived from each clip's length, so the worker sleeps until the next
+    clip boundary instead of polling the mixer.
+    """
+
+    def __init__(self, channel_id: int = 0, on_clip_start: Optional[Callable[[], None]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.on_clip_start = on_clip_start
+        self.logger = logger or logging.getLogger(__name__)
+
+        mixer.set_reserved(channel_id + 1)
+        self._channel = mixer.Channel(channel_id)
+        self._incoming = queue.Queue()
+        self._waiting: Deque[Tuple[mixer.Sound, PlaybackHandle]] = deque()
+        self._scheduled: List[Tuple[float, PlaybackHandle]] = []
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self._thread = threading.Thread(target=self._run, name="audio-player", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, audio: bytes) -> PlaybackHandle:
+        """Queue an encoded clip (MP3/WAV/OGG bytes) for playback"""
+        handle = PlaybackHandle()
+        with self._lock:
+            self._idle.clear()
+            self._incoming.put((self._generation, audio, handle))
+        return handle
+
+    def play(self, audio: bytes):
+        """Queue a clip and block until it has finished playing"""
+        self.enqueue(audio).wait()
+
+    def interrupt(self):
+        """Stop playback immediately and drop every queued clip"""
+        with self._lock:
+            self._generation += 1
+        self._incoming.put(None)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is playing or queued"""
+        return self._idle.wait(timeout)
+
+    @property
+    def is_playing(self) -> bool:
+        return not self._idle.is_set()
+
+    def _run(self):
+        generation = 0
+        while True:
+            timeout = None
+            if self._scheduled:
+                timeout = max(0.0, self._scheduled[0][0] - time.perf_counter())
+
+            try:
+                item = self._incoming.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            with self._lock:
+                current_generation = self._generation
+            if current_generation != generation:
+                generation = current_generation
+                self._stop_all()
+
+            if item is not None:
+                item_generation, audio, handle = item
+                if item_generation != generation:
+                    handle._finish(interrupted=True)
+                else:
+                    self._accept(audio, handle)
+
+            self._advance()
+
+            with self._lock:
+                if not self._scheduled and not self._waiting and self._incoming.empty():
+                    self._idle.set()
+
+    def _accept(self, audio: bytes, handle: PlaybackHandle):
+        try:
+            sound = mixer.Sound(file=io.BytesIO(audio))
+        except Exception as e:
+            self.logger.error(f"Could not decode audio clip: {e}")
+            handle._finish(interrupted=True)
+            return
+        self._waiting.append((sound, handle))
+
+    def _advance(self):
+        now = time.perf_counter()
+
+        # Completed clips: the queued clip has taken over the channel by now
+        while self._scheduled and self._scheduled[0][0] <= now:
+            if len(self._scheduled) > 1 and self._channel.get_queue() is not None:
+                time.sleep(_END_SLACK)
+                now = time.perf_counter()
+                continue
+            _, handle = self._scheduled.pop(0)
+            handle._finish()
+            if self._scheduled and self.on_clip_start:
+                self._notify_start()
+
+        # Keep one clip playing and one chained behind it for gapless playback
+        while self._waiting and len(self._scheduled) < 2:
+            sound, handle = self._waiting.popleft()
+            length = sound.get_length()
+            if not self._scheduled:
+                self._channel.play(sound)
+                handle.started_at = time.perf_counter()
+                self._scheduled.append((handle.started_at + length, handle))
+                self._notify_start()
+            else:
+                self._channel.queue(sound)
+                # Chained clips start where the one before them ends
+                handle.started_at = self._scheduled[-1][0]
+                self._scheduled.append((handle.started_at + length, handle))
+
+    def _notify_start(self):
+        if self.on_clip_start:
+            try:
+                self.on_clip_start()
+            except Exception as e:
+                self.logger.error(f"Playback start callback error: {e}")
+
+    def _stop_all(self):
+        self._channel.stop()
+        for _, handle in self._scheduled:
+            handle._finish(interrupted=True)
+        for _, handle in self._waiting:
+            handle._finish(interrupted=True)
+        self._scheduled.clear()
+        self._waiting.clear()
@@ -0,0 +1,220 @@
+"""Batch text mode for JARVIS
+
+    python main.py --batch utterances.txt [--output results.jsonl]
+    python main.py --batch data/conversation_log/segment-000001.jsonl --labels-only --check
+
+Reads utterances from a text file (one per line) or JSONL (``text`` or
+``user_input`` per record, as in the conversation log) and writes one JSON
+result per input line, in input order, as soon as it is ready. A record's
+``intent`` or ``offline_command`` field, when present, is reported as
+``expected`` next to the new prediction, for re-labeling logs and
+regression-testing intent changes.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import deque
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from intent_matcher import IntentMatch
+
+EXPECTED_KEYS = ('intent', 'offline_command')
+PASSTHROUGH_KEYS = ('id', 'timestamp')
+
+
+def read_utterances(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    """(line number, record) for every non-blank line of a text or JSONL file"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {'text': line}
+        else:
+            record = {'text': line}
+        yield number, record
+
+
+def utterance_text(record: Dict) -> str:
+    return str(record.get('text') or record.get('user_input') or '').strip()
+
+
+class BatchRunner:
+    """Pushes utterances through the assistant's offline and online paths without Tk or a microphone.
+
+    Utterances are classified ``batch_size`` at a time against one engine
+    snapshot, so the intent model runs once per batch. Those that resolve
+    to an offline command are answered at once (local actions such as
+    opening applications are refused, as for remote sessions); the rest go
+    to Gemini when ``online`` is set, at most ``concurrency`` at a time,
+    and otherwise get the offline fallback answer. Batch turns are not
+    added to the conversation history or used for training.
+    """
+
+    def __init__(self, assistant, batch_size: int = 256, concurrency: int = 8, online: bool = True,
+                 responses: bool = True, logger: Optional[logging.Logger] = None):
+        self.assistant = assistant
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.online = online
+        self.responses = responses
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = {'utterances': 0, 'offline': 0, 'online': 0, 'errors': 0,
+                      'expected': 0, 'changed': 0}
+        self._session = None
+
+    def run(self, lines: Iterable[str], output: IO[str]) -> Dict:
+        """Process every utterance and write results to ``output``; returns the run statistics"""
+        started = time.perf_counter()
+        self._session = self.assistant.new_session('batch', remote=True)
+        self.assistant.runtime.run(self._run(lines, output))
+        self.stats['elapsed_s'] = round(time.perf_counter() - started, 3)
+        return self.stats
+
+    async def _run(self, lines: Iterable[str], output: IO[str]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = deque()
+        for batch in self._batches(read_utterances(lines)):
+            results = await self.assistant.runtime.run_blocking(self.process_offline_batch, batch)
+            for (number, record), result in zip(batch, results):
+                if isinstance(result, dict):
+                    pending.append(result)
+                else:
+                    pending.append(asyncio.ensure_future(self._answer_online(semaphore, number, record, result)))
+            # Keep at most two batches in flight so memory stays flat on huge files
+            while len(pending) > 2 * self.batch_size:
+                self._write(output, await self._resolve(pending.popleft()))
+            while pending and self._done(pending[0]):
+                self._write(output, await self._resolve(pending.popleft()))
+            output.flush()
+        while pending:
+            self._write(output, await self._resolve(pending.popleft()))
+        output.flush()
+
+    def _batches(self, records: Iterator[Tuple[int, Dict]]) -> Iterator[List[Tuple[int, Dict]]]:
+        batch = []
+        for item in records:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def process_offline_batch(self, batch: List[Tuple[int, Dict]]) -> List:
+        """Classify a batch in one pass; a finished result dict per utterance, or its IntentMatch if it needs Gemini"""
+        assistant = self.assistant
+        engine = assistant.engine.current
+        texts = [utterance_text(record) for _, record in batch]
+        matches = [IntentMatch(None, 0.0, 'none')] * len(texts)
+        present = [index for index, text in enumerate(texts) if text]
+        for index, match in zip(present, engine.classify_many([texts[index] for index in present])):
+            matches[index] = match
+
+        results = []
+        for (number, record), text, match in zip(batch, texts, matches):
+            if not text:
+                result = self._result(number, record, text, match)
+                result['error'] = "empty utterance"
+            elif match.intent:
+                result = self._result(number, record, text, match)
+                result['mode'] = 'offline'
+                if self.responses:
+                    result['response'] = assistant.execute_offline_command(
+                        match.intent, text, allow_actions=False, engine=engine)
+            elif self.online and self.responses:
+                result = match
+            else:
+                result = self._result(number, record, text, match)
+                result['mode'] = 'offline'
+                if self.responses:
+                    result['response'] = assistant.generate_offline_response(text)
+            results.append(result)
+        return results
+
+    async def _answer_online(self, semaphore: asyncio.Semaphore, number: int, record: Dict,
+                             match: IntentMatch) -> Dict:
+        assistant = self.assistant
+        text = utterance_text(record)
+        result = self._result(number, record, text, match)
+        async with semaphore:
+            try:
+                cache_key = assistant.response_cache_key(text, self._session)
+                cached = None
+                if cache_key:
+                    cached = await assistant.runtime.run_blocking(assistant.response_cache.get, cache_key)
+                if cached is not None:
+                    result['response'] = cached
+                    result['cached'] = True
+                else:
+                    prompt = self._session.prompt_builder.build(text)
+                    result['response'] = await assistant.ask_gemini(prompt, cache_key, session=self._session)
+                result['mode'] = 'online'
+            except Exception as e:
+                self.logger.error(f"Batch online error on line {number}: {e}")
+                result['error'] = str(e)
+                result['mode'] = 'offline'
+                result['response'] = await assistant.runtime.run_blocking(assistant.generate_offline_response, text)
+        return result
+
+    def _result(self, number: int, record: Dict, text: str, match: IntentMatch) -> Dict:
+        result = {'line': number}
+        for key in PASSTHROUGH_KEYS:
+            if key in record:
+                result[key] = record[key]
+        result.update({
+            'text': text,
+            'intent': match.intent,
+            'confidence': round(match.confidence, 4),
+            'stage': match.stage,
+        })
+        for key in EXPECTED_KEYS:
+            if key in record:
+                result['expected'] = record[key]
+                break
+        return result
+
+    @staticmethod
+    def _done(item) -> bool:
+        return isinstance(item, dict) or item.done()
+
+    @staticmethod
+    async def _resolve(item) -> Dict:
+        return item if isinstance(item, dict) else await item
+
+    def _write(self, output: IO[str], result: Dict):
+        stats = self.stats
+        stats['utterances'] += 1
+        if result.get('error'):
+            stats['errors'] += 1
+        if result.get('mode') in ('offline', 'online'):
+            stats[result['mode']] += 1
+        if 'expected' in result:
+            stats['expected'] += 1
+            if result['expected'] != result['intent']:
+                stats['changed'] += 1
+        output.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def summary(stats: Dict) -> str:
+    elapsed = stats.get('elapsed_s') or 0.0
+    rate = stats['utterances'] / elapsed if elapsed else 0.0
+    text = (f"{stats['utterances']} utterances in {elapsed:.2f} s ({rate:.0f}/s): "
+            f"{stats['offline']} offline, {stats['online']} online, {stats['errors']} errors")
+    if stats['expected']:
+        agreed = stats['expected'] - stats['changed']
+        text += (f"; {agreed}/{stats['expected']} match the expected intent"
+                 f" ({100.0 * agreed / stats['expected']:.1f}%)")
+    return text
+
+
+def open_output(path: Optional[str]) -> IO[str]:
+    if path in (None, '-'):
+        return sys.stdout
+    return open(path, 'w', encoding='utf-8')
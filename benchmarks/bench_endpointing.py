@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""End-of-speech latency benchmark for the VAD endpointer.
+
+Replays WAV fixtures through the new VADEndpointer and through the previous
+``recognizer.listen(source, timeout=5, phrase_time_limit=10)`` behaviour, and
+reports how long after the true end of speech each one would hand the audio
+to the recognizer (measured on the audio timeline, i.e. as if live).
+
+Fixtures are 16-bit mono WAV files plus a ``labels.json`` mapping each file
+name to ``{"speech_start": s, "speech_end": s}``. No recordings ship with the
+repo: by default the benchmark runs on synthetic audio (harmonic "syllables"
+over room noise or hiss: short command, sentence, long dictation, noisy
+room), generated deterministically into the fixtures directory the first
+time it is missing. Point ``--fixtures`` at a directory of real, labelled
+recordings to benchmark those instead; ``--generate`` rewrites the
+synthetic set.
+
+    python -m benchmarks.bench_endpointing
+    python -m benchmarks.bench_endpointing --fixtures path/to/recordings
+"""
+
+import argparse
+import json
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from vad import VADEndpointer
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+CALIBRATION_SECONDS = 1.0
+DEFAULT_FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def synth_speech(duration: float, rng: np.random.Generator) -> np.ndarray:
+    """Voiced syllables with short intra-word gaps, roughly speech-shaped"""
+    out = []
+    elapsed = 0.0
+    while elapsed < duration:
+        length = min(rng.uniform(0.15, 0.25), duration - elapsed)
+        t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+        f0 = rng.uniform(110, 200)
+        tone = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 6))
+        envelope = np.sin(np.pi * t / max(length, 1e-3)) ** 0.5
+        out.append(3000 * envelope * tone)
+        elapsed += length
+        if elapsed >= duration:
+            break
+        gap = min(rng.choice([0.05, 0.08, 0.12, 0.25]), duration - elapsed)
+        out.append(np.zeros(int(gap * SAMPLE_RATE)))
+        elapsed += gap
+    return np.concatenate(out)
+
+
+def write_fixture(path: Path, lead: float, speech: float, tail: float,
+                  noise_rms: float, hiss: bool, seed: int) -> Dict[str, float]:
+    rng = np.random.default_rng(seed)
+    signal = np.concatenate([
+        np.zeros(int(lead * SAMPLE_RATE)),
+        synth_speech(speech, rng),
+        np.zeros(int(tail * SAMPLE_RATE)),
+    ])
+    noise = rng.normal(0, noise_rms, signal.size)
+    if not hiss:
+        # Low-passed room noise instead of white hiss
+        noise = np.convolve(noise, np.ones(8) / np.sqrt(8), mode="same")
+    pcm = np.clip(signal + noise, -32768, 32767).astype(np.int16)
+
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    return {"speech_start": lead, "speech_end": lead + speech}
+
+
+def generate_fixtures(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    specs = {
+        "short_command.wav": dict(lead=1.5, speech=0.5, tail=3.0, noise_rms=60, hiss=False, seed=1),
+        "sentence.wav": dict(lead=1.5, speech=2.5, tail=3.0, noise_rms=60, hiss=False, seed=2),
+        "long_dictation.wav": dict(lead=1.5, speech=14.0, tail=3.0, noise_rms=60, hiss=False, seed=3),
+        "noisy_command.wav": dict(lead=1.5, speech=0.8, tail=3.0, noise_rms=350, hiss=True, seed=4),
+    }
+    labels = {name: write_fixture(directory / name, **spec) for name, spec in specs.items()}
+    (directory / "labels.json").write_text(json.dumps(labels, indent=2))
+    print(f"Wrote {len(labels)} synthetic fixtures to {directory}")
+
+
+def read_frames(path: Path):
+    with wave.open(str(path), "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path.name}: expected 16-bit mono WAV")
+        rate = f.getframerate()
+        data = f.readframes(f.getnframes())
+    step = CHUNK * 2
+    return rate, [data[i:i + step] for i in range(0, len(data) - step + 1, step)]
+
+
+def run_vad(path: Path, hangover_ms: float) -> Optional[Dict[str, float]]:
+    rate, frames = read_frames(path)
+    frame_seconds = CHUNK / rate
+    calibration = int(CALIBRATION_SECONDS / frame_seconds)
+    endpointer = VADEndpointer(frame_seconds, hangover_ms=hangover_ms)
+    endpointer.calibrate(frames[:calibration])
+
+    for index in range(calibration, len(frames)):
+        segment = endpointer.process(index, frames[index])
+        if segment:
+            return {"decided_at": (index + 1) * frame_seconds, "captured_end": segment[1] * frame_seconds}
+    segment = endpointer.flush(len(frames))
+    if segment:
+        return {"decided_at": len(frames) * frame_seconds, "captured_end": segment[1] * frame_seconds}
+    return None
+
+
+def run_baseline(path: Path) -> Optional[Dict[str, float]]:
+    """Previous behaviour: ambient calibration, then listen(timeout=5, phrase_time_limit=10)"""
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(str(path)) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_SECONDS)
+        try:
+            recognizer.listen(source, timeout=5, phrase_time_limit=10)
+        except sr.WaitTimeoutError:
+            return None
+        decided_at = source.audio_reader.tell() / source.SAMPLE_RATE
+    return {"decided_at": decided_at, "captured_end": decided_at}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--generate", action="store_true", help="(re)write the synthetic fixtures first")
+    parser.add_argument("--hangover-ms", type=float, default=300.0)
+    parser.add_argument("--json", type=Path, help="also write results as JSON")
+    args = parser.parse_args()
+
+    labels_file = args.fixtures / "labels.json"
+    if args.generate or (args.fixtures == DEFAULT_FIXTURES and not labels_file.exists()):
+        generate_fixtures(args.fixtures)
+    elif not labels_file.exists():
+        parser.error(f"{labels_file} not found; use --generate to write synthetic fixtures there")
+    labels = json.loads(labels_file.read_text())
+
+    try:
+        import speech_recognition  # noqa: F401
+        runners = {"vad": lambda p: run_vad(p, args.hangover_ms), "listen (old)": run_baseline}
+    except ImportError:
+        print("speech_recognition not installed - reporting the VAD endpointer only")
+        runners = {"vad": lambda p: run_vad(p, args.hangover_ms)}
+
+    results: List[Dict] = []
+    print(f"{'fixture':<22} {'method':<14} {'latency ms':>11} {'truncated':>10}")
+    for name, label in sorted(labels.items()):
+        for method, runner in runners.items():
+            outcome = runner(args.fixtures / name)
+            row = {"fixture": name, "method": method, "latency_ms": None, "truncated": None}
+            if outcome:
+                row["latency_ms"] = (outcome["decided_at"] - label["speech_end"]) * 1000
+                row["truncated"] = outcome["captured_end"] < label["speech_end"] - 0.05
+            results.append(row)
+            latency = f"{row['latency_ms']:.0f}" if row["latency_ms"] is not None else "missed"
+            print(f"{name:<22} {method:<14} {latency:>11} {str(row['truncated']):>10}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the offline intent front end.
+
+Compares the previous nested-loop substring scan with the compiled
+Aho-Corasick cascade for 10, 1k and 10k command patterns.
+
+    python -m benchmarks.bench_intent [--utterances 2000]
+"""
+
+import argparse
+import importlib.util
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from intent_matcher import IntentCascade, normalize_utterance
+
+WORDS = [
+    "open", "start", "launch", "show", "play", "stop", "check", "find", "set", "turn",
+    "music", "camera", "browser", "weather", "timer", "alarm", "lights", "volume", "file",
+    "folder", "calendar", "note", "email", "message", "photo", "video", "system", "update",
+]
+
+FILLERS = [
+    "could you please", "hey jarvis", "i would like you to", "right now", "for me",
+    "tell me something interesting about", "what do you think of", "thanks",
+]
+
+
+def make_commands(pattern_count: int, patterns_per_command: int = 5) -> Dict[str, Dict]:
+    """Generate a synthetic offline_commands table with unique patterns"""
+    rng = random.Random(pattern_count)
+    commands = {}
+    seen = set()
+    while len(seen) < pattern_count:
+        command = f"command_{len(seen) // patterns_per_command}"
+        pattern = " ".join(rng.sample(WORDS, 3)) + f" {len(seen)}"
+        seen.add(pattern)
+        commands.setdefault(command, {"patterns": [], "action": command, "responses": ["ok"]})
+        commands[command]["patterns"].append(pattern)
+    return commands
+
+
+def make_utterances(commands: Dict[str, Dict], count: int) -> List[str]:
+    """Half the utterances contain a pattern, half contain none"""
+    rng = random.Random(count)
+    patterns = [p for data in commands.values() for p in data["patterns"]]
+    utterances = []
+    for i in range(count):
+        filler = rng.choice(FILLERS)
+        if i % 2 == 0:
+            utterances.append(f"{filler} {rng.choice(patterns)} please")
+        else:
+            utterances.append(f"{filler} {' '.join(rng.sample(WORDS, 4))}")
+    return utterances
+
+
+def nested_loop_scan(commands: Dict[str, Dict], user_input: str):
+    """The previous process_offline_request fallback"""
+    for command, data in commands.items():
+        for pattern in data["patterns"]:
+            if pattern in user_input:
+                return command
+    return None
+
+
+def measure(fn: Callable[[str], object], utterances: List[str]) -> Dict[str, float]:
+    timings = []
+    for utterance in utterances:
+        start = time.perf_counter()
+        fn(utterance)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[int(len(timings) * 0.99) - 1],
+    }
+
+
+def load_classifier(commands: Dict[str, Dict]):
+    """Build the incremental intent model if scikit-learn is installed"""
+    # intent_model imports numpy and sklearn lazily, so check for them up front
+    if any(importlib.util.find_spec(name) is None for name in ("numpy", "sklearn")):
+        return None
+    from intent_model import IncrementalIntentModel
+    texts = [p for data in commands.values() for p in data["patterns"]]
+    labels = [c for c, data in commands.items() for _ in data["patterns"]]
+    return IncrementalIntentModel(labels).partial_fit(texts, labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'patterns':>8} {'stage':<22} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for size in args.sizes:
+        commands = make_commands(size)
+        utterances = make_utterances(commands, args.utterances)
+        model = load_classifier(commands)
+
+        build_start = time.perf_counter()
+        cascade = IntentCascade(commands, get_model=lambda: model)
+        build_us = (time.perf_counter() - build_start) * 1e6
+
+        rows = [
+            ("nested loop (old)", lambda u: nested_loop_scan(commands, u.lower())),
+            ("automaton only", lambda u: cascade.automaton.match(normalize_utterance(u))),
+            ("cascade cold" if model else "cascade (no sklearn)", cascade.classify),
+        ]
+        if model:
+            rows.append(("cascade warm memo", cascade.classify))
+
+        for name, fn in rows:
+            result = measure(fn, utterances)
+            print(f"{size:>8} {name:<22} {result['mean_us']:>10.1f} "
+                  f"{result['p50_us']:>10.1f} {result['p99_us']:>10.1f}")
+        print(f"{size:>8} {'automaton build':<22} {build_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
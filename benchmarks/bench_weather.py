@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Latency of answering a weather question.
+
+Runs the WeatherService against the local stub server (with a simulated
+network delay) and compares answering from the cached snapshot with the
+previous behaviour of fetching on every question.
+
+    python -m benchmarks.bench_weather [--questions 200 --delay-ms 250]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from async_runtime import AsyncRuntime
+from benchmarks.weather_stub import WeatherStubServer
+from weather_service import WeatherService
+
+
+def summarize(name: str, samples_ms):
+    samples = sorted(samples_ms)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<22} p50 {statistics.median(samples):9.3f} ms   p99 {p99:9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    stub = WeatherStubServer(delay=args.delay_ms / 1000).start()
+    runtime = AsyncRuntime()
+    runtime.start()
+    with tempfile.TemporaryDirectory() as directory:
+        service = WeatherService(runtime, "stub-key", "London", str(Path(directory) / "weather.json"),
+                                 api_url=stub.url)
+
+        # Previous behaviour: one request per question
+        fetch_ms = []
+        for _ in range(min(args.questions, 20)):
+            started = time.perf_counter()
+            runtime.run(service.refresh())
+            service.answer()
+            fetch_ms.append((time.perf_counter() - started) * 1000)
+
+        cached_ms = []
+        for _ in range(args.questions):
+            started = time.perf_counter()
+            service.answer()
+            cached_ms.append((time.perf_counter() - started) * 1000)
+
+        # Offline after a restart: answered from the persisted snapshot
+        restarted = WeatherService(runtime, "stub-key", "London", str(Path(directory) / "weather.json"),
+                                   api_url=stub.url, ttl=0, can_fetch=lambda: False)
+        print(f"Offline answer: {restarted.answer()}")
+
+    runtime.stop()
+    stub.shutdown()
+    summarize("fetch per question", fetch_ms)
+    summarize("cached snapshot", cached_ms)
+    print(f"Stub served {stub.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""In-process stand-ins for the assistant's speech backends.
+
+Replace the network and audio-device calls (Google speech recognition,
+pyttsx3 and Google Cloud TTS) with fakes whose latency is drawn from a
+configurable distribution, so the rest of the pipeline runs unchanged:
+
+    LatencyDistribution.parse("lognormal:300,0.4")   # median 300 ms
+    LatencyDistribution.parse("uniform:200,400")     # ms
+    LatencyDistribution.parse("normal:250,50")       # mean, sd in ms
+    LatencyDistribution.parse("fixed:20")            # ms
+"""
+
+import io
+import random
+import time
+import wave
+from collections import deque
+from typing import Deque, Optional
+
+import speech_recognition as sr
+
+SAMPLE_RATE = 16000
+SECONDS_PER_WORD = 0.3
+
+
+class LatencyDistribution:
+    """Random delays in seconds, reproducible for a given seed"""
+
+    KINDS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+    def __init__(self, kind: str, a: float, b: float = 0.0, seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown latency distribution {kind!r}, expected one of {', '.join(self.KINDS)}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> 'LatencyDistribution':
+        """``kind:a[,b]`` with times in milliseconds (lognormal: median in ms, sigma)"""
+        kind, _, params = spec.partition(':')
+        values = [float(value) for value in params.split(',') if value.strip()]
+        if kind == 'fixed' and len(values) == 1:
+            return cls(kind, values[0] / 1000, seed=seed)
+        if kind == 'lognormal' and len(values) == 2:
+            return cls(kind, values[0] / 1000, values[1], seed=seed)
+        if kind in ('uniform', 'normal') and len(values) == 2:
+            return cls(kind, values[0] / 1000, values[1] / 1000, seed=seed)
+        raise ValueError(f"invalid latency distribution {spec!r}")
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            return self.a
+        if self.kind == 'uniform':
+            return self.rng.uniform(self.a, self.b)
+        if self.kind == 'normal':
+            return max(0.0, self.rng.gauss(self.a, self.b))
+        return self.a * self.rng.lognormvariate(0.0, self.b)
+
+    def __str__(self) -> str:
+        if self.kind == 'fixed':
+            return f"fixed:{self.a * 1000:g}"
+        if self.kind == 'lognormal':
+            return f"lognormal:{self.a * 1000:g},{self.b:g}"
+        return f"{self.kind}:{self.a * 1000:g},{self.b * 1000:g}"
+
+
+def silent_wav(text: str) -> bytes:
+    """A silent 16 kHz mono WAV clip roughly as long as it takes to say ``text``"""
+    frames = int(SAMPLE_RATE * SECONDS_PER_WORD * max(1, len(text.split())))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(SAMPLE_RATE)
+        clip.writeframes(b'\x00\x00' * frames)
+    return buffer.getvalue()
+
+
+class FakeRecognizer(sr.Recognizer):
+    """``speech_recognition.Recognizer`` whose Google recognition returns scripted transcripts"""
+
+    def __init__(self, latency: LatencyDistribution):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+        self._script: Deque[str] = deque()
+
+    def expect(self, text: str):
+        """Queue the transcript the next recognition returns"""
+        self._script.append(text)
+
+    def recognize_google(self, audio_data, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        if not self._script:
+            raise sr.UnknownValueError()
+        return self._script.popleft()
+
+
+class FakeSpeechEngine:
+    """pyttsx3 engine stand-in that takes ``latency`` per spoken word"""
+
+    def __init__(self, latency: LatencyDistribution):
+        self.latency = latency
+        self.calls = 0
+        self._queued = []
+
+    def say(self, text: str, name: Optional[str] = None):
+        self._queued.append(text)
+
+    def runAndWait(self):
+        queued, self._queued = self._queued, []
+        for text in queued:
+            self.calls += 1
+            time.sleep(sum(self.latency.sample() for _ in text.split()))
+
+    def stop(self):
+        self._queued.clear()
+
+    def getProperty(self, name: str):
+        return [] if name == 'voices' else None
+
+    def setProperty(self, name: str, value):
+        pass
+
+    def connect(self, topic: str, callback):
+        pass
+
+
+class FakeGoogleTTS:
+    """Google Cloud TTS stand-in returning a dummy MP3 payload after ``latency``"""
+
+    def __init__(self, latency: LatencyDistribution, bytes_per_char: int = 160):
+        self.latency = latency
+        self.bytes_per_char = bytes_per_char
+        self.calls = 0
+
+    def synthesize(self, text: str) -> bytes:
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        return b'\xff\xf3' + b'\x00' * (len(text) * self.bytes_per_char)
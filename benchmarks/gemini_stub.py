@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""In-process stand-in for a Gemini ``GenerativeModel``.
+
+Implements the ``generate_content_async`` surface that ``GeminiClient``
+uses, both whole and streamed, with a configurable latency, jitter and
+failure rate, so the assistant and its server can be load tested without
+network access or an API key:
+
+    assistant.attach_gemini(StubGenerativeModel(latency=0.4))
+"""
+
+import asyncio
+import random
+import re
+from typing import AsyncIterator, Callable, List, Optional
+
+from gemini_client import google_exceptions
+
+
+class StubChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubStream:
+    def __init__(self, chunks: List[str], chunk_delay: float):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    async def __aiter__(self) -> AsyncIterator[StubChunk]:
+        for index, chunk in enumerate(self.chunks):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+            yield StubChunk(chunk)
+
+
+class StubGenerativeModel:
+    """Answers every prompt after ``latency`` (+/- ``jitter``) seconds, or after ``delay()`` if given"""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, chunk_delay: float = 0.05,
+                 failure_rate: float = 0.0, model_name: str = "models/gemini-stub",
+                 delay: Optional[Callable[[], float]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.delay = delay or (lambda: random.uniform(self.latency - self.jitter, self.latency + self.jitter))
+        self.chunk_delay = chunk_delay
+        self.failure_rate = failure_rate
+        self.model_name = model_name
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(0.0, self.delay()))
+            if random.random() < self.failure_rate:
+                raise google_exceptions.ServiceUnavailable("stub failure")
+        finally:
+            self.in_flight -= 1
+
+        text = self.reply(prompt)
+        if stream:
+            return StubStream(re.findall(r"[^.]+\.\s*", text), self.chunk_delay)
+        return StubChunk(text)
+
+    @staticmethod
+    def reply(prompt: str) -> str:
+        questions = re.findall(r"Human: (.*)", prompt)
+        question = questions[-1].strip() if questions else "that"
+        return f"Here is a stub answer about {question}. Nothing was sent to Gemini."
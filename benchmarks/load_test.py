@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Load test for the headless assistant server.
+
+Starts an in-process server backed by a Gemini stub (in a scratch data
+directory, so real history and models are untouched) and drives it with
+concurrent client sessions over HTTP or WebSocket, then reports throughput
+and p50/p99 turn latency:
+
+    python -m benchmarks.load_test [--sessions 20 --turns 10 --latency-ms 400 --ws]
+    python -m benchmarks.load_test --url http://127.0.0.1:8765   # an already running server
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+
+# Offline commands answer instantly; the rest go to Gemini when online
+QUESTIONS = [
+    "explain how {topic} works",
+    "what is the history of {topic}",
+    "give me three facts about {topic}",
+    "what time is it",
+    "summarize the latest thinking on {topic}",
+]
+TOPICS = ["volcanoes", "tides", "jazz", "bridges", "honeybees", "glaciers", "compilers", "chess"]
+
+
+def percentile(samples, point: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))]
+
+
+def start_local_server(args):
+    """In-process assistant + server with a stubbed Gemini; returns (server, stub, assistant)"""
+    # Scratch working directory: the assistant keeps its data paths relative to it
+    root = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(root))
+    os.chdir(tempfile.mkdtemp(prefix="jarvis-load-"))
+    os.environ.setdefault('GEMINI_RATE_PER_MIN', str(args.rate_per_min))
+    os.environ.setdefault('GEMINI_BURST', str(args.sessions))
+    os.environ.setdefault('HTTP_PREWARM', 'false')
+    os.environ.setdefault('RESPONSE_CACHE_SIZE', '0' if args.no_cache else '500')
+
+    from benchmarks.gemini_stub import StubGenerativeModel
+    from main import HybridAssistant
+    from server import AssistantServer
+
+    assistant = HybridAssistant(headless=True)
+    if not assistant.startup.wait(['offline', 'apis'], timeout=120):
+        raise SystemExit(f"Assistant failed to start: {assistant.startup.failures()}")
+
+    stub = StubGenerativeModel(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000)
+    assistant.attach_gemini(stub)
+    # The stub is always reachable
+    assistant.connectivity.probe = lambda: True
+    assistant.connectivity.refresh()
+    assistant.startup.wait(timeout=30)
+    assistant.attach_online()
+
+    server = AssistantServer(assistant, port=0, max_sessions=args.sessions * 2, logger=assistant.logger)
+    assistant.runtime.run(server.start())
+    return server, stub, assistant
+
+
+async def client(http: aiohttp.ClientSession, url: str, client_id: int, turns: int, use_ws: bool,
+                 results: list):
+    async with http.post(f"{url}/sessions") as response:
+        session_id = (await response.json())['session_id']
+
+    questions = [QUESTIONS[(client_id + n) % len(QUESTIONS)].format(topic=f"{TOPICS[n % len(TOPICS)]} {client_id}-{n}")
+                 for n in range(turns)]
+    if use_ws:
+        async with http.ws_connect(f"{url}/sessions/{session_id}/ws") as ws:
+            for question in questions:
+                started = time.perf_counter()
+                first = None
+                await ws.send_json({'text': question})
+                while True:
+                    message = await ws.receive_json()
+                    if message['type'] == 'sentence' and first is None:
+                        first = time.perf_counter() - started
+                    if message['type'] in ('done', 'error'):
+                        break
+                results.append((message.get('mode') or 'error', time.perf_counter() - started, first))
+    else:
+        for question in questions:
+            started = time.perf_counter()
+            async with http.post(f"{url}/sessions/{session_id}/turns", json={'text': question}) as response:
+                body = await response.json()
+            mode = body.get('mode') if response.status == 200 else 'error'
+            results.append((mode, time.perf_counter() - started, None))
+
+    async with http.delete(f"{url}/sessions/{session_id}"):
+        pass
+
+
+async def drive(url: str, args) -> tuple:
+    results = []
+    connector = aiohttp.TCPConnector(limit=args.sessions)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http, url, i, args.turns, args.ws, results) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def report(results, elapsed: float):
+    print(f"{len(results)} turns in {elapsed:.2f} s -> {len(results) / elapsed:.1f} turns/s")
+    by_mode = defaultdict(list)
+    for mode, latency, _ in results:
+        by_mode[mode].append(latency * 1000)
+    by_mode['all'] = [latency * 1000 for _, latency, _ in results]
+    for mode, samples in sorted(by_mode.items()):
+        print(f"  {mode:<8} n={len(samples):<5} p50 {statistics.median(samples):8.1f} ms"
+              f"   p99 {percentile(samples, 99):8.1f} ms")
+    first = [first * 1000 for _, _, first in results if first is not None]
+    if first:
+        print(f"  first sentence      p50 {statistics.median(first):8.1f} ms   p99 {percentile(first, 99):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="test a running server instead of an in-process one")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent client sessions")
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--ws", action="store_true", help="use WebSocket turns (streamed replies)")
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="stub Gemini latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--rate-per-min", type=float, default=100000.0,
+                        help="Gemini rate limit for the in-process server")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    args = parser.parse_args()
+
+    server = stub = assistant = None
+    url = args.url
+    if url is None:
+        server, stub, assistant = start_local_server(args)
+        url = server.url
+
+    results, elapsed = asyncio.run(drive(url.rstrip('/'), args))
+    report(results, elapsed)
+
+    if stub is not None:
+        print(f"Stub Gemini: {stub.calls} calls, peak {stub.peak_in_flight} in flight")
+        assistant.runtime.run(server.stop())
+        assistant.startup.shutdown()
+        assistant.runtime.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""End-to-end replay benchmark for the assistant pipeline.
+
+Starts a headless ``HybridAssistant`` in a scratch data directory with fake
+speech recognition, pyttsx3, Google TTS and Gemini backends (latencies drawn
+from configurable distributions, see ``benchmarks.fakes``), replays recorded
+conversation transcripts through it turn by turn and reports latency per
+stage (speech recognition, intent, prompt build, LLM, TTS, history
+persistence, retraining) and memory growth:
+
+    python -m benchmarks.replay [TRANSCRIPT ...] [--repeat 3 --llm lognormal:600,0.4]
+    python -m benchmarks.replay --json results.json
+    python -m benchmarks.replay --baseline            # compare with benchmarks/baseline.json
+    python -m benchmarks.replay --save-baseline       # record a new baseline
+    python path/to/benchmarks/replay.py ...           # from any other directory
+
+Transcripts are text files (one utterance per line) or JSONL such as the
+conversation log; a record's ``mode`` decides whether the turn is answered
+online or offline (``--mode`` overrides it). Comparing with a baseline exits
+with status 1 when a stage's p50 or p95, or the memory growth, regressed.
+Stages timed on the CPU are compared after rescaling the baseline by a
+machine-speed calibration, so a baseline recorded elsewhere still applies;
+stages with fewer than ``MIN_SAMPLES`` samples are reported but not gated.
+"""
+
+import argparse
+import functools
+import gc
+import hashlib
+import inspect
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# Importable as a script from any directory, not only via -m from the repo root
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_TRANSCRIPT = Path(__file__).resolve().parent / "transcripts" / "sample.jsonl"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+MIN_SAMPLES = 5
+MIN_SAMPLES_P95 = 20
+
+# Dominated by the fakes' simulated latency, so independent of machine speed
+SIMULATED_STAGES = ('stt', 'llm', 'turn', 'tts')
+
+# Stages in report order
+STAGES = ('stt', 'intent', 'prompt', 'llm', 'turn', 'tts', 'history', 'history_sync', 'retrain', 'retrain_full')
+
+
+def percentile(samples, point: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))]
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak size where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def machine_speed_ms(rounds: int = 10) -> float:
+    """Best time of a fixed CPU-bound workload, for comparing runs across machines"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        digest = b""
+        for i in range(20000):
+            digest = hashlib.sha256(digest + i.to_bytes(4, 'big')).digest()
+        json.loads(json.dumps([{'i': i, 'text': str(i) * 4} for i in range(5000)]))
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples)
+
+
+class StageTimer:
+    """Collects wall-clock samples per stage from any thread"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._patches: List[Tuple[object, str, object]] = []
+        self._excluded = threading.local()
+
+    def record(self, stage: str, seconds: float):
+        if self.enabled and not getattr(self._excluded, 'active', False):
+            with self._lock:
+                self.samples[stage].append(seconds)
+
+    def time(self, stage: str, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def patch(self, owner, name: str, stage: str):
+        """Time every call of ``owner.name`` (a class or an instance attribute)"""
+        original = getattr(owner, name)
+        timer = self
+
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    timer.record(stage, time.perf_counter() - started)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    timer.record(stage, time.perf_counter() - started)
+
+        self._patches.append((owner, name, owner.__dict__.get(name) if isinstance(owner, type) else None))
+        setattr(owner, name, timed)
+
+    def exclude(self, owner, name: str):
+        """Record nothing on the calling thread while ``owner.name`` runs"""
+        original = getattr(owner, name)
+        excluded = self._excluded
+
+        @functools.wraps(original)
+        def untimed(*args, **kwargs):
+            excluded.active = True
+            try:
+                return original(*args, **kwargs)
+            finally:
+                excluded.active = False
+
+        self._patches.append((owner, name, owner.__dict__.get(name) if isinstance(owner, type) else None))
+        setattr(owner, name, untimed)
+
+    def restore(self):
+        for owner, name, original in reversed(self._patches):
+            if original is not None:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patches.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+        stages = {}
+        for stage in sorted(self.samples, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            samples = [s * 1000 for s in self.samples[stage]]
+            stages[stage] = {
+                'n': len(samples),
+                'mean_ms': round(statistics.fmean(samples), 3),
+                'p50_ms': round(statistics.median(samples), 3),
+                'p95_ms': round(percentile(samples, 95), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+                'total_ms': round(sum(samples), 3),
+            }
+        return stages
+
+
+def load_transcripts(paths: Iterable[str]) -> List[Dict]:
+    from batch import read_utterances, utterance_text
+
+    turns = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for _, record in read_utterances(f):
+                text = utterance_text(record)
+                if text:
+                    turns.append({'text': text, 'mode': record.get('mode')})
+    return turns
+
+
+def start_assistant(args, fakes: Dict):
+    """Headless assistant in a scratch directory with every backend faked"""
+    os.chdir(tempfile.mkdtemp(prefix="jarvis-replay-"))
+    os.environ.setdefault('GEMINI_RATE_PER_MIN', '100000')
+    os.environ.setdefault('HTTP_PREWARM', 'false')
+    os.environ.setdefault('TTS_WARMUP', 'false')
+    os.environ.setdefault('RESPONSE_CACHE_SIZE', '0' if args.no_cache else '500')
+
+    from benchmarks.gemini_stub import StubGenerativeModel
+    from main import HybridAssistant
+
+    assistant = HybridAssistant(headless=True)
+    if not assistant.startup.wait(['offline', 'apis', 'audio'], timeout=120):
+        raise SystemExit(f"Assistant failed to start: {assistant.startup.failures()}")
+
+    assistant.recognizer = fakes['recognizer']
+    assistant.tts_engine = fakes['speech_engine']
+    assistant.tts_client = fakes['google_tts']
+    assistant.synthesize_google_tts = fakes['google_tts'].synthesize
+    assistant.attach_gemini(StubGenerativeModel(delay=fakes['llm'].sample))
+    assistant.connectivity.probe = lambda: True
+    assistant.connectivity.refresh()
+    assistant.startup.wait(timeout=30)
+    assistant.attach_online()
+    return assistant
+
+
+def instrument(timer: StageTimer, assistant):
+    from intent_matcher import IntentCascade
+    from intent_model import IncrementalIntentModel
+    from prompt_context import PromptBuilder
+
+    timer.patch(IntentCascade, 'classify', 'intent')
+    timer.patch(PromptBuilder, 'build', 'prompt')
+    timer.patch(IncrementalIntentModel, 'partial_fit', 'retrain')
+    timer.patch(assistant.gemini, 'generate', 'llm')
+    timer.patch(assistant.history_log, 'append', 'history')
+    # Cross-validating a rebuilt model refits it several times; those are not retrains
+    timer.exclude(assistant, 'validate_ml_model')
+
+
+def replay_turn(assistant, session, timer: StageTimer, fakes: Dict, turn: Dict, mode: str):
+    """One spoken turn: recognize, answer online or offline as recorded, then speak the answer"""
+    from benchmarks.fakes import silent_wav
+
+    fakes['recognizer'].expect(turn['text'])
+    text = timer.time('stt', assistant.transcribe, silent_wav(turn['text'])) or turn['text']
+
+    online = (turn.get('mode') or 'online') == 'online' if mode == 'recorded' else mode == 'online'
+    assistant.is_online = online
+    started = time.perf_counter()
+    if online:
+        response = assistant.runtime.run(assistant.process_online_request(text, session=session))
+    else:
+        response = assistant.process_offline_request(text, session)
+    timer.record('turn', time.perf_counter() - started)
+
+    started = time.perf_counter()
+    if assistant.synthesize_speech(response) is None:
+        assistant.tts_engine.say(response)
+        assistant.tts_engine.runAndWait()
+    timer.record('tts', time.perf_counter() - started)
+
+
+def run(args) -> Dict:
+    from benchmarks.fakes import FakeGoogleTTS, FakeRecognizer, FakeSpeechEngine, LatencyDistribution
+
+    turns = load_transcripts(args.transcripts)
+    if not turns:
+        raise SystemExit("No utterances in the given transcripts")
+    fakes = {
+        'recognizer': FakeRecognizer(LatencyDistribution.parse(args.stt, seed=args.seed)),
+        'speech_engine': FakeSpeechEngine(LatencyDistribution.parse(args.offline_tts, seed=args.seed + 1)),
+        'google_tts': FakeGoogleTTS(LatencyDistribution.parse(args.tts, seed=args.seed + 2)),
+        'llm': LatencyDistribution.parse(args.llm, seed=args.seed + 3),
+    }
+
+    speed = machine_speed_ms()
+    assistant = start_assistant(args, fakes)
+    # Like a remote session, so replayed commands never open applications or shut down
+    session = assistant.new_session('replay', remote=True)
+    timer = StageTimer()
+    instrument(timer, assistant)
+    try:
+        for turn in turns[:args.warmup]:
+            replay_turn(assistant, session, timer, fakes, turn, args.mode)
+        for fake in (fakes['recognizer'], fakes['speech_engine'], fakes['google_tts'], assistant.gemini_model):
+            fake.calls = 0
+        gc.collect()
+        rss_start = rss_peak = rss_mb()
+
+        timer.enabled = True
+        started = time.perf_counter()
+        replayed = 0
+        for _ in range(args.repeat):
+            for turn in turns:
+                replay_turn(assistant, session, timer, fakes, turn, args.mode)
+                replayed += 1
+                rss_peak = max(rss_peak, rss_mb())
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        rss_end = rss_mb()
+        # Calibrated on both sides of the replay, as the machine's speed drifts under load
+        speed = (speed + machine_speed_ms()) / 2
+
+        # Let background incremental training catch up, then time the periodic jobs
+        deadline = time.monotonic() + 30
+        while assistant.intent_trainer.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        timer.time('history_sync', assistant.save_conversation_history)
+        # Their partial_fit calls are not incremental retrains
+        for _ in range(args.full_retrains):
+            timer.enabled = False
+            started = time.perf_counter()
+            assistant.train_ml_model(force=True)
+            timer.enabled = True
+            timer.record('retrain_full', time.perf_counter() - started)
+            # Validation runs in the background; keep it from overlapping the next retrain
+            for thread in threading.enumerate():
+                if thread.name == 'model-validation':
+                    thread.join()
+        timer.enabled = False
+    finally:
+        timer.restore()
+        assistant.intent_trainer.stop()
+        assistant.startup.shutdown()
+        assistant.runtime.stop()
+
+    return {
+        'config': {
+            'transcripts': [Path(path).name for path in args.transcripts],
+            'turns': len(turns),
+            'repeat': args.repeat,
+            'mode': args.mode,
+            'cache': not args.no_cache,
+            'full_retrains': args.full_retrains,
+            'latency': {'stt': args.stt, 'llm': args.llm, 'tts': args.tts, 'offline_tts': args.offline_tts},
+            'seed': args.seed,
+        },
+        'turns': replayed,
+        'machine_speed_ms': round(speed, 3),
+        'elapsed_s': round(elapsed, 3),
+        'stages': timer.summary(),
+        'backend_calls': {
+            'stt': fakes['recognizer'].calls,
+            'google_tts': fakes['google_tts'].calls,
+            'offline_tts': fakes['speech_engine'].calls,
+            'llm': assistant.gemini_model.calls,
+        },
+        'memory': {
+            'rss_start_mb': round(rss_start, 2),
+            'rss_peak_mb': round(rss_peak, 2),
+            'rss_end_mb': round(rss_end, 2),
+            'growth_mb': round(rss_end - rss_start, 2),
+            'growth_kb_per_turn': round((rss_end - rss_start) * 1024 / replayed, 2),
+        },
+    }
+
+
+def report(results: Dict):
+    print(f"{results['turns']} turns in {results['elapsed_s']:.2f} s"
+          f" ({results['config']['turns']} per pass x {results['config']['repeat']})")
+    print(f"  {'stage':<13}{'n':>6}{'mean':>11}{'p50':>11}{'p95':>11}{'p99':>11}   ms")
+    for stage, stats in results['stages'].items():
+        print(f"  {stage:<13}{stats['n']:>6}{stats['mean_ms']:>11.2f}{stats['p50_ms']:>11.2f}"
+              f"{stats['p95_ms']:>11.2f}{stats['p99_ms']:>11.2f}")
+    memory = results['memory']
+    print(f"  memory: RSS {memory['rss_start_mb']:.1f} -> {memory['rss_end_mb']:.1f} MB"
+          f" (peak {memory['rss_peak_mb']:.1f} MB, {memory['growth_kb_per_turn']:+.1f} KB/turn)")
+    print(f"  backend calls: {results['backend_calls']}")
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_delta_ms: float,
+            memory_slack_mb: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as readable lines"""
+    regressions = []
+    if results['config'] != baseline.get('config'):
+        print("warning: benchmark configuration differs from the baseline's", file=sys.stderr)
+    # How much slower this machine is than the baseline's, for stages timed on the CPU
+    speed = 1.0
+    if results.get('machine_speed_ms') and baseline.get('machine_speed_ms'):
+        speed = results['machine_speed_ms'] / baseline['machine_speed_ms']
+        print(f"machine speed relative to the baseline: {1 / speed:.2f}x", file=sys.stderr)
+    for stage, base in baseline.get('stages', {}).items():
+        current = results['stages'].get(stage)
+        if current is None:
+            continue
+        if min(current['n'], base['n']) < MIN_SAMPLES:
+            print(f"note: {stage} not compared, fewer than {MIN_SAMPLES} samples", file=sys.stderr)
+            continue
+        # With few samples p95 is just the slowest one, too noisy to compare
+        metrics = ('p50_ms', 'p95_ms') if min(current['n'], base['n']) >= MIN_SAMPLES_P95 else ('p50_ms',)
+        scale = 1.0 if stage in SIMULATED_STAGES else speed
+        for metric in metrics:
+            expected = base[metric] * scale
+            limit = max(expected * (1 + tolerance), expected + min_delta_ms)
+            if current[metric] > limit:
+                regressions.append(f"{stage} {metric[:3]}: {current[metric]:.2f} ms vs baseline"
+                                   f" {expected:.2f} ms (limit {limit:.2f} ms)")
+    base_growth = baseline.get('memory', {}).get('growth_mb')
+    if base_growth is not None:
+        limit = base_growth + max(memory_slack_mb, abs(base_growth) * tolerance)
+        if results['memory']['growth_mb'] > limit:
+            regressions.append(f"memory growth: {results['memory']['growth_mb']:.2f} MB vs baseline"
+                               f" {base_growth:.2f} MB (limit {limit:.2f} MB)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("transcripts", nargs="*", default=[str(DEFAULT_TRANSCRIPT)],
+                        help="text or JSONL transcripts to replay (default: the bundled sample)")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the transcripts")
+    parser.add_argument("--warmup", type=int, default=5, help="turns replayed before measuring")
+    parser.add_argument("--mode", choices=("recorded", "online", "offline"), default="recorded",
+                        help="answer each turn in its recorded mode, or force one")
+    parser.add_argument("--stt", default="lognormal:350,0.3", help="speech recognition latency")
+    parser.add_argument("--llm", default="lognormal:600,0.4", help="Gemini latency")
+    parser.add_argument("--tts", default="lognormal:250,0.3", help="Google TTS latency")
+    parser.add_argument("--offline-tts", default="fixed:5", help="pyttsx3 latency per word")
+    parser.add_argument("--full-retrains", type=int, default=5, help="forced full retrains timed at the end")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="FILE",
+                        help="compare with a stored baseline (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="FILE",
+                        help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative slowdown before a stage counts as regressed")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="ignore slowdowns smaller than this, to absorb timer noise")
+    parser.add_argument("--memory-slack-mb", type=float, default=8.0)
+    args = parser.parse_args(argv)
+    args.transcripts = [str(Path(path).resolve()) for path in args.transcripts]
+    for option in ('json', 'baseline', 'save_baseline'):
+        if getattr(args, option):
+            setattr(args, option, str(Path(getattr(args, option)).resolve()))
+
+    results = run(args)
+    report(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+                f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.memory_slack_mb)
+        if regressions:
+            print("Regressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenWeatherMap current-weather endpoint.
+
+Serves ``/data/2.5/weather`` with a fixed OpenWeatherMap-shaped reply, an
+optional artificial delay and an optional failure rate, so the weather
+service can be exercised without network access or an API key:
+
+    python -m benchmarks.weather_stub --port 8099 --delay-ms 300
+    WEATHER_API_URL=http://127.0.0.1:8099/data/2.5/weather python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class WeatherStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        stub = self.server
+        stub.requests += 1
+        url = urlsplit(self.path)
+        if url.path != "/data/2.5/weather":
+            return self._reply(404, {"cod": "404", "message": "not found"})
+        if stub.delay:
+            time.sleep(stub.delay)
+        if random.random() < stub.failure_rate:
+            return self._reply(503, {"cod": "503", "message": "stub failure"})
+
+        query = parse_qs(url.query)
+        city = query.get("q", ["London"])[0].split(",")[0]
+        self._reply(200, {
+            "name": city,
+            "main": {"temp": stub.temperature, "humidity": 60},
+            "weather": [{"main": "Clouds", "description": stub.description}],
+        })
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WeatherStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, temperature: float = 18.0, description: str = "scattered clouds",
+                 delay: float = 0.0, failure_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), WeatherStubHandler)
+        self.temperature = temperature
+        self.description = description
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/data/2.5/weather"
+
+    def start(self) -> "WeatherStubServer":
+        """Serve on a daemon thread (for tests and benchmarks)"""
+        threading.Thread(target=self.serve_forever, name="weather-stub", daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--temperature", type=float, default=18.0)
+    parser.add_argument("--description", default="scattered clouds")
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = WeatherStubServer(args.port, args.temperature, args.description,
+                               args.delay_ms / 1000, args.failure_rate)
+    print(f"Weather stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@
 
 import os
 import json
-import requests
 from pathlib import Path
 from typing import Dict, List
 
+from http_client import shared_client
+
 class JarvisConfig:
     """Helper class for JARVIS configuration and setup"""
     
@@ -150,12 +151,14 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
         from dotenv import load_dotenv
         load_dotenv()
         
+        http = shared_client()
+        
         # Test Gemini API
         gemini_key = os.getenv('GEMINI_API_KEY')
         if gemini_key and gemini_key != 'your_gemini_api_key_here':
             try:
                 api_url = f"https://generativelanguage.googleapis.com/v1/models/gemini-pro:generateContent?key={gemini_key}"
-                response = requests.post(
+                response = http.post(
                     api_url,
                     headers={"Content-Type": "application/json"},
                     json={
@@ -177,7 +180,7 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
         deepgram_key = os.getenv('DEEPGRAM_API_KEY')
         if deepgram_key and deepgram_key != 'your_deepgram_api_key_here':
             try:
-                response = requests.get(
+                response = http.get(
                     "https://api.deepgram.com/v1/projects",
                     headers={"Authorization": f"Token {deepgram_key}"},
                     timeout=5
@@ -195,7 +198,7 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
         hf_key = os.getenv('HUGGINGFACE_API_KEY')
         if hf_key and hf_key != 'your_huggingface_api_key_here':
             try:
-                response = requests.post(
+                response = http.post(
                     "https://api-inference.huggingface.co/models/facebook/blenderbot-400M-distill",
                     headers={"Authorization": f"Bearer {hf_key}"},
                     json={"inputs": "Hello"},
@@ -209,6 +212,8 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
                 print(f"⚠ HuggingFace API: Connection failed - {str(e)}")
         else:
             print("⚠ HuggingFace API: Key not configured (optional)")
+        
+        print(f"  HTTP: {http.stats.summary()}")
     
     def download_piper_voices(self):
         """Download common Piper voice models"""
@@ -224,6 +229,7 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
                 "url_base": "https://huggingface.co/rhasspy/piper-voices/resolve/v1.0.0/en/en_US/libritts/high/"
             }
         ]
+        http = shared_client()
         
         for model in models_to_download:
             model_dir = self.piper_dir / "models"
@@ -239,7 +245,7 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
                 
                 # Download model file
                 model_url = model['url_base'] + f"{model['name']}.onnx"
-                response = requests.get(model_url, stream=True, timeout=30)
+                response = http.get(model_url, stream=True, timeout=30)
                 response.raise_for_status()
                 
                 with open(model_file, 'wb') as f:
@@ -248,7 +254,7 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
                 
                 # Download config file
                 config_url = model['url_base'] + f"{model['name']}.onnx.json"
-                response = requests.get(config_url, timeout=10)
+                response = http.get(config_url)
                 response.raise_for_status()
                 
                 with open(config_file, 'wb') as f:
@@ -258,6 +264,8 @@ OPENWEATHER_API_KEY=your_openweather_api_key_here"""
                 
             except Exception as e:
                 print(f"⚠ Failed to download {model['name']}: {str(e)}")
+        
+        print(f"  HTTP: {http.stats.summary()}")
     
     def system_check(self):
         """Perform comprehensive system check"""
@@ -0,0 +1,116 @@
+"""Background connectivity health monitor for JARVIS"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class ConnectivityMonitor:
+    """Keeps a cached online/offline state that is cheap to read.
+
+    The state is refreshed from two sources: passive signals reported by real
+    requests (``report_success`` / ``report_failure``) and an active probe that
+    only runs in the background thread once the cached state is older than
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, probe: Callable[[], bool], ttl: float = 60.0,
+                 poll_interval: float = 5.0, logger: Optional[logging.Logger] = None):
+        self.probe = probe
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._available = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners: List[Callable[[bool], None]] = []
+
+    @property
+    def is_available(self) -> bool:
+        """Last known connectivity state (never blocks)"""
+        return self._available
+
+    @property
+    def age(self) -> float:
+        """Seconds since the state was last confirmed"""
+        return time.monotonic() - self._checked_at
+
+    def is_stale(self) -> bool:
+        """Check whether the cached state has outlived its TTL"""
+        return self.age >= self.ttl
+
+    def add_listener(self, callback: Callable[[bool], None]):
+        """Register a callback invoked with the new state whenever it changes"""
+        self._listeners.append(callback)
+
+    def report_success(self):
+        """Passive signal: a real online request just succeeded"""
+        self._set_state(True)
+
+    def report_failure(self, error: Optional[Exception] = None):
+        """Passive signal: a real online request just failed"""
+        if error is not None:
+            self.logger.info(f"Connectivity failure reported: {error}")
+        self._set_state(False)
+        # Confirm with an active probe rather than waiting for the TTL
+        self.request_probe()
+
+    def request_probe(self):
+        """Ask the background thread to probe as soon as possible"""
+        with self._lock:
+            self._checked_at = 0.0
+        self._wake.set()
+
+    def refresh(self) -> bool:
+        """Run the active probe now and return the new state"""
+        try:
+            available = bool(self.probe())
+        except Exception as e:
+            self.logger.error(f"Connectivity probe failed: {e}")
+            available = False
+        self._set_state(available)
+        return available
+
+    def start(self):
+        """Start the background monitor thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="connectivity-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background monitor thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval)
+            self._thread = None
+
+    def _set_state(self, available: bool):
+        with self._lock:
+            changed = available != self._available
+            self._available = available
+            self._checked_at = time.monotonic()
+
+        if changed:
+            self.logger.info(f"Connectivity changed: {'online' if available else 'offline'}")
+            for callback in list(self._listeners):
+                try:
+                    callback(available)
+                except Exception as e:
+                    self.logger.error(f"Connectivity listener error: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_stale():
+                self.refresh()
+
+            remaining = max(0.0, self.ttl - self.age)
+            self._wake.wait(timeout=min(self.poll_interval, remaining) or self.poll_interval)
+            self._wake.clear()
@@ -5,9 +5,12 @@ Enhanced Taipy display with sleek black background, white text, and red buttons
 import time
 import json
 from threading import Thread
+from collections import deque
 from pathlib import Path
 from taipy.gui import Gui, State, invoke_callback, get_state_id, Markdown
 
+from history_store import ConversationLogReader, iter_log_records
+
 # Initialize variables
 conversation = {"Conversation": []}
 state_id_list = []
@@ -18,6 +21,76 @@ total_conversations = 0
 offline_commands_count = 0
 ml_accuracy = 0.0
 conversation_history = []
+cache_hits = 0
+cache_hit_rate = 0.0
+cache_saved_seconds = 0.0
+api_state = "closed"
+api_calls = 0
+api_retries = 0
+api_failures = 0
+http_reuse_rate = 0.0
+latency_table = {"Stage": [], "p50 ms": [], "p95 ms": [], "p99 ms": [], "n": []}
+
+# Conversation log is followed incrementally; only new records are read per poll
+history_reader = ConversationLogReader("data/conversation_log")
+# Only the most recent turns are kept for display; the totals below cover the whole log
+history_records = deque(maxlen=500)
+history_stats = {"total": 0, "offline": 0}
+
+def refresh_history() -> bool:
+    """Read newly appended history records and update running statistics"""
+    new_records = history_reader.read_new()
+    for record in new_records:
+        history_stats["total"] += 1
+        if record.get('mode') == 'offline':
+            history_stats["offline"] += 1
+    history_records.extend(new_records)
+    return bool(new_records)
+
+# Status files written by the assistant, reloaded only when they change
+response_cache_stats_file = Path("data/response_cache_stats.json")
+api_status_file = Path("data/gemini_status.json")
+latency_status_file = Path("data/latency_status.json")
+status_files = {}
+
+def read_status_file(path: Path) -> dict:
+    """Return the parsed JSON file, re-reading it only when its mtime changed"""
+    cached = status_files.setdefault(path, {"mtime": None, "data": {}})
+    try:
+        mtime = path.stat().st_mtime
+        if mtime != cached["mtime"]:
+            with open(path, "r") as f:
+                cached["data"] = json.load(f)
+            cached["mtime"] = mtime
+    except (OSError, json.JSONDecodeError):
+        pass
+    return cached["data"]
+
+def show_service_stats(state: State) -> None:
+    """Copy the latest response cache and Gemini circuit counters into the page state"""
+    cache_stats = read_status_file(response_cache_stats_file)
+    state.cache_hits = cache_stats.get("hits", 0)
+    state.cache_hit_rate = cache_stats.get("hit_rate", 0.0) * 100
+    state.cache_saved_seconds = cache_stats.get("saved_seconds", 0.0)
+    
+    api_status = read_status_file(api_status_file)
+    state.api_state = api_status.get("state", "closed")
+    state.api_calls = api_status.get("calls", 0)
+    state.api_retries = api_status.get("retries", 0)
+    state.api_failures = api_status.get("failures", 0)
+    state.http_reuse_rate = api_status.get("http", {}).get("reuse_rate", 0.0) * 100
+    
+    stages = read_status_file(latency_status_file).get("stages", {})
+    table = {"Stage": [], "p50 ms": [], "p95 ms": [], "p99 ms": [], "n": []}
+    for stage in sorted(stages, key=lambda name: (name != "turn", name)):
+        stats = stages[stage]
+        table["Stage"].append(stage)
+        table["p50 ms"].append(stats.get("p50", 0.0))
+        table["p95 ms"].append(stats.get("p95", 0.0))
+        table["p99 ms"].append(stats.get("p99", 0.0))
+        table["n"].append(stats.get("count", 0))
+    if table != state.latency_table:
+        state.latency_table = table
 
 def on_init(state: State) -> None:
     """Initialize the application state"""
@@ -31,13 +104,12 @@ def on_init(state: State) -> None:
     state.ml_accuracy = 0.0
     
     # Load conversation history if available
-    try:
-        with open("data/conversation_history.json", "r") as f:
-            state.conversation_history = json.load(f)
-            state.total_conversations = len(state.conversation_history)
-            state.offline_commands_count = sum(1 for conv in state.conversation_history if conv.get('mode') == 'offline')
-    except FileNotFoundError:
-        state.conversation_history = []
+    refresh_history()
+    state.conversation_history = list(history_records)
+    state.total_conversations = history_stats["total"]
+    state.offline_commands_count = history_stats["offline"]
+    
+    show_service_stats(state)
 
 def client_handler(gui: Gui, state_id_list: list) -> None:
     """Background thread to update the interface"""
@@ -73,19 +145,17 @@ def update_interface(state: State) -> None:
         pass
     
     # Update statistics
-    try:
-        with open("data/conversation_history.json", "r") as f:
-            history = json.load(f)
-            state.total_conversations = len(history)
-            state.offline_commands_count = sum(1 for conv in history if conv.get('mode') == 'offline')
-            
-            # Calculate ML accuracy (mock calculation)
-            if state.offline_commands_count > 0:
-                state.ml_accuracy = min(95.0, 70.0 + (state.offline_commands_count * 2))
-            else:
-                state.ml_accuracy = 0.0
-    except FileNotFoundError:
-        pass
+    refresh_history()
+    state.total_conversations = history_stats["total"]
+    state.offline_commands_count = history_stats["offline"]
+    
+    show_service_stats(state)
+    
+    # Calculate ML accuracy (mock calculation)
+    if state.offline_commands_count > 0:
+        state.ml_accuracy = min(95.0, 70.0 + (state.offline_commands_count * 2))
+    else:
+        state.ml_accuracy = 0.0
 
 def toggle_mode(state: State) -> None:
     """Toggle between online and offline modes"""
@@ -117,8 +187,13 @@ def export_conversation(state: State) -> None:
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"conversation_export_{timestamp}.json"
         
+        # Streamed from the log, as only recent turns are kept in memory
         with open(f"exports/{filename}", "w") as f:
-            json.dump(state.conversation_history, f, indent=2)
+            f.write("[")
+            for index, record in enumerate(iter_log_records("data/conversation_log")):
+                f.write(",\n" if index else "\n")
+                f.write(json.dumps(record))
+            f.write("\n]\n")
             
         # Add confirmation to conversation
         with open("conv.txt", "a") as f:
@@ -171,6 +246,15 @@ page = """
 **Total Conversations:** <|{total_conversations}|text|>
 **Offline Commands:** <|{offline_commands_count}|text|>
 **ML Accuracy:** <|{f"{ml_accuracy:.1f}%"}|text|>
+**Cache Hits:** <|{f"{cache_hits} ({cache_hit_rate:.0f}%), {cache_saved_seconds:.1f}s saved"}|text|>
+**Gemini Circuit:** <|{api_state}|text|>
+**Gemini Calls:** <|{f"{api_calls} ({api_retries} retries, {api_failures} failures)"}|text|>
+**HTTP Connection Reuse:** <|{f"{http_reuse_rate:.0f}%"}|text|>
+|>
+
+## Latency
+<|part|render=True|class_name=stats-section|
+<|{latency_table}|table|show_all|rebuild|width=100%|>
 |>
 
 ## Controls
@@ -0,0 +1,93 @@
+"""Immutable, atomically published offline engine for JARVIS"""
+
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+from intent_matcher import IntentCascade, IntentMatch
+from intent_model import IncrementalIntentModel
+
+
+def freeze_commands(commands: Mapping[str, Mapping]) -> Mapping[str, Mapping]:
+    """Read-only copy of a command table (lists become tuples)"""
+    return MappingProxyType({
+        name: MappingProxyType({key: tuple(value) if isinstance(value, list) else value
+                                for key, value in data.items()})
+        for name, data in commands.items()
+    })
+
+
+def thaw_commands(commands: Mapping[str, Mapping]) -> Dict[str, Dict]:
+    """Plain, JSON-serializable copy of a frozen command table"""
+    return {
+        name: {key: list(value) if isinstance(value, tuple) else value for key, value in data.items()}
+        for name, data in commands.items()
+    }
+
+
+class Engine(NamedTuple):
+    """Shared offline state a turn reads, frozen together.
+
+    A turn takes one snapshot and uses it throughout, so it never sees a
+    command table from one version next to a model from another, and a
+    model swap never happens in the middle of its ``predict_proba``.
+    Snapshots are never modified; every change publishes a new one.
+    """
+    version: int
+    commands: Mapping[str, Mapping]
+    model: Optional[IncrementalIntentModel]
+    cascade: IntentCascade
+
+    def classify(self, user_input: str) -> IntentMatch:
+        return self.cascade.classify(user_input)
+
+    def classify_many(self, user_inputs: Sequence[str]) -> List[IntentMatch]:
+        return self.cascade.classify_many(user_inputs)
+
+    def action(self, intent: Optional[str]) -> Optional[str]:
+        return self.commands.get(intent, {}).get('action') if intent else None
+
+
+class EngineStore:
+    """Holds the current ``Engine`` snapshot.
+
+    Readers take ``current`` (a single attribute read) without locking.
+    Writers (the background trainer, retrains, command reloads) build a
+    complete new snapshot and swap it in under a lock that only serializes
+    writers with each other.
+    """
+
+    def __init__(self, commands: Mapping[str, Mapping] = MappingProxyType({}),
+                 model: Optional[IncrementalIntentModel] = None, threshold: float = 0.6,
+                 logger: Optional[logging.Logger] = None):
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._current = self._build(0, commands, model)
+
+    @property
+    def current(self) -> Engine:
+        return self._current
+
+    def publish_model(self, model: Optional[IncrementalIntentModel]) -> Engine:
+        """Swap in a new intent model, keeping the command table and its compiled patterns"""
+        with self._lock:
+            engine = self._current
+            self._current = self._build(engine.version + 1, engine.commands, model,
+                                        automaton=engine.cascade.automaton)
+            return self._current
+
+    def publish_commands(self, commands: Mapping[str, Mapping]) -> Engine:
+        """Swap in a new command table, recompiling its patterns"""
+        with self._lock:
+            engine = self._current
+            self._current = self._build(engine.version + 1, commands, engine.model)
+            return self._current
+
+    def _build(self, version: int, commands: Mapping[str, Mapping],
+               model: Optional[IncrementalIntentModel], automaton=None) -> Engine:
+        commands = commands if isinstance(commands, MappingProxyType) else freeze_commands(commands)
+        cascade = IntentCascade(commands, get_model=lambda: model, threshold=self.threshold,
+                                automaton=automaton, logger=self.logger)
+        return Engine(version, commands, model, cascade)
@@ -0,0 +1,270 @@
+"""Resilient Gemini client: rate limiting, retries and a circuit breaker"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from startup_profile import lazy_import
+
+# google.api_core pulls in grpc; only load it once a client is built
+google_exceptions = lazy_import('google.api_core.exceptions')
+
+
+def retryable_errors() -> tuple:
+    """Transient failures worth retrying; anything else (bad key, blocked prompt) fails fast"""
+    return (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.GatewayTimeout,
+        asyncio.TimeoutError,
+        ConnectionError,
+    )
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit is open"""
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter (``rate`` tokens per second, bursts up to ``capacity``)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the time waited"""
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker around an unreliable dependency.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused. Once ``reset_timeout`` has passed it turns half-open
+    and lets a single trial call through: success closes it, failure opens
+    it again. Listeners are called with the new state on every transition.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 logger: Optional[logging.Logger] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.counters = Counter()
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        # Re-entrant so listeners may read the state during a transition
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str], None]] = []
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.retry_in() <= 0:
+                return HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit will allow a trial call"""
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def add_listener(self, callback: Callable[[str], None]):
+        self._listeners.append(callback)
+
+    def allow(self) -> bool:
+        """Check whether a call may go out now (claims the trial slot when half-open)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self.retry_in() > 0:
+                self.counters['rejected'] += 1
+                return False
+            if self._trial_in_flight:
+                self.counters['rejected'] += 1
+                return False
+            self._trial_in_flight = True
+            self._transition(HALF_OPEN)
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.counters['successes'] += 1
+            self._failures = 0
+            self._trial_in_flight = False
+            self._transition(CLOSED)
+
+    def release_trial(self):
+        """Give back a half-open trial slot whose call ended without a verdict"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.counters['failures'] += 1
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def snapshot(self) -> Dict:
+        snapshot = dict(self.counters)
+        snapshot.update(state=self.state, consecutive_failures=self._failures,
+                        retry_in=round(self.retry_in(), 1))
+        return snapshot
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        self.logger.info(f"Gemini circuit {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self.counters['opened'] += 1
+        for callback in self._listeners:
+            try:
+                callback(state)
+            except Exception as e:
+                self.logger.error(f"Circuit listener error: {e}")
+
+
+class GeminiClient:
+    """Wraps ``generate_content_async`` with rate limiting, retries and a breaker.
+
+    Each attempt (and each streamed chunk) has its own ``timeout``.
+    Retryable errors are retried with full-jitter exponential backoff. A
+    streamed reply is only retried until its first chunk has been handed
+    out, so sentences are never spoken twice. A call whose retries all fail
+    counts as one failure for the circuit breaker; ``trial`` lets a cheap
+    health check stand in for the half-open trial call while no real
+    traffic flows.
+    """
+
+    def __init__(self, model, limiter: TokenBucket, breaker: CircuitBreaker,
+                 timeout: float = 30.0, max_retries: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 8.0, logger: Optional[logging.Logger] = None):
+        self.model = model
+        self.timeout = timeout
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable_errors()
+        self.logger = logger or logging.getLogger(__name__)
+
+    @property
+    def model_name(self) -> str:
+        return self.model.model_name
+
+    async def generate(self, prompt: str) -> str:
+        """Complete reply text for a prompt"""
+        async def attempt():
+            response = await self.model.generate_content_async(prompt)
+            return response.text
+        return await self._call(attempt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Reply text chunks as Gemini produces them"""
+        first_chunk: List[str] = []
+
+        async def attempt():
+            response = await self.model.generate_content_async(prompt, stream=True)
+            iterator = response.__aiter__()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+            first_chunk.append(chunk.text)
+            return iterator
+
+        iterator = await self._call(attempt)
+        if iterator is None:
+            return
+        yield first_chunk[0]
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    return
+                yield chunk.text
+        except self.retryable:
+            self.breaker.record_failure()
+            raise
+
+    async def trial(self, check: Callable[[], Awaitable[bool]]) -> bool:
+        """Use ``check`` as the half-open trial call; returns True once the circuit is closed"""
+        if self.breaker.state == CLOSED:
+            return True
+        if not self.breaker.allow():
+            return False
+        try:
+            healthy = await check()
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        if healthy:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return healthy
+
+    async def _call(self, attempt: Callable):
+        for retry in range(self.max_retries + 1):
+            waited = await self.limiter.acquire()
+            if waited:
+                self.breaker.counters['throttled'] += 1
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Gemini circuit open, retry in {self.breaker.retry_in():.0f}s")
+            self.breaker.counters['calls'] += 1
+            try:
+                result = await asyncio.wait_for(attempt(), self.timeout)
+            except self.retryable as e:
+                # One failure per logical call, once its retries are spent; a
+                # failed half-open trial reopens the circuit straight away
+                if retry == self.max_retries or self.breaker.state != CLOSED:
+                    self.breaker.record_failure()
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+                self.breaker.counters['retries'] += 1
+                self.logger.warning(f"Retryable Gemini error ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancellation or a request-specific error (bad prompt, blocked
+                # reply) says nothing about the API's health
+                self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
@@ -0,0 +1,95 @@
+"""Latency tracking and output gating for hedged online/offline turns"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Callable, Dict, Optional
+
+from startup_profile import lazy_import
+
+np = lazy_import('numpy')
+
+
+class LatencyTracker:
+    """Rolling latency samples per path with percentile summaries.
+
+    Samples are kept in fixed-size windows so percentiles follow recent
+    behaviour. ``suggest_deadline`` turns the observed time-to-first-answer
+    of the online path into a hedging deadline.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.outcomes = Counter()
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, path: str, seconds: Optional[float]):
+        if seconds is None:
+            return
+        with self._lock:
+            self._samples[path].append(seconds)
+
+    def count_outcome(self, outcome: str):
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def percentiles(self, path: str, points=(50, 90, 95, 99)) -> Dict[str, float]:
+        """Percentiles of a path's recent samples in seconds (empty if none yet)"""
+        with self._lock:
+            samples = np.array(self._samples[path])
+        if samples.size == 0:
+            return {}
+        values = np.percentile(samples, points)
+        summary = {f"p{point}": float(value) for point, value in zip(points, values)}
+        summary['count'] = int(samples.size)
+        return summary
+
+    def suggest_deadline(self, path: str, percentile: float, minimum: float, maximum: float,
+                         min_samples: int = 20) -> Optional[float]:
+        """Deadline that the given share of recent online answers beat, clamped"""
+        with self._lock:
+            samples = np.array(self._samples[path])
+        if samples.size < min_samples:
+            return None
+        return float(np.clip(np.percentile(samples, percentile), minimum, maximum))
+
+    def summary(self) -> str:
+        with self._lock:
+            paths = sorted(self._samples)
+            outcomes = sorted(self.outcomes.items())
+        parts = []
+        for path in paths:
+            stats = self.percentiles(path)
+            if stats:
+                parts.append(f"{path} p50={stats['p50']:.2f}s p95={stats['p95']:.2f}s (n={stats['count']})")
+        outcomes = ", ".join(f"{name}={count}" for name, count in outcomes)
+        return "; ".join(parts) + (f"; {outcomes}" if outcomes else "")
+
+
+class HedgeGate:
+    """Routes the online path's sentences once the hedge has been decided.
+
+    Runs on the event loop. Sentences pass straight through unless the online
+    path was abandoned with ``mute``. ``answered`` is set when
+    the online path produces its first output, which counts as beating the
+    deadline; ``first_output`` is how long that took.
+    """
+
+    def __init__(self, on_sentence: Callable[[str], None]):
+        self.on_sentence = on_sentence
+        self.answered = asyncio.Event()
+        self.muted = False
+        self.started = time.perf_counter()
+        self.first_output: Optional[float] = None
+
+    def online(self, sentence: str):
+        if self.first_output is None:
+            self.first_output = time.perf_counter() - self.started
+            self.answered.set()
+        if not self.muted:
+            self.on_sentence(sentence)
+
+    def mute(self):
+        self.muted = True
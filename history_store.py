@@ -0,0 +1,222 @@
+"""Append-only JSONL storage for JARVIS conversation history"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def segment_name(segment_id: int) -> str:
+    """File name of the segment with the given id"""
+    return f"{SEGMENT_PREFIX}{segment_id:06d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: Path) -> List[Path]:
+    """Return the segment files of a log directory, oldest first"""
+    if not directory.exists():
+        return []
+    return sorted(
+        path for path in directory.iterdir()
+        if path.name.startswith(SEGMENT_PREFIX) and path.name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def segment_id(path: Path) -> int:
+    """Parse the numeric id out of a segment file name"""
+    return int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def _parse_lines(data: bytes, logger: logging.Logger) -> Iterator[Dict]:
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning("Skipping corrupt conversation log record")
+
+
+def iter_log_records(directory: Path, logger: Optional[logging.Logger] = None) -> Iterator[Dict]:
+    """Lazily stream every record of a log directory, oldest first, one segment at a time"""
+    logger = logger or logging.getLogger(__name__)
+    for path in list_segments(Path(directory)):
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    yield from _parse_lines(line, logger)
+        except FileNotFoundError:
+            continue
+
+
+class ConversationLog:
+    """Segmented append-only conversation log.
+
+    Every turn is appended as one JSON line to the active segment. Writes are
+    flushed immediately but fsynced in batches (every ``fsync_batch`` records or
+    ``fsync_interval`` seconds, whichever comes first). A background maintenance
+    thread performs the interval fsync and rotates the active segment once it
+    grows past ``segment_max_bytes``; sealed segments are never rewritten, so
+    readers can follow the log incrementally.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 4 * 1024 * 1024,
+                 fsync_batch: int = 20, fsync_interval: float = 2.0,
+                 logger: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_id = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._open_active_segment()
+
+    def migrate_legacy(self, legacy_file: str):
+        """Import a legacy whole-file JSON history once, then rename it"""
+        legacy_path = Path(legacy_file)
+        if not legacy_path.exists() or not self.is_empty():
+            return
+
+        try:
+            with open(legacy_path, 'r') as f:
+                records = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.error(f"Could not migrate legacy history: {e}")
+            return
+
+        for record in records:
+            self.append(record, sync=False)
+        self.sync()
+        legacy_path.rename(legacy_path.with_suffix(legacy_path.suffix + ".migrated"))
+        self.logger.info(f"Migrated {len(records)} records from {legacy_path}")
+
+    def is_empty(self) -> bool:
+        """Check whether no records have been written yet"""
+        return all(path.stat().st_size == 0 for path in list_segments(self.directory))
+
+    def append(self, record: Dict, sync: bool = True):
+        """Append a single record to the active segment"""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if sync and self._pending >= self.fsync_batch:
+                self._fsync_locked()
+
+    def sync(self):
+        """Force pending records to stable storage"""
+        with self._lock:
+            self._fsync_locked()
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Lazily stream every record, oldest first, one segment at a time"""
+        return iter_log_records(self.directory, self.logger)
+
+    def start(self):
+        """Start the background fsync/rotation thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the maintenance thread and close the active segment"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.fsync_interval * 2)
+            self._thread = None
+        with self._lock:
+            if self._file:
+                self._fsync_locked()
+                self._file.close()
+                self._file = None
+
+    def rotate(self):
+        """Seal the active segment and start a new one"""
+        with self._lock:
+            self._fsync_locked()
+            self._file.close()
+            self._segment_id += 1
+            self._file = open(self.directory / segment_name(self._segment_id), 'ab')
+        self.logger.info(f"Rotated conversation log to segment {self._segment_id}")
+
+    def _open_active_segment(self):
+        segments = list_segments(self.directory)
+        self._segment_id = segment_id(segments[-1]) if segments else 1
+        path = self.directory / segment_name(self._segment_id)
+        self._file = open(path, 'ab')
+
+        # Terminate a torn last line left by a crash so the next record parses cleanly
+        if path.stat().st_size > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+                    self._file.flush()
+
+    def _fsync_locked(self):
+        if self._pending and self._file:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def _run(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                with self._lock:
+                    if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                        self._fsync_locked()
+                    size = self._file.tell()
+                if size >= self.segment_max_bytes:
+                    self.rotate()
+            except Exception as e:
+                self.logger.error(f"Conversation log maintenance error: {e}")
+
+
+class ConversationLogReader:
+    """Incremental reader that returns only records appended since the last call"""
+
+    def __init__(self, directory: str, logger: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.logger = logger or logging.getLogger(__name__)
+        self._segment_id = 0
+        self._offset = 0
+
+    def read_new(self) -> List[Dict]:
+        """Read complete records written since the previous call"""
+        records = []
+        for path in list_segments(self.directory):
+            current_id = segment_id(path)
+            if current_id < self._segment_id:
+                continue
+            offset = self._offset if current_id == self._segment_id else 0
+
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+
+            # Leave a partially written trailing line for the next poll
+            end = data.rfind(b"\n") + 1
+            records.extend(_parse_lines(data[:end], self.logger))
+            self._segment_id = current_id
+            self._offset = offset + end
+        return records
@@ -0,0 +1,141 @@
+"""Shared, pooled HTTP clients for JARVIS outbound requests"""
+
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from startup_profile import lazy_import
+
+# Only loaded once a session or client is actually built
+aiohttp = lazy_import('aiohttp')
+requests = lazy_import('requests')
+
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 5.0
+POOL_LIMIT = 20
+POOL_LIMIT_PER_HOST = 4
+KEEPALIVE_SECONDS = 30.0
+
+
+class HTTPStats:
+    """Request and connection counters; every request that opened no new connection reused one"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.per_host = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections)
+
+    def count_request(self, url: str):
+        with self._lock:
+            self.requests += 1
+            self.per_host[urlsplit(str(url)).hostname] += 1
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'reused': self.reused,
+            'reuse_rate': round(self.reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"{s['requests']} requests over {s['connections']} connections "
+                f"({s['reused']} reused, {s['reuse_rate']:.0%})")
+
+
+def create_session(stats: HTTPStats, limit: int = POOL_LIMIT, limit_per_host: int = POOL_LIMIT_PER_HOST,
+                   keepalive: float = KEEPALIVE_SECONDS, timeout: float = DEFAULT_TIMEOUT) -> 'aiohttp.ClientSession':
+    """Keep-alive ``aiohttp`` session with per-host limits; must be called on its event loop"""
+    async def on_request_start(session, context, params):
+        stats.count_request(params.url)
+
+    async def on_connection_create_end(session, context, params):
+        stats.count_connection()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                     keepalive_timeout=keepalive, ttl_dns_cache=300)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout, connect=CONNECT_TIMEOUT),
+        trace_configs=[trace],
+    )
+
+
+async def prewarm_session(session: 'aiohttp.ClientSession', urls: Iterable[str],
+                          logger: Optional[logging.Logger] = None):
+    """Open pooled connections (DNS + TCP + TLS) to hosts that will be needed soon"""
+    logger = logger or logging.getLogger(__name__)
+    for url in urls:
+        try:
+            async with session.head(url, allow_redirects=False) as response:
+                await response.release()
+        except Exception as e:
+            logger.info(f"Could not pre-warm {urlsplit(url).hostname}: {e}")
+
+
+class HTTPClient:
+    """Blocking counterpart for synchronous callers, backed by a pooled ``requests.Session``.
+
+    Applies a default timeout to every request and counts new connections
+    from the urllib3 pools, so ``stats`` reports the same reuse figures as
+    the async session.
+    """
+
+    def __init__(self, pool_hosts: int = POOL_LIMIT, limit_per_host: int = POOL_LIMIT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._stats = HTTPStats()
+        from requests.adapters import HTTPAdapter
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=limit_per_host)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, self.timeout))
+        self._stats.count_request(url)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request("POST", url, **kwargs)
+
+    @property
+    def stats(self) -> HTTPStats:
+        pools = self._adapter.poolmanager.pools
+        self._stats.connections = sum(pools[key].num_connections for key in pools.keys())
+        return self._stats
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client: Optional[HTTPClient] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> HTTPClient:
+    """Process-wide blocking client, created on first use"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HTTPClient()
+        return _shared_client
@@ -0,0 +1,207 @@
+"""Compiled offline intent front end for JARVIS"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = _NON_WORD.sub(" ", text.lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+class IntentMatch(NamedTuple):
+    intent: Optional[str]
+    confidence: float
+    stage: str
+
+
+class PatternAutomaton:
+    """Aho-Corasick automaton over all command patterns.
+
+    Finds every whole-word pattern occurrence in a single pass over the input,
+    independent of how many patterns are compiled in.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[Tuple[str, int]] = []
+
+        for intent, intent_patterns in patterns.items():
+            for pattern in intent_patterns:
+                pattern = normalize_utterance(pattern)
+                if pattern:
+                    self._add(pattern, intent)
+        self._build_links()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add(self, pattern: str, intent: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self._patterns))
+        self._patterns.append((intent, len(pattern)))
+
+    def _build_links(self):
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for ch, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the intent of the longest whole-word pattern found in text"""
+        best_intent, best_length = None, 0
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        last = len(text) - 1
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            if i < last and text[i + 1] != " ":
+                continue
+            for pattern_id in out[node]:
+                intent, length = self._patterns[pattern_id]
+                start = i - length + 1
+                if length > best_length and (start == 0 or text[start - 1] == " "):
+                    best_intent, best_length = intent, length
+        return best_intent
+
+
+class IntentCascade:
+    """Early-exit intent pipeline: pattern automaton, LRU memo, then classifier.
+
+    The classifier is only consulted when no pattern matches and the
+    normalized utterance has not been classified before, and then with a
+    single ``predict_proba`` call that yields both label and confidence.
+    The memo is invalidated whenever a new model is published.
+    """
+
+    def __init__(self, commands: Dict[str, Dict], get_model: Callable[[], object],
+                 threshold: float = 0.6, memo_size: int = 1024,
+                 automaton: Optional[PatternAutomaton] = None,
+                 logger: Optional[logging.Logger] = None):
+        # An automaton compiled from the same commands can be passed in and shared
+        self.automaton = automaton or PatternAutomaton({
+            command: data.get('patterns', []) for command, data in commands.items()
+        })
+        self.get_model = get_model
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._memo: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._memo_model = None
+        self._lock = threading.Lock()
+
+    def classify(self, user_input: str) -> IntentMatch:
+        """Resolve an utterance to an offline command, or None if nothing is confident"""
+        text = normalize_utterance(user_input)
+
+        intent = self.automaton.match(text)
+        if intent:
+            return IntentMatch(intent, 1.0, 'pattern')
+
+        model = self.get_model()
+        if model is None:
+            return IntentMatch(None, 0.0, 'none')
+
+        cached = self._memo_get(text, model)
+        if cached is not None:
+            return IntentMatch(cached[0], cached[1], 'memo')
+
+        try:
+            probabilities = model.predict_proba([text])[0]
+            best = max(range(len(probabilities)), key=probabilities.__getitem__)
+            label, confidence = str(model.classes_[best]), float(probabilities[best])
+        except Exception as e:
+            self.logger.error(f"ML prediction error: {e}")
+            return IntentMatch(None, 0.0, 'error')
+
+        result = (label if confidence > self.threshold else None, confidence)
+        self._memo_put(text, model, result)
+        return IntentMatch(result[0], result[1], 'classifier')
+
+    def classify_many(self, user_inputs: Sequence[str]) -> List[IntentMatch]:
+        """Resolve many utterances at once, with a single ``predict_proba`` call for all of them"""
+        texts = [normalize_utterance(user_input) for user_input in user_inputs]
+        matches: List[Optional[IntentMatch]] = [None] * len(texts)
+        model = self.get_model()
+        pending: Dict[str, List[int]] = {}
+
+        for index, text in enumerate(texts):
+            intent = self.automaton.match(text)
+            if intent:
+                matches[index] = IntentMatch(intent, 1.0, 'pattern')
+            elif model is None:
+                matches[index] = IntentMatch(None, 0.0, 'none')
+            else:
+                cached = self._memo_get(text, model)
+                if cached is not None:
+                    matches[index] = IntentMatch(cached[0], cached[1], 'memo')
+                else:
+                    pending.setdefault(text, []).append(index)
+
+        if pending:
+            unique = list(pending)
+            try:
+                probabilities = model.predict_proba(unique)
+            except Exception as e:
+                self.logger.error(f"ML prediction error: {e}")
+                probabilities = None
+            for row, text in enumerate(unique):
+                if probabilities is None:
+                    match = IntentMatch(None, 0.0, 'error')
+                else:
+                    best = int(probabilities[row].argmax())
+                    confidence = float(probabilities[row][best])
+                    result = (str(model.classes_[best]) if confidence > self.threshold else None, confidence)
+                    self._memo_put(text, model, result)
+                    match = IntentMatch(result[0], result[1], 'classifier')
+                for index in pending[text]:
+                    matches[index] = match
+        return matches
+
+    def _memo_get(self, text: str, model) -> Optional[Tuple[Optional[str], float]]:
+        with self._lock:
+            if model is not self._memo_model:
+                self._memo.clear()
+                self._memo_model = model
+                return None
+            result = self._memo.get(text)
+            if result is not None:
+                self._memo.move_to_end(text)
+            return result
+
+    def _memo_put(self, text: str, model, result: Tuple[Optional[str], float]):
+        with self._lock:
+            if model is not self._memo_model:
+                return
+            self._memo[text] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
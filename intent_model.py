@@ -0,0 +1,239 @@
+"""Incremental offline intent model and background trainer for JARVIS"""
+
+import copy
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from startup_profile import lazy_import
+
+np = lazy_import('numpy')
+
+# scikit-learn takes a second or more to import; defer it until a model is built or loaded
+naive_bayes = lazy_import('sklearn.naive_bayes')
+feature_text = lazy_import('sklearn.feature_extraction.text')
+
+_DIGEST_MODULUS = 2 ** 256
+
+
+def data_digest(texts: Sequence[str], labels: Sequence[str]) -> int:
+    """Order-independent digest of labeled utterances.
+
+    Per-sample hashes are summed, so a model trained incrementally in any
+    order has the same digest as one fitted on all the data at once.
+    """
+    digest = 0
+    for text, label in zip(texts, labels):
+        sample = hashlib.sha256(f"{label}\x00{text}".encode('utf-8')).digest()
+        digest = (digest + int.from_bytes(sample, 'big')) % _DIGEST_MODULUS
+    return digest
+
+
+def training_fingerprint(digest: int, labels: Iterable[str], params: Dict) -> str:
+    """Registry key for a model: training data digest, class set and hyperparameters"""
+    payload = json.dumps({'data': f"{digest:064x}", 'labels': sorted(set(labels)), 'params': params},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def holdout_score(texts: Sequence[str], labels: Sequence[str], folds: int = 5, **params) -> Optional[float]:
+    """Mean accuracy over ``folds`` interleaved held-out splits (None for tiny data sets)"""
+    if len(texts) < 2 * folds:
+        return None
+    scores = []
+    for fold in range(folds):
+        train = [i for i in range(len(texts)) if i % folds != fold]
+        test = [i for i in range(len(texts)) if i % folds == fold]
+        model = IncrementalIntentModel(labels, **params)
+        model.partial_fit([texts[i] for i in train], [labels[i] for i in train])
+        predicted = model.predict([texts[i] for i in test])
+        scores.append(float(np.mean([p == labels[i] for p, i in zip(predicted, test)])))
+    return float(np.mean(scores))
+
+
+class IncrementalIntentModel:
+    """Hashing-vectorizer + MultinomialNB classifier that learns with partial_fit.
+
+    The hashing vectorizer is stateless, so new utterances can be folded in
+    without refitting a vocabulary. Exposes the same ``predict`` /
+    ``predict_proba`` / ``classes_`` surface as the previous sklearn Pipeline.
+    """
+
+    def __init__(self, classes: Iterable[str], n_features: int = 2 ** 16, alpha: float = 0.1):
+        self.vectorizer = feature_text.HashingVectorizer(
+            n_features=n_features, alternate_sign=False,
+            stop_words='english', ngram_range=(1, 2)
+        )
+        self.classifier = naive_bayes.MultinomialNB(alpha=alpha)
+        self.labels = sorted(set(classes))
+        self.params = {'n_features': n_features, 'alpha': alpha}
+        self.samples_seen = 0
+        self.digest = 0
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    @property
+    def fingerprint(self) -> str:
+        """Registry key of everything this model has been trained on"""
+        return training_fingerprint(self.digest, self.labels, self.params)
+
+    def knows(self, labels: Iterable[str]) -> bool:
+        """Check whether every label is one of the model's classes"""
+        return set(labels).issubset(self.labels)
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence[str]) -> 'IncrementalIntentModel':
+        """Update the model with new labeled utterances"""
+        if texts:
+            self.classifier.partial_fit(self.vectorizer.transform(texts), labels, classes=self.labels)
+            self.samples_seen += len(texts)
+            self.digest = (self.digest + data_digest(texts, labels)) % _DIGEST_MODULUS
+        return self
+
+    def predict(self, texts: Sequence[str]):
+        return self.classifier.classes_[np.argmax(self._joint_log_likelihood(texts), axis=1)]
+
+    def predict_proba(self, texts: Sequence[str]):
+        jll = self._joint_log_likelihood(texts)
+        jll -= jll.max(axis=1, keepdims=True)
+        probabilities = np.exp(jll)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def _joint_log_likelihood(self, texts: Sequence[str]) -> 'np.ndarray':
+        # Only gather the hashed columns present in the input; multiplying the
+        # sparse rows by the full (classes x n_features) matrix copies all of it
+        X = self.vectorizer.transform(texts).tocsr()
+        columns = np.unique(X.indices)
+        weights = self.classifier.feature_log_prob_[:, columns]
+        return np.asarray(X[:, columns] @ weights.T) + self.classifier.class_log_prior_
+
+
+class IntentTrainer:
+    """Background worker that applies incremental updates to the intent model.
+
+    Labeled utterances are queued from the conversation thread with ``submit``
+    and never block it. The worker drains the queue in batches, trains a copy of
+    the current model and publishes the copy with a single reference swap, so
+    readers always see either the old or the new model, never a half-updated
+    one. Persistence (``save``) also happens on the worker.
+    """
+
+    def __init__(self, get_model: Callable[[], Optional[IncrementalIntentModel]],
+                 publish: Callable[[IncrementalIntentModel], None],
+                 rebuild: Callable[[], Optional[IncrementalIntentModel]],
+                 save: Callable[[IncrementalIntentModel], None],
+                 batch_size: int = 32, save_interval: float = 30.0,
+                 logger: Optional[logging.Logger] = None):
+        self.get_model = get_model
+        self.publish = publish
+        self.rebuild = rebuild
+        self.save = save
+        self.batch_size = batch_size
+        self.save_interval = save_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._queue = queue.Queue()
+        self._rebuild_requested = threading.Event()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def pending(self) -> int:
+        """Utterances queued but not yet trained on"""
+        return self._queue.qsize()
+
+    def submit(self, text: str, label: str):
+        """Queue a labeled utterance for incremental training"""
+        self._queue.put((text, label))
+
+    def request_rebuild(self):
+        """Ask the worker for a full retrain from all training data"""
+        self._rebuild_requested.set()
+        self._queue.put(None)
+
+    def start(self):
+        """Start the background training thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="intent-trainer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker after persisting any unsaved updates"""
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._save()
+
+    def _drain(self) -> List[Tuple[str, str]]:
+        batch = []
+        try:
+            item = self._queue.get(timeout=self.save_interval)
+        except queue.Empty:
+            return batch
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain()
+            try:
+                if self._rebuild_requested.is_set():
+                    self._rebuild_requested.clear()
+                    self._rebuild()
+                elif batch:
+                    self._update(batch)
+            except Exception as e:
+                self.logger.error(f"Intent training error: {e}")
+
+            if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+                self._save()
+
+    def _update(self, batch: List[Tuple[str, str]]):
+        current = self.get_model()
+        texts, labels = zip(*batch)
+        if current is None or not current.knows(labels):
+            # A new command label needs a model with a wider class set
+            self._rebuild()
+            return
+
+        model = copy.deepcopy(current)
+        model.partial_fit(list(texts), list(labels))
+        self.publish(model)
+        self._dirty = True
+        self.logger.info(f"Intent model updated with {len(batch)} new utterances")
+
+    def _rebuild(self):
+        model = self.rebuild()
+        if model is not None:
+            self.publish(model)
+            self._dirty = True
+            self.logger.info("Intent model rebuilt in background")
+
+    def _save(self):
+        model = self.get_model()
+        if model is None or not self._dirty:
+            return
+        try:
+            self.save(model)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception as e:
+            self.logger.error(f"Could not save intent model: {e}")
@@ -1,45 +1,113 @@
 #!/usr/bin/env python3
 
+import sys
+
+from startup_profile import lazy_import, profiler, startup_phase
+
+# Time every import below when profiling cold start
+if any(arg == '--startup-profile' or arg.startswith('--startup-profile=') for arg in sys.argv[1:]):
+    profiler.enable()
+
 import os
+import io
 import json
+import argparse
 import asyncio
+import concurrent.futures
+import functools
 import threading
 import time
 import subprocess
+from collections import deque
 import webbrowser
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 import logging
-import tkinter as tk
-from tkinter import scrolledtext, ttk
-
-import speech_recognition as sr
-import pyttsx3
-import requests
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import joblib
-import numpy as np
 
-import google.generativeai as genai
-from google.cloud import texttospeech
+# Heavy stacks are imported on first use, so offline-only and headless runs skip them
+tk = lazy_import('tkinter')
+scrolledtext = lazy_import('tkinter.scrolledtext')
+ttk = lazy_import('tkinter.ttk')
+sr = lazy_import('speech_recognition')
+pyttsx3 = lazy_import('pyttsx3')
+np = lazy_import('numpy')
+aiohttp = lazy_import('aiohttp')
+genai = lazy_import('google.generativeai')
+texttospeech = lazy_import('google.cloud.texttospeech')
+mixer = lazy_import('pygame.mixer')
 
 from dotenv import load_dotenv
-import pygame
-from pygame import mixer
+
+from async_runtime import AsyncRuntime
+from http_client import prewarm_session
+from weather_service import DEFAULT_API_URL as DEFAULT_WEATHER_URL, WeatherService
+from prompt_context import Prompt, PromptBuilder
+from sessions import Session
+from response_cache import ResponseCache
+from answer_index import AnswerIndex
+from hedging import HedgeGate, LatencyTracker
+from gemini_client import CLOSED, OPEN, CircuitBreaker, GeminiClient, TokenBucket
+from connectivity import ConnectivityMonitor
+from startup_tasks import StartupTasks
+from history_store import ConversationLog
+from intent_model import (IncrementalIntentModel, IntentTrainer, data_digest, holdout_score,
+                          training_fingerprint)
+from model_registry import ModelRegistry
+from engine import Engine, EngineStore, thaw_commands
+from speech_pipeline import SentenceSplitter, SpeechPipeline, split_sentences
+from tts_cache import TTSCache
+from audio_playback import AudioPlayer
+from audio_capture import CaptureError, MicrophoneCapture
+from tracing import TraceLog, Tracer, current_trace, write_text_atomic
 
 load_dotenv()
 
+# Fixed phrases spoken by the GUI and assistant, pre-synthesized by the TTS warm-up
+SYSTEM_PHRASES = [
+    "Goodbye! Have a great day!",
+    "Conversation ended",
+    "Switched to Online mode",
+    "Switched to Offline mode",
+    "Cannot switch to online mode. Please check your connection.",
+    "Sorry, I didn't catch that. Please repeat.",
+    "Speech recognition service unavailable, switching to offline mode",
+    "Offline commands reloaded",
+]
+
+SYSTEM_PROMPT = "You are JARVIS, an advanced AI assistant. Keep responses concise and helpful."
+
+# Spoken while an online request is running to abort it
+CANCEL_PHRASES = ['stop', 'cancel', 'never mind', 'nevermind']
+
+# Spoken when Gemini misses the hedge deadline and there is no offline answer
+HEDGE_FILLERS = ["Still thinking.", "Give me a moment.", "Let me check on that."]
+
+# Offline actions without side effects on this machine: safe to run speculatively or for remote clients
+REMOTE_SAFE_ACTIONS = ('get_time', 'get_date', 'get_weather')
+
+# Session id of the GUI's own conversation
+LOCAL_SESSION = 'local'
+
 class HybridAssistantGUI:
     def __init__(self, root):
         """Initialize the hybrid assistant with GUI"""
         self.root = root
-        self.setup_gui()
+        with startup_phase("setup_gui"):
+            self.setup_gui()
         self.assistant = HybridAssistant(self)
         self.stop_conversation = False
         self.conversation_active = False
+        self.streaming_message = False
+        self.current_turn = None
+        self.pending_input = None
+        
+        # Conversations can start once the offline path is up; online mode attaches later
+        self.update_status("Starting...")
+        self.assistant.startup.when_ready(
+            ('offline', 'audio'), lambda ok: self.root.after(0, self.on_offline_ready, ok))
+        self.assistant.startup.when_ready(
+            ('online',), lambda ok: self.root.after(0, self.check_initial_connectivity))
         
     def setup_gui(self):
         """Setup the graphical user interface"""
@@ -76,7 +144,7 @@ class HybridAssistantGUI:
         
         self.start_button = ttk.Button(
             button_frame, text="Start Conversation", 
-            command=self.start_conversation
+            command=self.start_conversation, state=tk.DISABLED
         )
         self.start_button.pack(side=tk.LEFT, padx=5)
         
@@ -90,7 +158,7 @@ class HybridAssistantGUI:
         
         self.mode_button = ttk.Button(
             button_frame, text="Toggle Mode (Checking...)", 
-            command=self.toggle_mode
+            command=self.toggle_mode, state=tk.DISABLED
         )
         self.mode_button.pack(side=tk.LEFT, padx=5)
         
@@ -103,26 +171,47 @@ class HybridAssistantGUI:
         )
         status_bar.pack(fill=tk.X, pady=(5, 0))
         
+        self.api_status_var = tk.StringVar()
+        self.api_status_var.set("Gemini: closed")
+        api_status_bar = ttk.Label(
+            main_frame, textvariable=self.api_status_var,
+            relief=tk.SUNKEN, anchor=tk.W
+        )
+        api_status_bar.pack(fill=tk.X, pady=(2, 0))
+        
+        self.latency_status_var = tk.StringVar()
+        self.latency_status_var.set("Latency p50/p95/p99: no turns yet")
+        latency_status_bar = ttk.Label(
+            main_frame, textvariable=self.latency_status_var,
+            relief=tk.SUNKEN, anchor=tk.W
+        )
+        latency_status_bar.pack(fill=tk.X, pady=(2, 0))
+        
     
         self.conversation_area.tag_config('user', foreground='#ff6b6b')
         self.conversation_area.tag_config('jarvis', foreground='#4ecdc4')
         self.conversation_area.tag_config('system', foreground='#ffd700')
         
-        
-        self.root.after(1000, self.check_initial_connectivity)
+    def on_offline_ready(self, ok):
+        """Enable conversations and mode toggles once offline commands, the intent model and audio are ready"""
+        if ok:
+            self.start_button.config(state=tk.NORMAL)
+            self.mode_button.config(state=tk.NORMAL)
+            self.update_status("Ready")
+            return
+        for name, error in self.assistant.startup.failures().items():
+            self.add_message(f"System: Startup step '{name}' failed - {error}", 'system')
+        self.update_status("Startup failed")
         
     def check_initial_connectivity(self):
-        """Check initial connectivity and update mode button"""
-        def check():
-            connectivity = self.assistant.check_online_connectivity()
-            mode = "Online" if connectivity else "Offline"
-            self.mode_button.config(text=f"Toggle Mode ({mode})")
-            if not connectivity:
-                self.add_message("System: Starting in Offline mode - No internet or API issues detected", 'system')
-            else:
-                self.add_message("System: Online mode available - Gemini API connected", 'system')
-        
-        threading.Thread(target=check, daemon=True).start()
+        """Update mode button once the online capabilities have attached"""
+        connectivity = self.assistant.is_online
+        mode = "Online" if connectivity else "Offline"
+        self.mode_button.config(text=f"Toggle Mode ({mode})")
+        if not connectivity:
+            self.add_message("System: Starting in Offline mode - No internet or API issues detected", 'system')
+        else:
+            self.add_message("System: Online mode available - Gemini API connected", 'system')
         
     def start_conversation(self):
         """Start the conversation thread"""
@@ -136,6 +225,8 @@ class HybridAssistantGUI:
             mode = "Online" if self.assistant.is_online else "Offline"
             self.add_message(f"System: JARVIS Hybrid Assistant initialized in {mode} mode. Say 'toggle mode' to switch modes.", 'system')
             self.assistant.speak(f"JARVIS Hybrid Assistant initialized in {mode} mode.")
+            # Speech from before the conversation, and the greeting's echo, are not meant for JARVIS
+            self.assistant.capture.clear()
             
         
             threading.Thread(
@@ -147,9 +238,14 @@ class HybridAssistantGUI:
         """End the current conversation"""
         self.conversation_active = False
         self.stop_conversation = True
+        if self.current_turn:
+            self.current_turn.cancel()
+        self.assistant.stop_speaking()
         self.start_button.config(state=tk.NORMAL)
         self.end_button.config(state=tk.DISABLED)
         self.add_message("System: Conversation ended", 'system')
+        self.assistant.save_conversation_history()
+        self.assistant.export_metrics()
         self.assistant.speak("Conversation ended")
     
     def toggle_mode(self):
@@ -159,15 +255,20 @@ class HybridAssistantGUI:
             
             if self.assistant.check_online_connectivity():
                 self.assistant.is_online = True
+                self.assistant.auto_offline = False
                 self.mode_button.config(text="Toggle Mode (Online)")
                 self.add_message("System: Switched to Online mode - Gemini AI connected", 'system')
                 self.assistant.speak("Switched to Online mode")
             else:
                 self.add_message("System: Cannot switch to Online mode - Check internet connection and API keys", 'system')
                 self.assistant.speak("Cannot switch to online mode. Please check your connection.")
+                # Re-check in the background so a retry can succeed once connectivity returns
+                self.assistant.connectivity.request_probe()
         else:
             
             self.assistant.is_online = False
+            # A manual switch stays until the user toggles back
+            self.assistant.auto_offline = False
             self.mode_button.config(text="Toggle Mode (Offline)")
             self.add_message("System: Switched to Offline mode", 'system')
             self.assistant.speak("Switched to Offline mode")
@@ -176,49 +277,132 @@ class HybridAssistantGUI:
         """Main conversation loop"""
         while not self.stop_conversation and self.conversation_active:
             try:
+                # One trace per turn, from listening until the reply has been spoken
+                trace = self.assistant.tracer.start(LOCAL_SESSION)
+                error = None
+                try:
+                    with self.assistant.tracer.activate(trace):
+                        self.update_status("Listening...")
+                        user_input = self.pending_input or self.assistant.listen()
+                        self.pending_input = None
                 
-                self.update_status("Listening...")
-                user_input = self.assistant.listen()
+                        if user_input is None:
+                            trace = None
+                            continue
                 
-                if user_input is None:
-                    continue
                 
+                        self.add_message(f"You: {user_input}", 'user')
                 
-                self.add_message(f"You: {user_input}", 'user')
                 
+                        if "toggle mode" in user_input.lower():
+                            self.toggle_mode()
+                            continue
                 
-                if "toggle mode" in user_input.lower():
-                    self.toggle_mode()
-                    continue
+                        if "reload commands" in user_input.lower():
+                            self.assistant.reload_offline_commands()
+                            self.add_message(f"System: Reloaded {len(self.assistant.offline_commands)} offline commands, "
+                                             "retraining in the background", 'system')
+                            self.assistant.speak("Offline commands reloaded")
+                            continue
                 
                 
-                if any(phrase in user_input.lower() for phrase in ['exit', 'quit', 'goodbye']):
-                    self.add_message("JARVIS: Goodbye! Have a great day!", 'jarvis')
-                    self.assistant.speak("Goodbye! Have a great day!")
-                    self.end_conversation()
-                    break
-                
+                        if any(phrase in user_input.lower() for phrase in ['exit', 'quit', 'goodbye']):
+                            self.add_message("JARVIS: Goodbye! Have a great day!", 'jarvis')
+                            self.assistant.speak("Goodbye! Have a great day!")
+                            self.end_conversation()
+                            break
                 
-                self.update_status("Processing...")
                 
-                if self.assistant.is_online:
-                    response = asyncio.run(self.assistant.process_online_request(user_input))
-                else:
-                    response = self.assistant.process_offline_request(user_input)
+                        self.update_status("Processing...")
+                        self.assistant.speech_pipeline.begin_turn()
                 
+                        if self.assistant.is_online:
+                            self.current_turn = self.assistant.submit_online_request(user_input, on_sentence=self.stream_sentence)
+                            self.wait_for_turn(self.current_turn)
+                            self.end_streamed_message()
+                        else:
+                            response = self.assistant.process_offline_request(user_input)
+                            self.add_message(f"JARVIS: {response}", 'jarvis')
+                            self.assistant.speech_pipeline.say(response)
                 
-                self.add_message(f"JARVIS: {response}", 'jarvis')
-                self.assistant.speak(response)
                 
+                        self.wait_for_speech()
+                        self.assistant.speech_pipeline.wait_idle()
+                        self.update_status("Ready")
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    raise
+                finally:
+                    # Failed, toggle and reload turns are closed too; silence is not a turn
+                    if trace is not None:
+                        self.assistant.finish_turn(trace, error)
+                        # Whatever was captured while JARVIS spoke is mostly its own echo
+                        self.assistant.capture.clear()
                 
-                self.update_status("Ready")
-                
+            except CaptureError as e:
+                self.add_message(f"System Error: {str(e)}", 'system')
+                self.end_conversation()
+                self.update_status("Microphone unavailable")
             except Exception as e:
                 self.add_message(f"System Error: {str(e)}", 'system')
                 self.update_status("Error")
                 time.sleep(1)
                 self.update_status("Ready")
     
+    def wait_for_turn(self, future):
+        """Wait for an online turn, cancelling it on End Conversation or a spoken "stop\""""
+        try:
+            while not future.done():
+                if self.stop_conversation:
+                    future.cancel()
+                    break
+                    
+                # The microphone keeps capturing, so a spoken "stop" can abort a slow request
+                interjection = self.assistant.listen(timeout=0.2, interactive=False)
+                if interjection and any(phrase in interjection for phrase in CANCEL_PHRASES):
+                    future.cancel()
+                    self.add_message("System: Request cancelled", 'system')
+                elif interjection and not self.assistant.is_speaking():
+                    # While a reply is playing, anything but "stop" is most likely its echo
+                    self.pending_input = interjection
+            future.result()
+        except concurrent.futures.CancelledError:
+            self.assistant.stop_speaking()
+        finally:
+            self.current_turn = None
+    
+    def wait_for_speech(self):
+        """Wait for the reply to be spoken, cutting it short on End Conversation or a spoken "stop\""""
+        while not self.assistant.speech_pipeline.wait_idle(0.05):
+            if self.stop_conversation:
+                return
+            interjection = self.assistant.listen(timeout=0.2, interactive=False)
+            if interjection and any(phrase in interjection for phrase in CANCEL_PHRASES):
+                self.assistant.stop_speaking()
+                self.add_message("System: Speech stopped", 'system')
+                return
+    
+    def stream_sentence(self, sentence):
+        """Show a streamed sentence in the transcript and queue it for speech"""
+        if not self.streaming_message:
+            self.append_text("JARVIS: ", 'jarvis')
+            self.streaming_message = True
+        self.append_text(sentence + " ", 'jarvis')
+        self.assistant.speech_pipeline.say(sentence)
+    
+    def end_streamed_message(self):
+        """Close the transcript entry of a streamed reply"""
+        if self.streaming_message:
+            self.append_text("\n\n", 'jarvis')
+            self.streaming_message = False
+    
+    def append_text(self, text, tag=None):
+        """Append text to the conversation area without a trailing break"""
+        self.conversation_area.config(state=tk.NORMAL)
+        self.conversation_area.insert(tk.END, text, tag)
+        self.conversation_area.config(state=tk.DISABLED)
+        self.conversation_area.see(tk.END)
+    
     def add_message(self, message, tag=None):
         """Add a message to the conversation area"""
         self.conversation_area.config(state=tk.NORMAL)
@@ -230,26 +414,97 @@ class HybridAssistantGUI:
         """Update the status bar"""
         self.status_var.set(text)
         self.root.update_idletasks()
+        
+    def update_api_status(self, snapshot):
+        """Show the Gemini circuit breaker state and counters"""
+        text = (f"Gemini: {snapshot['state']} | calls {snapshot.get('calls', 0)}"
+                f" | retries {snapshot.get('retries', 0)} | failures {snapshot.get('failures', 0)}")
+        if snapshot['state'] != CLOSED:
+            text += f" | retry in {snapshot['retry_in']:.0f}s"
+        text += f" | HTTP reuse {snapshot['http']['reuse_rate']:.0%}"
+        self.api_status_var.set(text)
+        
+    def update_latency_status(self, text):
+        """Show rolling per-stage latency percentiles"""
+        self.latency_status_var.set(text)
 
 class HybridAssistant:
-    def __init__(self, gui=None):
-        """Initialize the hybrid assistant with both online and offline capabilities"""
+    def __init__(self, gui=None, headless: bool = False):
+        """Initialize the hybrid assistant with both online and offline capabilities
+        
+        ``headless`` skips the local microphone and speakers, for serving
+        remote clients (see server.py).
+        """
         self.gui = gui
+        self.headless = headless
         self.setup_logging()
         self.is_online = False  # Start as offline, will be checked during setup
         self.conversation_history = []
-        self.offline_commands = {}
-        self.ml_model = None
         self.gemini_model = None
+        self.gemini = None
         self.tts_client = None
+        self.tts_unavailable = False
+        self.audio_player = None
+        self.offline_speaking = False
+        self.latency = LatencyTracker()
         
-        self.load_configuration()
-        self.setup_apis()
-        self.setup_offline_capabilities()
-        self.setup_audio()
+        with startup_phase("load_configuration"):
+            self.load_configuration()
+        # Commands and model are published here as immutable snapshots once loaded
+        self.engine = EngineStore(threshold=self.config['confidence_threshold'], logger=self.logger)
+        self.tracer = Tracer(window=self.config['trace_window'])
+        self.trace_log = TraceLog(self.config['trace_log_file'], max_bytes=int(self.config['trace_log_mb'] * 1024 * 1024),
+                                  logger=self.logger)
+        self.latency_published = 0.0
+        # The GUI loop and server turns publish concurrently
+        self.latency_lock = threading.Lock()
+        with startup_phase("async_runtime"):
+            self.runtime = AsyncRuntime(self.logger)
+            self.runtime.start()
+            if self.config['http_prewarm']:
+                self.runtime.submit(prewarm_session(self.runtime.http, self.prewarm_urls(), self.logger))
         
-        # Check initial connectivity
+        # Cheap to build; the monitor only probes once the APIs are set up
+        self.connectivity = ConnectivityMonitor(
+            lambda: self.runtime.run(self.probe_online_connectivity()),
+            ttl=self.config['connectivity_ttl'],
+            logger=self.logger
+        )
+        self.connectivity.add_listener(self.on_connectivity_change)
+        self.weather = WeatherService(
+            self.runtime, self.config['weather_api_key'], self.config['weather_location'],
+            self.config['weather_snapshot_file'],
+            api_url=self.config['weather_api_url'],
+            units=self.config['weather_units'],
+            ttl=self.config['weather_ttl'],
+            timeout=self.config['weather_timeout'],
+            can_fetch=lambda: self.connectivity.is_available,
+            is_idle=lambda: not self.is_speaking(),
+            logger=self.logger
+        )
+        
+        # Independent subsystems start concurrently; the offline path is usable once
+        # 'offline' and 'audio' are ready, and online mode attaches when 'online' is
+        self.startup = StartupTasks(logger=self.logger)
+        self.startup.add('apis', self.setup_apis)
+        self.startup.add('offline', self.setup_offline_capabilities)
+        self.startup.add('audio', self.setup_speech_services if headless else self.setup_audio)
+        self.startup.add('connectivity', self.start_connectivity_monitor, after=('apis',))
+        self.startup.add('online', self.attach_online, after=('connectivity', 'offline', 'audio'))
+        self.startup.add('weather', self.weather.start, after=('connectivity', 'audio'))
+        if self.config['tts_warmup']:
+            self.startup.add('tts_warmup', self.warm_up_tts_cache, after=('online',))
+        
+    def start_connectivity_monitor(self) -> bool:
+        """Check initial connectivity, then keep the cached state fresh in the background"""
+        available = self.connectivity.refresh()
+        self.connectivity.start()
+        return available
+        
+    def attach_online(self) -> bool:
+        """Enter online mode once Gemini, connectivity and the offline fallback are ready"""
         self.is_online = self.check_online_connectivity()
+        return self.is_online
         
     def setup_logging(self):
         """Setup logging configuration"""
@@ -269,10 +524,67 @@ class HybridAssistant:
             'gemini_api_key': os.getenv('GEMINI_API_KEY'),
             'weather_api_key': os.getenv('WEATHER_API_KEY'),
             'conversation_file': 'data/conversation_history.json',
-            'model_file': 'data/offline_model.pkl',
+            'conversation_log_dir': 'data/conversation_log/',
+            'model_registry_dir': 'data/models/',
+            'model_registry_keep': int(os.getenv('MODEL_REGISTRY_KEEP', '5')),
             'commands_file': 'data/offline_commands.json',
             'audio_dir': 'audio/',
-            'data_dir': 'data/'
+            'data_dir': 'data/',
+            'stream_responses': os.getenv('STREAM_RESPONSES', 'true').lower() == 'true',
+            'listen_timeout': float(os.getenv('LISTEN_TIMEOUT', '5')),
+            'vad_hangover_ms': float(os.getenv('VAD_HANGOVER_MS', '300')),
+            'vad_energy_ratio': float(os.getenv('VAD_ENERGY_RATIO', '3.0')),
+            'vad_max_utterance_s': float(os.getenv('VAD_MAX_UTTERANCE_S', '60')),
+            'vad_echo_ratio': float(os.getenv('VAD_ECHO_RATIO', '2.5')),
+            'confidence_threshold': float(os.getenv('CONFIDENCE_THRESHOLD', '0.6')),
+            'responses_file': 'responses.json',
+            'tts_cache_dir': 'audio/tts_cache/',
+            'tts_cache_mb': int(os.getenv('TTS_CACHE_MB', '100')),
+            'tts_warmup': os.getenv('TTS_WARMUP', 'false').lower() == 'true',
+            'tts_language': os.getenv('TTS_LANGUAGE', 'en-US'),
+            'tts_speaking_rate': float(os.getenv('TTS_SPEAKING_RATE', '1.0')),
+            'connectivity_ttl': float(os.getenv('CONNECTIVITY_TTL', '60')),
+            'connectivity_timeout': float(os.getenv('CONNECTIVITY_TIMEOUT', '5')),
+            'gemini_timeout': float(os.getenv('GEMINI_TIMEOUT', '30')),
+            'weather_timeout': float(os.getenv('WEATHER_TIMEOUT', '5')),
+            'prompt_max_tokens': int(os.getenv('PROMPT_MAX_TOKENS', '1500')),
+            'prompt_recent_turns': int(os.getenv('PROMPT_RECENT_TURNS', '5')),
+            'prompt_turn_tokens': int(os.getenv('PROMPT_TURN_TOKENS', '200')),
+            'prompt_summary_tokens': int(os.getenv('PROMPT_SUMMARY_TOKENS', '300')),
+            'response_cache_file': 'data/response_cache.json',
+            'response_cache_size': int(os.getenv('RESPONSE_CACHE_SIZE', '500')),
+            'response_cache_ttl': float(os.getenv('RESPONSE_CACHE_TTL_HOURS', '24')) * 3600,
+            'answer_min_score': float(os.getenv('OFFLINE_ANSWER_MIN_SCORE', '0.6')),
+            'hedge_enabled': os.getenv('HEDGE_ENABLED', 'true').lower() == 'true',
+            'hedge_deadline': float(os.getenv('HEDGE_DEADLINE_MS', '1500')) / 1000,
+            'hedge_auto_tune': os.getenv('HEDGE_AUTO_TUNE', 'false').lower() == 'true',
+            'hedge_percentile': float(os.getenv('HEDGE_PERCENTILE', '90')),
+            'gemini_rate_per_min': float(os.getenv('GEMINI_RATE_PER_MIN', '15')),
+            'gemini_burst': float(os.getenv('GEMINI_BURST', '3')),
+            'gemini_max_retries': int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+            'circuit_failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+            'circuit_reset_timeout': float(os.getenv('CIRCUIT_RESET_S', '30')),
+            'api_status_file': 'data/gemini_status.json',
+            'http_prewarm': os.getenv('HTTP_PREWARM', 'true').lower() == 'true',
+            'weather_location': os.getenv('WEATHER_LOCATION', 'London'),
+            'weather_units': os.getenv('WEATHER_UNITS', 'metric'),
+            'weather_api_url': os.getenv('WEATHER_API_URL', DEFAULT_WEATHER_URL),
+            'weather_ttl': float(os.getenv('WEATHER_TTL_MIN', '10')) * 60,
+            'weather_snapshot_file': 'data/weather_snapshot.json',
+            'server_host': os.getenv('SERVER_HOST', '127.0.0.1'),
+            'server_port': int(os.getenv('SERVER_PORT', '8765')),
+            'server_max_sessions': int(os.getenv('SERVER_MAX_SESSIONS', '100')),
+            'server_session_idle': float(os.getenv('SERVER_SESSION_IDLE_MIN', '30')) * 60,
+            'session_max_history': int(os.getenv('SESSION_MAX_HISTORY', '200')),
+            'history_memory_turns': int(os.getenv('HISTORY_MEMORY_TURNS', '200')),
+            'batch_size': int(os.getenv('BATCH_SIZE', '256')),
+            'batch_concurrency': int(os.getenv('BATCH_CONCURRENCY', '8')),
+            'trace_window': int(os.getenv('TRACE_WINDOW', '500')),
+            'trace_log_file': os.getenv('TRACE_LOG_FILE', 'data/turn_traces.jsonl'),
+            'trace_log_mb': float(os.getenv('TRACE_LOG_MB', '20')),
+            'trace_export_file': os.getenv('TRACE_EXPORT_FILE', 'data/turn_traces.trace.json'),
+            'metrics_file': os.getenv('METRICS_FILE', 'data/metrics.prom'),
+            'latency_status_file': 'data/latency_status.json'
         }
         
         
@@ -281,28 +593,69 @@ class HybridAssistant:
             
     def setup_apis(self):
         """Setup online API connections"""
+        self.gemini_breaker = CircuitBreaker(
+            failure_threshold=self.config['circuit_failure_threshold'],
+            reset_timeout=self.config['circuit_reset_timeout'],
+            logger=self.logger
+        )
+        self.gemini_breaker.add_listener(self.on_circuit_change)
+        self.auto_offline = False
+        self.recovery = None
+        
         try:
             
             if self.config['gemini_api_key']:
                 genai.configure(api_key=self.config['gemini_api_key'])
-                self.gemini_model = genai.GenerativeModel('models/gemini-1.5-flash')
+                self.attach_gemini(genai.GenerativeModel('models/gemini-1.5-flash'))
                 self.logger.info("Gemini AI configured")
             else:
                 self.logger.warning("Gemini API key not found in environment variables")
                 
+                
+        except Exception as e:
+            self.logger.error(f"Error setting up APIs: {e}")
+            
+    def attach_gemini(self, model):
+        """Route online requests to ``model`` through the rate limiter, retries and breaker"""
+        self.gemini_model = model
+        self.gemini = GeminiClient(
+            model,
+            TokenBucket(self.config['gemini_rate_per_min'] / 60, self.config['gemini_burst']),
+            self.gemini_breaker,
+            timeout=self.config['gemini_timeout'],
+            max_retries=self.config['gemini_max_retries'],
+            logger=self.logger
+        )
             
+    def google_tts(self):
+        """Google TTS client, created on first online use so offline starts never load it"""
+        if self.tts_client is None and not self.tts_unavailable:
             try:
                 self.tts_client = texttospeech.TextToSpeechClient()
                 self.logger.info("Google TTS configured")
             except Exception as e:
                 self.logger.warning(f"Google TTS not available: {e}")
-                self.tts_client = None
-                
-        except Exception as e:
-            self.logger.error(f"Error setting up APIs: {e}")
+                self.tts_unavailable = True
+        return self.tts_client
             
     def check_online_connectivity(self) -> bool:
-        """Check if online services are available"""
+        """Return the cached online state maintained by the connectivity monitor"""
+        with self.tracer.span('connectivity'):
+            if self.gemini is None:
+                return False
+            return self.connectivity.is_available and self.gemini_breaker.state != OPEN
+        
+    def prewarm_urls(self) -> List[str]:
+        """Hosts the assistant talks to, connected ahead of the first real request"""
+        urls = ['https://www.google.com/']
+        if self.config['gemini_api_key']:
+            urls.append('https://generativelanguage.googleapis.com/')
+        if self.config['weather_api_key']:
+            urls.append(self.config['weather_api_url'])
+        return urls
+        
+    async def probe_online_connectivity(self) -> bool:
+        """Actively probe whether online services are available"""
         if not self.config['gemini_api_key']:
             self.logger.info("No Gemini API key found")
             return False
@@ -311,34 +664,158 @@ class HybridAssistant:
             self.logger.info("Gemini model not initialized")
             return False
             
+        timeout = aiohttp.ClientTimeout(total=self.config['connectivity_timeout'])
         try:
             
-            response = requests.get('https://www.google.com', timeout=5)
-            if response.status_code != 200:
-                self.logger.info("No internet connection")
-                return False
+            async with self.runtime.http.get('https://www.google.com', timeout=timeout) as response:
+                if response.status != 200:
+                    self.logger.info("No internet connection")
+                    return False
                 
-            
-            test_response = self.gemini_model.generate_content("Hello")
-            if test_response and test_response.text:
-                self.logger.info("Gemini API is working")
-                return True
-            else:
-                self.logger.info("Gemini API test failed")
-                return False
+            # Model metadata lookup verifies the key without a billed generation
+            model_url = f"https://generativelanguage.googleapis.com/v1beta/{self.gemini_model.model_name}"
+            async with self.runtime.http.get(model_url, params={'key': self.config['gemini_api_key']},
+                                             timeout=timeout) as response:
+                if response.status != 200:
+                    self.logger.info(f"Gemini API check failed with status {response.status}")
+                    return False
+                    
+            self.logger.info("Gemini API is reachable")
+            return True
                 
-        except requests.exceptions.RequestException:
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             self.logger.info("Internet connection test failed")
             return False
         except Exception as e:
             self.logger.error(f"Connectivity check failed: {e}")
             return False
             
+    def go_offline_automatically(self, reason: str):
+        """Leave online mode for a failure the assistant will recover from by itself"""
+        if self.is_online:
+            self.is_online = False
+            self.auto_offline = True
+            if self.gui:
+                self.gui.mode_button.config(text="Toggle Mode (Offline)")
+                self.gui.add_message(f"System: {reason}", 'system')
+                
+    def restore_online(self, reason: str):
+        """Return to online mode after an automatic switch, never after a manual one"""
+        if self.auto_offline:
+            self.auto_offline = False
+            self.is_online = True
+            if self.gui:
+                self.gui.mode_button.config(text="Toggle Mode (Online)")
+                self.gui.add_message(f"System: {reason}", 'system')
+                
+    def on_connectivity_change(self, available: bool):
+        """Follow the connectivity monitor in and out of online mode"""
+        if not available:
+            self.go_offline_automatically("Switched to Offline mode - Connection lost")
+        elif self.gemini is not None and self.gemini_breaker.state != OPEN:
+            self.restore_online("Connection restored - Switched back to Online mode")
+            
+    def on_circuit_change(self, state: str):
+        """Leave online mode when the Gemini circuit opens and return once it closes"""
+        if state == OPEN:
+            self.go_offline_automatically("Gemini unavailable - Offline mode until it recovers")
+            if self.recovery is None or self.recovery.done():
+                self.recovery = self.runtime.submit(self.recover_online())
+        elif state == CLOSED:
+            self.restore_online("Gemini recovered - Switched back to Online mode")
+        self.publish_api_status()
+        
+    async def recover_online(self):
+        """Run half-open trials with the free API check until the circuit closes"""
+        while self.gemini_breaker.state != CLOSED:
+            await asyncio.sleep(self.gemini_breaker.retry_in() + 0.1)
+            try:
+                await self.gemini.trial(self.probe_online_connectivity)
+            except Exception as e:
+                self.logger.warning(f"Gemini recovery check failed: {e}")
+                
+    def publish_api_status(self):
+        """Show the Gemini circuit state and counters in the GUI and the dashboard"""
+        snapshot = self.gemini_breaker.snapshot()
+        snapshot['http'] = self.runtime.http_stats.snapshot()
+        if self.gui:
+            self.gui.update_api_status(snapshot)
+        try:
+            write_text_atomic(self.config['api_status_file'], json.dumps(snapshot))
+        except OSError as e:
+            self.logger.warning(f"Could not write API status: {e}")
+            
+    def finish_turn(self, trace, error: Optional[str] = None) -> Dict:
+        """Close a turn's trace, log it next to the history and refresh the latency displays"""
+        data = self.tracer.finish(trace, error)
+        self.trace_log.append(data)
+        self.publish_latency_status()
+        return data
+        
+    def publish_latency_status(self, force: bool = False):
+        """Show rolling per-stage percentiles in the GUI, the dashboard and the metrics file"""
+        if self.gui:
+            self.gui.update_latency_status(self.tracer.status_line())
+        # Files are rewritten at most once a second under load
+        with self.latency_lock:
+            now = time.monotonic()
+            if not force and now - self.latency_published < 1.0:
+                return
+            self.latency_published = now
+            status = {
+                'turns': self.tracer.turns,
+                'errors': self.tracer.errors,
+                'stages': {stage: {key: round(value * 1000, 3) if key != 'count' else value
+                                   for key, value in stats.items()}
+                           for stage, stats in self.tracer.percentiles().items()},
+            }
+            try:
+                write_text_atomic(self.config['latency_status_file'], json.dumps(status))
+                write_text_atomic(self.config['metrics_file'], self.tracer.prometheus_text())
+            except OSError as e:
+                self.logger.warning(f"Could not write latency metrics: {e}")
+            
+    def export_metrics(self):
+        """Write recent turn traces and final latency figures, at the end of a conversation or run"""
+        with self.tracer.span('export_metrics'):
+            self.export_traces()
+            self.publish_latency_status(force=True)
+            
+    def export_traces(self, path: Optional[str] = None):
+        """Write recent turn traces as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        try:
+            write_text_atomic(path or self.config['trace_export_file'], json.dumps(self.tracer.chrome_trace()))
+        except OSError as e:
+            self.logger.warning(f"Could not export traces: {e}")
+            
     def setup_offline_capabilities(self):
         """Setup offline command handling and ML model"""
         self.load_offline_commands()
-        self.load_ml_model()
         self.load_conversation_history()
+        self.model_registry = ModelRegistry(
+            self.config['model_registry_dir'],
+            keep=self.config['model_registry_keep'],
+            logger=self.logger
+        )
+        self.load_ml_model()
+        
+        self.intent_trainer = IntentTrainer(
+            get_model=lambda: self.ml_model,
+            publish=self.publish_background_model,
+            rebuild=self.rebuild_ml_model,
+            save=self.save_ml_model,
+            logger=self.logger
+        )
+        self.intent_trainer.start()
+        
+        # Past Gemini answers, searchable offline; built off the startup path
+        self.answer_index = AnswerIndex(
+            self.history_log.iter_records,
+            accept=lambda turn: (turn.get('mode') == 'online' and not turn.get('offline_command')
+                                 and ResponseCache.is_cacheable(turn['user_input'])),
+            logger=self.logger
+        )
+        self.answer_index.load_in_background()
         
     def load_offline_commands(self):
         """Load predefined offline commands"""
@@ -387,26 +864,43 @@ class HybridAssistant:
         
         try:
             with open(self.config['commands_file'], 'r') as f:
-                self.offline_commands = json.load(f)
+                self.engine.publish_commands(json.load(f))
         except FileNotFoundError:
-            self.offline_commands = default_commands
+            self.engine.publish_commands(default_commands)
             self.save_offline_commands()
             
     def save_offline_commands(self):
         """Save offline commands to file"""
         with open(self.config['commands_file'], 'w') as f:
-            json.dump(self.offline_commands, f, indent=2)
+            json.dump(thaw_commands(self.offline_commands), f, indent=2)
+            
+    def reload_offline_commands(self):
+        """Swap in an edited commands file without a restart and retrain in the background"""
+        self.load_offline_commands()
+        self.intent_trainer.request_rebuild()
+        
+    @property
+    def offline_commands(self) -> Mapping[str, Mapping]:
+        """Command table of the current engine snapshot (read-only)"""
+        return self.engine.current.commands
+        
+    @property
+    def ml_model(self) -> Optional[IncrementalIntentModel]:
+        """Intent model of the current engine snapshot"""
+        return self.engine.current.model
             
     def load_ml_model(self):
-        """Load or create ML model for offline command recognition"""
-        try:
-            self.ml_model = joblib.load(self.config['model_file'])
-            self.logger.info("ML model loaded successfully")
-        except FileNotFoundError:
-            self.train_ml_model()
+        """Load the registered model for the current training data, training only if it changed"""
+        if self.model_registry.pinned:
+            # A rolled-back version stays in use until the next explicit retrain
+            version = self.model_registry.active()
+            if self.publish_registered_model(version.fingerprint):
+                self.logger.info(f"ML model {version.fingerprint[:12]} loaded (pinned by rollback)")
+                return
+        self.train_ml_model()
             
-    def train_ml_model(self):
-        """Train ML model on offline commands and conversation history"""
+    def get_training_data(self) -> Tuple[List[str], List[str]]:
+        """Collect labeled utterances from offline commands and conversation history"""
         training_data = []
         labels = []
         
@@ -417,28 +911,135 @@ class HybridAssistant:
                 labels.append(command)
                 
         
-        for conv in self.conversation_history:
+        for conv in self.history_log.iter_records():
             if conv.get('offline_command'):
                 training_data.append(conv['user_input'])
                 labels.append(conv['offline_command'])
                 
-        if len(training_data) > 0:
+        return training_data, labels
+        
+    def build_ml_model(self) -> Optional[IncrementalIntentModel]:
+        """Fit a fresh intent model on all available training data"""
+        training_data, labels = self.get_training_data()
+        if not training_data:
+            self.logger.warning("No training data available for ML model")
+            return None
             
-            self.ml_model = Pipeline([
-                ('tfidf', TfidfVectorizer(stop_words='english', ngram_range=(1, 2))),
-                ('classifier', MultinomialNB())
-            ])
+        model = IncrementalIntentModel(labels)
+        model.partial_fit(training_data, labels)
+        return model
+        
+    def publish_ml_model(self, model: IncrementalIntentModel):
+        """Atomically swap in a newly trained model"""
+        self.engine.publish_model(model)
+        
+    def publish_background_model(self, model: IncrementalIntentModel):
+        """Swap in a model the trainer produced, unless a rolled-back version is pinned"""
+        # The pinned version is what loads after a restart, so keep running it too
+        if self.model_registry.pinned:
+            self.logger.info("Model rollback pinned - background update stored but not used")
+            return
+        self.publish_ml_model(model)
+        
+    def publish_registered_model(self, fingerprint: str) -> bool:
+        """Load a registry version and swap it in; False if it cannot be loaded"""
+        try:
+            model = self.model_registry.load(fingerprint)
+        except Exception as e:
+            self.logger.warning(f"Could not load model {fingerprint[:12]}: {e}")
+            return False
+        self.publish_ml_model(model)
+        return True
+        
+    def training_fingerprint(self) -> Optional[str]:
+        """Registry key the current training data and hyperparameters would produce"""
+        training_data, labels = self.get_training_data()
+        if not training_data:
+            return None
+        params = IncrementalIntentModel(labels).params
+        return training_fingerprint(data_digest(training_data, labels), labels, params)
             
-            self.ml_model.fit(training_data, labels)
-            joblib.dump(self.ml_model, self.config['model_file'])
+    def train_ml_model(self, force: bool = False):
+        """Train ML model on offline commands and conversation history.
+        
+        Skipped when the registry already holds a model for exactly this
+        training data and these hyperparameters, unless ``force`` is set.
+        """
+        fingerprint = self.training_fingerprint()
+        if not force and fingerprint and self.model_registry.get(fingerprint):
+            if self.publish_registered_model(fingerprint):
+                self.model_registry.activate(fingerprint)
+                self.logger.info(f"ML model {fingerprint[:12]} loaded (training data unchanged)")
+                return
+                
+        model = self.build_ml_model()
+        if model is not None:
+            self.publish_ml_model(model)
+            self.save_ml_model(model, activate=True)
             self.logger.info("ML model trained and saved")
-        else:
-            self.logger.warning("No training data available for ML model")
+            # Cross-validation refits the model several times; keep it off the readiness path
+            threading.Thread(target=self.validate_ml_model, args=(model.fingerprint,),
+                             name="model-validation", daemon=True).start()
             
-    def setup_audio(self):
-        """Setup audio input/output"""
+    def rebuild_ml_model(self) -> Optional[IncrementalIntentModel]:
+        """Full background retrain: register and validate the fresh model on the trainer thread"""
+        model = self.build_ml_model()
+        if model is not None:
+            self.save_ml_model(model)
+            self.validate_ml_model(model.fingerprint)
+        return model
         
+    def save_ml_model(self, model: IncrementalIntentModel, activate: Optional[bool] = None):
+        """Register a trained model with its metadata, keeping any validation score it already has.
+        
+        Background updates are stored but not activated while a rollback is pinned.
+        """
+        existing = self.model_registry.get(model.fingerprint)
+        self.model_registry.register(
+            model, model.fingerprint,
+            samples=model.samples_seen,
+            classes=model.labels,
+            params=model.params,
+            validation_score=existing.validation_score if existing else None,
+            activate=not self.model_registry.pinned if activate is None else activate
+        )
+        
+    def validate_ml_model(self, fingerprint: str):
+        """Score a fully rebuilt model on held-out splits of its training data"""
+        version = self.model_registry.get(fingerprint)
+        if version is None:
+            return
+        training_data, labels = self.get_training_data()
+        if not training_data or training_fingerprint(data_digest(training_data, labels), labels,
+                                                     version.params) != fingerprint:
+            # The data moved on since the rebuild; the next rebuild gets scored instead
+            return
+        try:
+            score = holdout_score(training_data, labels, **version.params)
+        except Exception as e:
+            self.logger.warning(f"Could not validate model {fingerprint[:12]}: {e}")
+            return
+        self.model_registry.set_validation_score(fingerprint, score)
+        
+    def rollback_ml_model(self, fingerprint: Optional[str] = None):
+        """Return to the previous (or a given) registered model and keep using it across restarts"""
+        version = self.model_registry.rollback(fingerprint)
+        if not self.publish_registered_model(version.fingerprint):
+            raise RuntimeError(f"Model {version.fingerprint[:12]} could not be loaded")
+        return version
+            
+    def setup_speech_services(self):
+        """Speech recognition and the TTS clip cache, without any local audio device"""
         self.recognizer = sr.Recognizer()
+        self.tts_cache = TTSCache(
+            self.config['tts_cache_dir'],
+            max_disk_bytes=self.config['tts_cache_mb'] * 1024 * 1024,
+            logger=self.logger
+        )
+        
+    def setup_audio(self):
+        """Setup audio input/output"""
+        self.setup_speech_services()
         self.microphone = sr.Microphone()
         
         
@@ -451,50 +1052,127 @@ class HybridAssistant:
         
         mixer.init()
         
+        self.speech_pipeline = SpeechPipeline(
+            lambda sentence: self.speak(sentence, wait=False),
+            drain=lambda timeout: self.audio_player.wait_idle(timeout),
+            logger=self.logger
+        )
+        self.audio_player = AudioPlayer(
+            on_clip_start=self.speech_pipeline.notify_audio_started,
+            logger=self.logger
+        )
+        self.tts_engine.connect('started-utterance', lambda name: self.speech_pipeline.notify_audio_started())
+        
+        self.capture = MicrophoneCapture(
+            self.microphone,
+            vad_options={
+                'hangover_ms': self.config['vad_hangover_ms'],
+                'energy_ratio': self.config['vad_energy_ratio'],
+                'max_utterance_s': self.config['vad_max_utterance_s'],
+                'echo_ratio': self.config['vad_echo_ratio']
+            },
+            is_playing=self.is_speaking,
+            logger=self.logger
+        )
+        self.capture.start()
+        
         self.logger.info("Audio systems initialized")
         
+    def is_speaking(self) -> bool:
+        """Check whether JARVIS is currently producing audio"""
+        return self.offline_speaking or (self.audio_player is not None and self.audio_player.is_playing)
+        
     def load_conversation_history(self):
-        """Load conversation history from file"""
-        try:
-            with open(self.config['conversation_file'], 'r') as f:
-                self.conversation_history = json.load(f)
-        except FileNotFoundError:
-            self.conversation_history = []
+        """Load conversation history from the append-only log"""
+        self.history_log = ConversationLog(self.config['conversation_log_dir'], logger=self.logger)
+        self.history_log.migrate_legacy(self.config['conversation_file'])
+        self.history_log.start()
+        
+        # Only a tail stays in memory; the model and the answer index stream the full log.
+        # The GUI's own conversation; turns from server sessions only feed the shared model and index
+        self.conversation_history = deque(maxlen=self.config['history_memory_turns'])
+        local_history = deque(maxlen=50)
+        for turn in self.history_log.iter_records():
+            self.conversation_history.append(turn)
+            if turn.get('session', LOCAL_SESSION) == LOCAL_SESSION:
+                local_history.append(turn)
+        self.session = self.new_session(LOCAL_SESSION, list(local_history))
+        
+        self.response_cache = ResponseCache(
+            self.config['response_cache_file'],
+            max_entries=self.config['response_cache_size'],
+            default_ttl=self.config['response_cache_ttl'],
+            logger=self.logger
+        )
             
+    def new_session(self, session_id: str, history: List[Dict] = (), remote: bool = False) -> Session:
+        """Conversation state for one client, with its own Gemini context"""
+        # Gemini context: recent turns verbatim, older ones folded into a rolling summary
+        prompt_builder = PromptBuilder(
+            SYSTEM_PROMPT,
+            max_tokens=self.config['prompt_max_tokens'],
+            recent_turns=self.config['prompt_recent_turns'],
+            max_turn_tokens=self.config['prompt_turn_tokens'],
+            summary_tokens=self.config['prompt_summary_tokens'],
+            logger=self.logger
+        )
+        prompt_builder.extend(history)
+        return Session(session_id, prompt_builder, history, allow_actions=not remote,
+                       max_history=self.config['session_max_history'] if remote else None)
+        
     def save_conversation_history(self):
-        """Save conversation history to file"""
-        with open(self.config['conversation_file'], 'w') as f:
-            json.dump(self.conversation_history, f, indent=2)
+        """Flush pending conversation records and cached answers to disk"""
+        with self.tracer.span('save_history'):
+            self.history_log.sync()
+        self.response_cache.save()
             
-    def listen(self) -> Optional[str]:
-        """Listen for voice input using free speech recognition"""
+    def listen(self, timeout: Optional[float] = None, interactive: bool = True) -> Optional[str]:
+        """Listen for voice input using free speech recognition
+        
+        With ``interactive=False`` no status updates or spoken error prompts
+        are produced, for checking for interjections in the background.
+        """
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            if interactive:
                 self.logger.info("Listening...")
                 if self.gui:
                     self.gui.update_status("Listening...")
                 
-            with self.microphone as source:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            # The capture thread keeps the microphone open; take the next buffered utterance
+            if timeout is None:
+                timeout = self.config['listen_timeout']
+            if interactive:
+                with self.tracer.span('listen'):
+                    frame_data = self.capture.next_utterance(timeout=timeout)
+            else:
+                frame_data = self.capture.next_utterance(timeout=timeout)
+            if frame_data is None:
+                return None
+            audio = sr.AudioData(frame_data, self.capture.sample_rate, self.capture.sample_width)
                 
             self.logger.info("Processing speech...")
-            if self.gui:
+            if self.gui and interactive:
                 self.gui.update_status("Processing speech...")
             
             
-            text = self.recognizer.recognize_google(audio)
+            with self.tracer.span('recognize'):
+                text = self.recognizer.recognize_google(audio)
             self.logger.info(f"Recognized: {text}")
             return text.lower()
             
+        except CaptureError:
+            raise
         except sr.UnknownValueError:
             self.logger.warning("Could not understand audio")
+            if not interactive:
+                return None
             if self.gui:
                 self.gui.add_message("JARVIS: Sorry, I didn't catch that. Please repeat.", 'jarvis')
             self.speak("Sorry, I didn't catch that. Please repeat.")
             return None
         except sr.RequestError as e:
             self.logger.error(f"Speech recognition error: {e}")
+            self.connectivity.report_failure(e)
             # Auto-switch to offline if speech recognition fails due to network
             if self.is_online:
                 self.speak("Speech recognition service unavailable, switching to offline mode")
@@ -506,117 +1184,357 @@ class HybridAssistant:
             self.logger.error(f"Listening error: {e}")
             return None
             
-    def speak(self, text: str):
-        """Convert text to speech using available TTS services"""
-        self.logger.info(f"Speaking: {text}")
+    def speak(self, text: str, wait: bool = True):
+        """Convert text to speech using available TTS services
         
-        if self.is_online and self.tts_client:
-            try:
-                
-                synthesis_input = texttospeech.SynthesisInput(text=text)
-                voice = texttospeech.VoiceSelectionParams(
-                    language_code="en-US",
-                    ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
-                )
-                audio_config = texttospeech.AudioConfig(
-                    audio_encoding=texttospeech.AudioEncoding.MP3
-                )
-                
-                response = self.tts_client.synthesize_speech(
-                    input=synthesis_input, voice=voice, audio_config=audio_config
-                )
+        With ``wait=False`` synthesized audio is queued on the player and the
+        call returns immediately so the next clip can be prepared meanwhile.
+        """
+        self.logger.info(f"Speaking: {text}")
+        audio = self.synthesize_speech(text)
+        if audio is not None:
+            handle = self.audio_player.enqueue(audio)
+            handle.add_done_callback(functools.partial(self.record_playback, trace=current_trace()))
+            if wait:
+                handle.wait()
+            return
                 
-            
-                audio_file = f"{self.config['audio_dir']}response.mp3"
-                with open(audio_file, "wb") as out:
-                    out.write(response.audio_content)
-                    
-                pygame.mixer.music.load(audio_file)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                    
-            except Exception as e:
-                self.logger.error(f"Google TTS error: {e}")
-                # Fallback to offline TTS
+        # Fallback to offline TTS, after any clip still playing
+        self.audio_player.wait_idle()
+        self.offline_speaking = True
+        try:
+            with self.tracer.span('offline_tts'):
                 self.tts_engine.say(text)
                 self.tts_engine.runAndWait()
-        else:
-            # Use offline TTS
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+        finally:
+            self.offline_speaking = False
+            
+    def record_playback(self, handle, trace=None):
+        """Trace span for a clip's time on the speakers, recorded by the player once it ends"""
+        if handle.started_at is not None and handle.finished_at is not None:
+            self.tracer.record('playback', handle.started_at, max(0.0, handle.finished_at - handle.started_at), trace)
+        
+    def synthesize_speech(self, text: str) -> Optional[bytes]:
+        """MP3 clip for text from the TTS cache or Google TTS; None if neither can provide one"""
+        # Cached clips need no network call, even in offline mode
+        with self.tracer.span('tts'):
+            key = self.tts_cache_key(text)
+            audio = self.tts_cache.get(key)
             
-    async def process_online_request(self, user_input: str) -> str:
-        """Process request using online services (Gemini)"""
+            if audio is None and self.is_online and self.google_tts():
+                try:
+                    audio = self.synthesize_google_tts(text)
+                    self.tts_cache.put(key, audio)
+                except Exception as e:
+                    self.logger.error(f"Google TTS error: {e}")
+        return audio
+        
+    def transcribe(self, wav: bytes) -> Optional[str]:
+        """Recognize speech in an uploaded WAV/AIFF/FLAC clip; None if nothing was understood"""
+        with sr.AudioFile(io.BytesIO(wav)) as source:
+            audio = self.recognizer.record(source)
         try:
-            if not self.check_online_connectivity():
-                self.is_online = False
-                if self.gui:
-                    self.gui.mode_button.config(text="Toggle Mode (Offline)")
-                    self.gui.add_message("System: Switched to Offline mode - Connection lost", 'system')
-                return self.process_offline_request(user_input)
+            with self.tracer.span('recognize'):
+                return self.recognizer.recognize_google(audio).lower()
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            self.connectivity.report_failure(e)
+            raise
+        
+    def stop_speaking(self):
+        """Interrupt speech immediately and drop everything still queued"""
+        self.speech_pipeline.cancel()
+        self.audio_player.interrupt()
+        try:
+            self.tts_engine.stop()
+        except Exception as e:
+            self.logger.error(f"Could not stop offline TTS: {e}")
             
+    def tts_cache_key(self, text: str) -> str:
+        """Cache key for a Google TTS clip of the given text"""
+        return TTSCache.make_key(
+            text, voice=f"{self.config['tts_language']}-NEUTRAL",
+            rate=self.config['tts_speaking_rate'], engine='google'
+        )
+        
+    def synthesize_google_tts(self, text: str) -> bytes:
+        """Synthesize MP3 audio for text with Google Cloud TTS"""
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=self.config['tts_language'],
+            ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3,
+            speaking_rate=self.config['tts_speaking_rate']
+        )
+        
+        response = self.tts_client.synthesize_speech(
+            input=synthesis_input, voice=voice, audio_config=audio_config
+        )
+        return response.audio_content
         
-            context = "You are JARVIS, an advanced AI assistant. Keep responses concise and helpful.\n\n"
+    def warm_up_tts_cache(self):
+        """Pre-synthesize fixed phrases and canned responses in the background"""
+        if not (self.is_online and self.google_tts()):
+            self.logger.info("Skipping TTS warm-up - Google TTS unavailable")
+            return
             
+        texts = list(SYSTEM_PHRASES)
+        for data in self.offline_commands.values():
+            texts.extend(data.get('responses', []))
+        try:
+            with open(self.config['responses_file'], 'r') as f:
+                for phrases in json.load(f).values():
+                    texts.extend(phrases)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
             
-            recent_history = self.conversation_history[-5:] if len(self.conversation_history) > 5 else self.conversation_history
-            for conv in recent_history:
-                context += f"Human: {conv['user_input']}\nAssistant: {conv['response']}\n\n"
-                
-            context += f"Human: {user_input}\nAssistant:"
+        self.tts_cache.warm_up(texts, self.tts_cache_key, self.synthesize_google_tts)
+            
+    async def process_online_request(self, user_input: str,
+                                     on_sentence: Optional[Callable[[str], None]] = None,
+                                     session: Optional[Session] = None) -> str:
+        """Process request using online services (Gemini)
+        
+        When ``on_sentence`` is given, the whole reply (including any offline
+        fallback) is also delivered through it, sentence by sentence when
+        streaming is enabled. ``session`` defaults to the local GUI session.
+        """
+        session = session or self.session
+        try:
+            if not self.check_online_connectivity():
+                self.go_offline_automatically("Switched to Offline mode - Connection lost")
+                return self._deliver(await self.runtime.run_blocking(self.process_offline_request, user_input, session), on_sentence)
             
-            response = self.gemini_model.generate_content(context)
+        
+            cache_key = self.response_cache_key(user_input, session)
+            if cache_key:
+                cached = await self.runtime.run_blocking(self.response_cache.get, cache_key)
+                if cached is not None:
+                    self.logger.info("Answered from response cache")
+                    self.add_to_conversation_history(user_input, cached, session=session, mode='online')
+                    return self._deliver_sentences(cached, on_sentence)
             
+            with self.tracer.span('prompt'):
+                prompt = session.prompt_builder.build(user_input)
+            if on_sentence and self.config['hedge_enabled']:
+                return await self.process_hedged_request(user_input, prompt, cache_key, on_sentence, session)
             
-            self.add_to_conversation_history(user_input, response.text)
+            response_text = await self.ask_gemini(prompt, cache_key, on_sentence, session)
+            self.add_to_conversation_history(user_input, response_text, session=session, mode='online')
             
-            return response.text
+            return response_text
             
         except Exception as e:
+            # Answer this turn offline; the circuit breaker decides whether to leave online mode
             self.logger.error(f"Online processing error: {e}")
+            self.report_online_failure(e)
+            return self._deliver(await self.runtime.run_blocking(self.process_offline_request, user_input, session), on_sentence)
+        finally:
+            self.publish_api_status()
             
-            self.is_online = False
-            if self.gui:
-                self.gui.mode_button.config(text="Toggle Mode (Offline)")
-                self.gui.add_message("System: Switched to Offline mode - API error", 'system')
-            return self.process_offline_request(user_input)
+    def report_online_failure(self, error: Exception):
+        """Pass a failed online request on to the connectivity monitor as a passive signal"""
+        # Only transport and transient errors say anything about the network; a blocked
+        # or invalid reply doesn't, and an open circuit refused the call before sending it
+        if self.gemini is not None and isinstance(error, self.gemini.retryable + (aiohttp.ClientError,)):
+            self.connectivity.report_failure(error)
             
-    def process_offline_request(self, user_input: str) -> str:
-        """Process request using offline capabilities"""
+    async def ask_gemini(self, prompt: Prompt, cache_key: Optional[str],
+                         on_sentence: Optional[Callable[[str], None]] = None,
+                         session: Optional[Session] = None) -> str:
+        """Send a prompt through the resilient Gemini client and cache the answer"""
+        started = time.perf_counter()
+        with self.tracer.span('llm'):
+            if on_sentence and self.config['stream_responses']:
+                response_text = await self.stream_gemini_response(prompt.text, on_sentence)
+            else:
+                response_text = self._deliver(await self.gemini.generate(prompt.text), on_sentence)
+        latency = time.perf_counter() - started
+        self.latency.record('online', latency)
+        (session or self.session).prompt_builder.report(prompt, latency)
+        self.connectivity.report_success()
+        if cache_key:
+            await self.runtime.run_blocking(self.response_cache.put, cache_key, response_text, latency)
+        return response_text
         
-        if self.ml_model:
-            try:
-                prediction = self.ml_model.predict([user_input])[0]
-                confidence = max(self.ml_model.predict_proba([user_input])[0])
+    async def process_hedged_request(self, user_input: str, prompt: Prompt, cache_key: Optional[str],
+                                     on_sentence: Callable[[str], None],
+                                     session: Optional[Session] = None) -> str:
+        """Race Gemini against the offline path, speaking offline first if Gemini misses the deadline
+        
+        Gemini counts as on time when its first sentence arrives before the
+        deadline. Otherwise a side-effect-free offline answer (or, without
+        one, a filler) is spoken first and Gemini's reply follows it. A Gemini
+        error falls back to the offline path for this turn only and leaves the
+        mode switch to the circuit breaker.
+        """
+        gate = HedgeGate(on_sentence)
+        mode = 'online'
+        online = asyncio.ensure_future(self.ask_gemini(prompt, cache_key, gate.online, session))
+        offline = asyncio.ensure_future(self.runtime.run_blocking(self.preview_offline_response, user_input))
+        answered = asyncio.ensure_future(gate.answered.wait())
+        
+        try:
+            await asyncio.wait({online, answered}, timeout=self.hedge_deadline(),
+                               return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            for task in (online, offline, answered):
+                task.cancel()
+            raise
+        answered.cancel()
+        
+        try:
+            if online.done() and online.exception():
+                offline.cancel()
+                self.logger.error(f"Online processing error: {online.exception()}")
+                self.report_online_failure(online.exception())
+                self.latency.count_outcome('online_error')
+                return self._deliver(await self.runtime.run_blocking(self.process_offline_request, user_input, session), on_sentence)
                 
-                if confidence > 0.6:  
-                    response = self.execute_offline_command(prediction, user_input)
-                    self.add_to_conversation_history(user_input, response, prediction)
-                    return response
-            except Exception as e:
-                self.logger.error(f"ML prediction error: {e}")
+            if gate.answered.is_set() or online.done():
+                offline.cancel()
+                self.latency.record('online_first', gate.first_output)
+                self.latency.count_outcome('online')
+                response_text = await online
+            else:
+                offline_text = None
+                if offline.done():
+                    try:
+                        offline_text = offline.result()
+                    except Exception as e:
+                        self.logger.error(f"Hedged offline answer failed: {e}")
+                offline.cancel()
+                if offline_text:
+                    self.latency.count_outcome('offline')
+                    offline_text = self._deliver_sentences(offline_text, on_sentence)
+                else:
+                    self.latency.count_outcome('filler')
+                    on_sentence(np.random.choice(HEDGE_FILLERS))
+                # Gemini's sentences are queued behind what was just said
+                try:
+                    response_text = await online
+                except Exception as e:
+                    if not offline_text:
+                        raise
+                    # The offline answer already covered the turn
+                    self.logger.warning(f"Hedged Gemini call failed: {e}")
+                    self.report_online_failure(e)
+                    mode = 'offline'
+                    response_text = offline_text
+                else:
+                    self.latency.record('online_first', gate.first_output)
+                    if offline_text:
+                        response_text = f"{offline_text} {response_text}"
+        except BaseException:
+            # Whatever answers this turn instead, Gemini must not talk over it
+            gate.mute()
+            for task in (online, offline):
+                task.cancel()
+            raise
                 
+        self.logger.info(f"Hedged turn latency: {self.latency.summary()}")
+        self.add_to_conversation_history(user_input, response_text, session=session, mode=mode)
+        return response_text
         
-        for command, data in self.offline_commands.items():
-            for pattern in data['patterns']:
-                if pattern in user_input:
-                    response = self.execute_offline_command(command, user_input)
-                    self.add_to_conversation_history(user_input, response, command)
-                    return response
+    def hedge_deadline(self) -> float:
+        """Configured deadline, or one derived from observed Gemini latency when auto-tuning"""
+        if self.config['hedge_auto_tune']:
+            suggested = self.latency.suggest_deadline(
+                'online_first', self.config['hedge_percentile'],
+                minimum=self.config['hedge_deadline'] / 2, maximum=self.config['hedge_deadline'] * 3)
+            if suggested is not None:
+                return suggested
+        return self.config['hedge_deadline']
+        
+    def preview_offline_response(self, user_input: str) -> Optional[str]:
+        """Offline answer that is safe to give speculatively (no actions, no history)"""
+        started = time.perf_counter()
+        try:
+            engine = self.engine.current
+            with self.tracer.span('intent'):
+                match = engine.classify(user_input)
+            if match.intent:
+                if engine.action(match.intent) in REMOTE_SAFE_ACTIONS:
+                    return self.execute_offline_command(match.intent, user_input, engine=engine)
+                return None
+            if ResponseCache.is_cacheable(user_input):
+                answer = self.answer_index.best(user_input, self.config['answer_min_score'])
+                if answer:
+                    return answer.response
+            return None
+        finally:
+            self.latency.record('offline', time.perf_counter() - started)
+        
+    def submit_online_request(self, user_input: str,
+                              on_sentence: Optional[Callable[[str], None]] = None) -> concurrent.futures.Future:
+        """Run process_online_request on the assistant's event loop; cancel the future to abort it"""
+        return self.runtime.submit(self.process_online_request(user_input, on_sentence=on_sentence))
+        
+    async def stream_gemini_response(self, prompt: str, on_sentence: Callable[[str], None]) -> str:
+        """Stream a Gemini reply, handing over each sentence as soon as it is complete"""
+        splitter = SentenceSplitter()
+        chunks = []
+        async for text in self.gemini.stream(prompt):
+            chunks.append(text)
+            for sentence in splitter.feed(text):
+                on_sentence(sentence)
+        for sentence in splitter.flush():
+            on_sentence(sentence)
+        return "".join(chunks)
+        
+    def response_cache_key(self, user_input: str, session: Optional[Session] = None) -> Optional[str]:
+        """Cache key for an online question, or None if its answer must not be reused"""
+        if not self.response_cache.is_cacheable(user_input):
+            self.response_cache.bypass()
+            return None
+        context = [self.gemini_model.model_name, SYSTEM_PROMPT]
+        previous = (session or self.session).previous_turn()
+        if self.response_cache.needs_previous_turn(user_input) and previous:
+            context.extend([previous['user_input'], previous['response']])
+        return self.response_cache.make_key(user_input, context)
+        
+    def _deliver_sentences(self, text: str, on_sentence: Optional[Callable[[str], None]]) -> str:
+        if on_sentence:
+            for sentence in split_sentences([text]):
+                on_sentence(sentence)
+        return text
+        
+    def _deliver(self, text: str, on_sentence: Optional[Callable[[str], None]]) -> str:
+        if on_sentence:
+            on_sentence(text)
+        return text
+            
+    def process_offline_request(self, user_input: str, session: Optional[Session] = None) -> str:
+        """Process request using offline capabilities"""
+        session = session or self.session
+        # One snapshot for the whole turn, even if a retrain publishes mid-way
+        engine = self.engine.current
+        
+        with self.tracer.span('intent'):
+            match = engine.classify(user_input)
+        if match.intent:
+            response = self.execute_offline_command(match.intent, user_input, session.allow_actions, engine)
+            self.add_to_conversation_history(user_input, response, match.intent, session, mode='offline')
+            return response
                     
 
         response = self.generate_offline_response(user_input)
-        self.add_to_conversation_history(user_input, response)
+        self.add_to_conversation_history(user_input, response, session=session, mode='offline')
         return response
         
-    def execute_offline_command(self, command: str, user_input: str) -> str:
+    def execute_offline_command(self, command: str, user_input: str, allow_actions: bool = True,
+                                engine: Optional[Engine] = None) -> str:
         """Execute offline commands"""
         try:
-            command_data = self.offline_commands.get(command, {})
+            command_data = (engine or self.engine.current).commands.get(command, {})
             action = command_data.get('action')
             responses = command_data.get('responses', ["Processing your request..."])
             
+            if not allow_actions and action not in REMOTE_SAFE_ACTIONS:
+                return "That command is only available on the assistant's own device."
             if action == 'get_weather':
                 return self.get_weather_offline()
             elif action == 'open_chrome':
@@ -646,22 +1564,8 @@ class HybridAssistant:
             return "I encountered an error while processing your request."
             
     def get_weather_offline(self) -> str:
-        """Get weather information (offline fallback)"""
-        if self.config['weather_api_key'] and self.is_online:
-            try:
-                
-                url = f"http://api.openweathermap.org/data/2.5/weather?q=London&appid={self.config['weather_api_key']}&units=metric"
-                response = requests.get(url, timeout=5)
-                data = response.json()
-                
-                temp = data['main']['temp']
-                description = data['weather'][0]['description']
-                return f"The current temperature is {temp}°C with {description}."
-                
-            except Exception as e:
-                self.logger.error(f"Weather API error: {e}")
-                
-        return "I can't get current weather information in offline mode. You might want to check your weather app or enable online mode."
+        """Answer a weather question from the cached snapshot (no network on this path)"""
+        return self.weather.answer()
         
     def open_chrome(self):
         """Open Chrome browser"""
@@ -735,30 +1639,198 @@ class HybridAssistant:
             return np.random.choice(responses['thanks'])
         elif any(word in input_lower for word in ['bye', 'goodbye', 'see you', 'exit']):
             return np.random.choice(responses['goodbye'])
-        else:
-            return np.random.choice(responses['default'])
+        
+        # Reuse an earlier online answer to a sufficiently similar question
+        if ResponseCache.is_cacheable(user_input):
+            answer = self.answer_index.best(user_input, self.config['answer_min_score'])
+            if answer:
+                self.logger.info(f"Offline answer from history (similarity {answer.score:.2f}): {answer.question}")
+                return answer.response
+                
+        return np.random.choice(responses['default'])
             
-    def add_to_conversation_history(self, user_input: str, response: str, offline_command: str = None):
-        """Add conversation to history and retrain model if needed"""
+    def add_to_conversation_history(self, user_input: str, response: str, offline_command: str = None,
+                                    session: Optional[Session] = None, mode: Optional[str] = None):
+        """Add conversation to history and queue labeled turns for training
+        
+        ``mode`` is the path that actually answered; it defaults to the
+        current mode switch.
+        """
+        session = session or self.session
         conversation = {
             'timestamp': datetime.now().isoformat(),
             'user_input': user_input,
             'response': response,
-            'mode': 'offline' if not self.is_online else 'online',
+            'mode': mode or ('online' if self.is_online else 'offline'),
             'offline_command': offline_command
         }
+        if session.id != LOCAL_SESSION:
+            conversation['session'] = session.id
+        trace = current_trace()
+        if trace is not None:
+            # The finished trace is written to the trace log under this id
+            conversation['trace_id'] = trace.id
         
         self.conversation_history.append(conversation)
-        self.save_conversation_history()
+        with self.tracer.span('history'):
+            self.history_log.append(conversation)
+        session.record(conversation)
+        self.answer_index.add(conversation)
         
         
-        if len(self.conversation_history) % 10 == 0:
-            self.train_ml_model()
+        if offline_command:
+            self.intent_trainer.submit(user_input, offline_command)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="JARVIS hybrid voice assistant")
+    parser.add_argument('--startup-profile', nargs='?', const='', metavar='FILE',
+                        help="print import and init timings once the GUI is ready, then exit "
+                             "(optionally also writing them to FILE as JSON)")
+    parser.add_argument('--serve', action='store_true',
+                        help="run headless, serving text and audio turns over HTTP/WebSocket")
+    parser.add_argument('--host', help="server address (default: SERVER_HOST or 127.0.0.1)")
+    parser.add_argument('--port', type=int, help="server port (default: SERVER_PORT or 8765)")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the utterances in a text or JSONL file ('-' for stdin) through the "
+                             "assistant and write JSONL results, without Tk or a microphone")
+    parser.add_argument('--output', metavar='FILE', help="batch results file (default: stdout)")
+    parser.add_argument('--batch-size', type=int,
+                        help="utterances classified per model call (default: BATCH_SIZE or 256)")
+    parser.add_argument('--concurrency', type=int,
+                        help="concurrent Gemini requests in batch mode (default: BATCH_CONCURRENCY or 8)")
+    parser.add_argument('--offline', action='store_true', help="batch mode: never call Gemini")
+    parser.add_argument('--labels-only', action='store_true',
+                        help="batch mode: only classify intents, without generating responses")
+    parser.add_argument('--check', action='store_true',
+                        help="batch mode: exit with status 1 if any intent differs from the expected one")
+    parser.add_argument('--rollback-model', nargs='?', const='', metavar='FINGERPRINT',
+                        help="return to the previously active intent model (or the stored version whose "
+                             "fingerprint starts with FINGERPRINT) and keep it until the next retrain, then exit")
+    return parser.parse_args(argv)
+
+def serve(args):
+    """Run without Tk or local audio, serving many client sessions from one assistant"""
+    from server import AssistantServer
+    
+    assistant = HybridAssistant(headless=True)
+    server = AssistantServer(
+        assistant,
+        host=args.host or assistant.config['server_host'],
+        port=args.port if args.port is not None else assistant.config['server_port'],
+        max_sessions=assistant.config['server_max_sessions'],
+        idle_timeout=assistant.config['server_session_idle'],
+        logger=assistant.logger
+    )
+    assistant.runtime.run(server.start())
+    print(f"JARVIS server listening on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        assistant.runtime.run(server.stop(), timeout=10)
+        if assistant.startup.is_ready('offline'):
+            assistant.save_conversation_history()
+        assistant.export_metrics()
+        assistant.startup.shutdown()
+        assistant.runtime.stop()
+
+def run_batch(args) -> int:
+    """Replay an utterance file through the offline and online paths; returns the exit status"""
+    from batch import BatchRunner, open_output, summary
+    
+    assistant = HybridAssistant(headless=True)
+    online = not (args.offline or args.labels_only)
+    try:
+        if not assistant.startup.wait(['offline'], timeout=120):
+            print(f"Assistant failed to start: {assistant.startup.failures()}", file=sys.stderr)
+            return 2
+        if online:
+            assistant.startup.wait(['online'], timeout=60)
+            online = assistant.is_online and assistant.gemini is not None
+            if not online:
+                assistant.logger.info("Batch mode: Gemini unavailable, answering offline")
+                
+        runner = BatchRunner(
+            assistant,
+            batch_size=args.batch_size or assistant.config['batch_size'],
+            concurrency=args.concurrency or assistant.config['batch_concurrency'],
+            online=online,
+            responses=not args.labels_only,
+            logger=assistant.logger
+        )
+        source = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+        output = open_output(args.output)
+        try:
+            stats = runner.run(source, output)
+            assistant.response_cache.save()
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not sys.stdout:
+                output.close()
+        print(summary(stats), file=sys.stderr)
+        return 1 if args.check and stats['changed'] else 0
+    finally:
+        assistant.startup.shutdown()
+        assistant.runtime.stop()
+
+def run_rollback(args) -> int:
+    """Pin an earlier intent model version for this and later starts; returns the exit status"""
+    assistant = HybridAssistant(headless=True)
+    try:
+        if not assistant.startup.wait(['offline'], timeout=120):
+            print(f"Assistant failed to start: {assistant.startup.failures()}", file=sys.stderr)
+            return 2
+        versions = assistant.model_registry.versions()
+        fingerprint = None
+        if args.rollback_model:
+            matches = [v.fingerprint for v in versions if v.fingerprint.startswith(args.rollback_model)]
+            if len(matches) != 1:
+                print(f"{'No' if not matches else 'More than one'} stored model matches {args.rollback_model!r}",
+                      file=sys.stderr)
+                for version in versions:
+                    print(f"  {version.fingerprint[:12]}  {datetime.fromtimestamp(version.trained_at):%Y-%m-%d %H:%M}  "
+                          f"{version.samples} samples", file=sys.stderr)
+                return 1
+            fingerprint = matches[0]
+        try:
+            version = assistant.rollback_ml_model(fingerprint)
+        except (LookupError, RuntimeError) as e:
+            print(f"Rollback failed: {e}", file=sys.stderr)
+            return 1
+        print(f"Intent model {version.fingerprint[:12]} ({version.samples} samples) is active "
+              f"until the next retrain")
+        return 0
+    finally:
+        assistant.startup.shutdown()
+        assistant.runtime.stop()
 
 def main():
     """Main function to run the assistant with GUI"""
-    root = tk.Tk()
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+    if args.batch:
+        sys.exit(run_batch(args))
+    if args.rollback_model is not None:
+        sys.exit(run_rollback(args))
+    with startup_phase("tk_root"):
+        root = tk.Tk()
     app = HybridAssistantGUI(root)
+    
+    if args.startup_profile is not None:
+        root.update_idletasks()
+        profiler.mark("gui")
+        app.assistant.startup.wait(timeout=60)
+        print(profiler.report())
+        if args.startup_profile:
+            profiler.write_json(args.startup_profile)
+        app.assistant.startup.shutdown()
+        app.assistant.runtime.stop()
+        root.destroy()
+        return
     root.mainloop()
 
 if __name__ == "__main__":
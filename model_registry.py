@@ -0,0 +1,177 @@
+"""Versioned, fingerprinted store for trained JARVIS models"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from startup_profile import lazy_import
+
+joblib = lazy_import('joblib')
+
+
+class ModelVersion(NamedTuple):
+    fingerprint: str
+    trained_at: float
+    samples: int
+    classes: List[str]
+    params: Dict
+    validation_score: Optional[float] = None
+
+
+class ModelRegistry:
+    """Trained models keyed by a fingerprint of their training data and hyperparameters.
+
+    Each version is stored as ``<directory>/<fingerprint>.pkl`` and described
+    in ``index.json`` with its training time, sample count, classes and
+    validation score, so an unchanged training set never needs a refit. One
+    version is active; activating another remembers the previous one so
+    ``rollback`` can return to it. A rollback pins the active version until
+    the next explicit ``activate``. Only the ``keep`` newest versions (plus
+    the active one) stay on disk.
+    """
+
+    def __init__(self, directory: str, keep: int = 5, logger: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.keep = keep
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.RLock()
+        self._versions: Dict[str, ModelVersion] = {}
+        self._active: Optional[str] = None
+        self._history: List[str] = []
+        self.pinned = False
+        self._load_index()
+
+    def versions(self) -> List[ModelVersion]:
+        """All stored versions, newest first"""
+        with self._lock:
+            return sorted(self._versions.values(), key=lambda version: -version.trained_at)
+
+    def get(self, fingerprint: str) -> Optional[ModelVersion]:
+        return self._versions.get(fingerprint)
+
+    def active(self) -> Optional[ModelVersion]:
+        with self._lock:
+            return self._versions.get(self._active) if self._active else None
+
+    def load(self, fingerprint: Optional[str] = None):
+        """Unpickle a stored model (default: the active one)"""
+        fingerprint = fingerprint or self._active
+        if fingerprint is None or fingerprint not in self._versions:
+            raise LookupError(f"No stored model version {fingerprint}")
+        return joblib.load(self._path(fingerprint))
+
+    def register(self, model, fingerprint: str, samples: int, classes: List[str], params: Dict,
+                 validation_score: Optional[float] = None, activate: bool = True) -> ModelVersion:
+        """Store ``model`` under ``fingerprint``, replacing an earlier copy of the same version"""
+        version = ModelVersion(fingerprint, time.time(), samples, list(classes), dict(params),
+                               validation_score)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(fingerprint).with_suffix(".tmp")
+            joblib.dump(model, tmp)
+            os.replace(tmp, self._path(fingerprint))
+            self._versions[fingerprint] = version
+            if activate:
+                self._activate(fingerprint)
+            self._prune()
+            self._save_index()
+        score = f", validation {validation_score:.2f}" if validation_score is not None else ""
+        self.logger.info(f"Registered model {fingerprint[:12]} ({samples} samples{score})")
+        return version
+
+    def set_validation_score(self, fingerprint: str, score: Optional[float]):
+        """Attach a validation score computed after ``fingerprint`` was registered"""
+        with self._lock:
+            version = self._versions.get(fingerprint)
+            if version is None:
+                return
+            self._versions[fingerprint] = version._replace(validation_score=score)
+            self._save_index()
+        if score is not None:
+            self.logger.info(f"Model {fingerprint[:12]} validation {score:.2f}")
+
+    def activate(self, fingerprint: str) -> ModelVersion:
+        """Make a stored version the active one and clear any rollback pin"""
+        with self._lock:
+            if fingerprint not in self._versions:
+                raise LookupError(f"No stored model version {fingerprint}")
+            self._activate(fingerprint)
+            self._save_index()
+            return self._versions[fingerprint]
+
+    def rollback(self, fingerprint: Optional[str] = None) -> ModelVersion:
+        """Re-activate ``fingerprint`` or, by default, the previously active version"""
+        with self._lock:
+            if fingerprint is None:
+                while self._history and self._history[-1] not in self._versions:
+                    self._history.pop()
+                if not self._history:
+                    raise LookupError("No earlier model version to roll back to")
+                fingerprint = self._history.pop()
+            elif fingerprint not in self._versions:
+                raise LookupError(f"No stored model version {fingerprint}")
+            else:
+                self._history = [f for f in self._history if f != fingerprint]
+            self._active = fingerprint
+            self.pinned = True
+            self._save_index()
+            self.logger.info(f"Rolled back to model {fingerprint[:12]}")
+            return self._versions[fingerprint]
+
+    def _activate(self, fingerprint: str):
+        if self._active and self._active != fingerprint:
+            self._history = [f for f in self._history if f != self._active] + [self._active]
+        self._active = fingerprint
+        self.pinned = False
+
+    def _prune(self):
+        protected = {self._active}
+        for version in self.versions()[self.keep:]:
+            if version.fingerprint in protected:
+                continue
+            del self._versions[version.fingerprint]
+            try:
+                self._path(version.fingerprint).unlink()
+            except OSError:
+                pass
+        self._history = [f for f in self._history if f in self._versions]
+
+    def _path(self, fingerprint: str) -> Path:
+        return self.directory / f"{fingerprint}.pkl"
+
+    def _save_index(self):
+        index = {
+            'active': self._active,
+            'pinned': self.pinned,
+            'history': self._history,
+            'versions': [version._asdict() for version in self.versions()],
+        }
+        tmp = self.directory / "index.json.tmp"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp, self.directory / "index.json")
+        except OSError as e:
+            self.logger.warning(f"Could not write model registry index: {e}")
+
+    def _load_index(self):
+        try:
+            with open(self.directory / "index.json", 'r') as f:
+                index = json.load(f)
+            versions = [ModelVersion(**version) for version in index.get('versions', [])]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable model registry index: {e}")
+            return
+        # Versions whose pickle has gone missing cannot be loaded or rolled back to
+        self._versions = {v.fingerprint: v for v in versions if self._path(v.fingerprint).exists()}
+        self._active = index.get('active') if index.get('active') in self._versions else None
+        self._history = [f for f in index.get('history', []) if f in self._versions]
+        self.pinned = bool(index.get('pinned')) and self._active is not None
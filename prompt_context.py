@@ -0,0 +1,178 @@
+"""Token-budgeted prompt construction for JARVIS online requests"""
+
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, NamedTuple, Optional
+
+# Rough size of one token in characters for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.S)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly ``max_tokens``, on a word boundary, marking the cut"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit - 3)].rsplit(" ", 1)[0]
+    return cut.rstrip() + "..."
+
+
+def first_sentence(text: str) -> str:
+    """First sentence of a text, or the whole text if it has no sentence end"""
+    text = " ".join(text.split())
+    match = _FIRST_SENTENCE.match(text)
+    return match.group(1) if match else text
+
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+    turns: int
+    truncated: int
+    dropped: int
+    summary_tokens: int
+
+
+class RollingSummary:
+    """Compact running summary of turns that have left the recent window.
+
+    Each aged-out turn is folded in once as a single line (first sentence of
+    the question and of the answer), so the summary is never recomputed per
+    request. The oldest lines are forgotten once ``max_tokens`` is exceeded.
+    """
+
+    def __init__(self, max_tokens: int = 300, line_tokens: int = 40):
+        self.max_tokens = max_tokens
+        self.line_tokens = line_tokens
+        self._lines = deque()
+        self._tokens = 0
+        self._text: Optional[str] = None
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    def fold(self, turn: Dict):
+        """Add one aged-out turn to the summary"""
+        line = truncate_to_tokens(
+            f"User asked: {first_sentence(turn['user_input'])} "
+            f"JARVIS: {first_sentence(turn['response'])}", self.line_tokens)
+        self._lines.append(line)
+        self._tokens += estimate_tokens(line) + 1
+        while self._tokens > self.max_tokens and len(self._lines) > 1:
+            self._tokens -= estimate_tokens(self._lines.popleft()) + 1
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(f"- {line}" for line in self._lines)
+        return self._text
+
+
+class PromptBuilder:
+    """Assembles Gemini prompts within a fixed token budget.
+
+    The system prompt and the new user input are always included. Whatever
+    budget remains is spent on, in priority order: the most recent online
+    turns (each capped at ``max_turn_tokens``), the rolling summary of older
+    turns, and finally recent offline turns (local command results such as
+    the time rarely help Gemini). Turns that do not fit are dropped oldest
+    first. Turns leave the recent window through ``add_turn`` and are folded
+    into the summary at that moment.
+    """
+
+    def __init__(self, system_prompt: str, max_tokens: int = 1500, recent_turns: int = 5,
+                 max_turn_tokens: int = 200, summary_tokens: int = 300,
+                 history_size: int = 100, logger: Optional[logging.Logger] = None):
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.max_turn_tokens = max_turn_tokens
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.summary = RollingSummary(max_tokens=summary_tokens)
+        self.recent = deque(maxlen=recent_turns)
+        self.size_history = deque(maxlen=history_size)
+        self.last_prompt: Optional[Prompt] = None
+
+    def add_turn(self, turn: Dict):
+        """Record a finished turn, folding the one that ages out into the summary"""
+        if len(self.recent) == self.recent.maxlen:
+            self.summary.fold(self.recent[0])
+        self.recent.append(turn)
+
+    def extend(self, turns: Iterable[Dict]):
+        for turn in turns:
+            self.add_turn(turn)
+
+    def build(self, user_input: str) -> Prompt:
+        """Build the prompt for ``user_input`` and record its size"""
+        header = self.system_prompt + "\n\n"
+        footer = f"Human: {user_input}\nAssistant:"
+        remaining = self.max_tokens - estimate_tokens(header) - estimate_tokens(footer)
+
+        # Rank recent turns: online turns newest first, then offline turns newest first
+        ranked = sorted(enumerate(self.recent),
+                        key=lambda item: (item[1].get('mode') == 'offline', -item[0]))
+        selected: Dict[int, str] = {}
+        truncated = 0
+        summary_text = ""
+        summary_placed = False
+
+        for index, turn in ranked:
+            if not summary_placed and turn.get('mode') == 'offline':
+                summary_text, remaining = self._place_summary(remaining)
+                summary_placed = True
+            block = self._format_turn(turn)
+            if estimate_tokens(block) > remaining:
+                continue
+            if block != self._format_turn(turn, cap=False):
+                truncated += 1
+            selected[index] = block
+            remaining -= estimate_tokens(block)
+        if not summary_placed:
+            summary_text, remaining = self._place_summary(remaining)
+
+        parts = [header]
+        if summary_text:
+            parts.append(f"Earlier in this conversation:\n{summary_text}\n\n")
+        parts.extend(selected[index] for index in sorted(selected))
+        parts.append(footer)
+        text = "".join(parts)
+
+        prompt = Prompt(text=text, tokens=estimate_tokens(text), turns=len(selected),
+                        truncated=truncated, dropped=len(self.recent) - len(selected),
+                        summary_tokens=estimate_tokens(summary_text))
+        self.last_prompt = prompt
+        return prompt
+
+    def report(self, prompt: Prompt, latency: float):
+        """Log a prompt's size next to the latency of the request that used it"""
+        self.size_history.append((prompt.tokens, latency))
+        self.logger.info(
+            f"Prompt {prompt.tokens} tokens ({prompt.turns} turns, {prompt.truncated} truncated, "
+            f"{prompt.dropped} dropped, summary {prompt.summary_tokens}) -> Gemini {latency:.2f}s")
+
+    def _place_summary(self, remaining: int):
+        text = self.summary.text
+        if not text:
+            return "", remaining
+        cost = estimate_tokens(text) + 8
+        if cost > remaining:
+            return "", remaining
+        return text, remaining - cost
+
+    def _format_turn(self, turn: Dict, cap: bool = True) -> str:
+        user_input, response = turn['user_input'], turn['response']
+        if cap:
+            user_input = truncate_to_tokens(user_input, self.max_turn_tokens // 2)
+            response = truncate_to_tokens(response, self.max_turn_tokens - estimate_tokens(user_input))
+        return f"Human: {user_input}\nAssistant: {response}\n\n"
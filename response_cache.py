@@ -0,0 +1,227 @@
+"""Persistent cache of online answers for JARVIS"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from intent_matcher import normalize_utterance
+
+# Answers to these change with the clock or the machine's state
+_VOLATILE = re.compile(
+    r"\b(time|date|day|today|tonight|tomorrow|yesterday|now|current|currently|latest|recent|"
+    r"news|weather|temperature|forecast|price|stock|score|my|mine|here|remind|timer)\b"
+)
+# Follow-ups whose meaning depends on the previous turn
+_REFERENTIAL = re.compile(r"\b(it|that|those|them|they|he|she|him|her|his|its|their|more|else|again|why)\b")
+
+
+class ResponseCache:
+    """LRU cache of answers keyed by normalized question and context.
+
+    Keys combine the normalized utterance with a context fingerprint (model,
+    system prompt and, for follow-up questions, the previous turn). Every
+    entry carries its own expiry time; the least recently used entries are
+    evicted beyond ``max_entries``. New answers are appended to a JSONL log
+    next to the JSON snapshot, and the log is folded into the snapshot once
+    it holds ``max_entries`` records, so an insert costs one appended line.
+    The hit/miss counters go to a small stats file at most every
+    ``stats_interval`` seconds. Questions that look time- or state-dependent
+    are never cached.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500, default_ttl: float = 24 * 3600.0,
+                 stats_interval: float = 5.0, logger: Optional[logging.Logger] = None):
+        self.path = Path(path)
+        self.log_path = self.path.with_suffix('.jsonl')
+        self.stats_path = self.path.with_name(self.path.stem + '_stats.json')
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats_interval = stats_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        # Serializes file writes, off the lookup lock
+        self._save_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._log = None
+        self._logged = 0
+        self._stats_written = time.monotonic()
+        self._load()
+
+    @staticmethod
+    def is_cacheable(text: str) -> bool:
+        """Check that an answer to this question would not depend on time or state"""
+        return not _VOLATILE.search(normalize_utterance(text))
+
+    @staticmethod
+    def make_key(text: str, context: Iterable[str] = ()) -> str:
+        """Key of a question in a given context"""
+        material = "\x1f".join([normalize_utterance(text)] + list(context))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def needs_previous_turn(text: str) -> bool:
+        """Check whether a question refers back to the previous turn"""
+        return bool(_REFERENTIAL.search(normalize_utterance(text)))
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached answer, counting the latency it saves"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires'] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry['latency']
+        self._maybe_write_stats()
+        return entry['response'] if entry is not None else None
+
+    def put(self, key: str, response: str, latency: float, ttl: Optional[float] = None):
+        """Store an answer with the latency it took to produce, and append it to the log"""
+        entry = {
+            'response': response,
+            'latency': latency,
+            'expires': time.time() + (self.default_ttl if ttl is None else ttl),
+        }
+        with self._lock:
+            self._insert(key, entry)
+        line = json.dumps({'key': key, **entry}, ensure_ascii=False) + "\n"
+        try:
+            with self._save_lock:
+                if self._log is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._log = open(self.log_path, 'a', encoding='utf-8')
+                self._log.write(line)
+                self._log.flush()
+                self._logged += 1
+                compact = self._logged >= self.max_entries
+            if compact:
+                self.save()
+            else:
+                self._maybe_write_stats()
+        except OSError as e:
+            self.logger.warning(f"Could not persist response cache entry: {e}")
+
+    def bypass(self):
+        """Count a question that skipped the cache"""
+        self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.save()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_seconds': round(self.saved_seconds, 3),
+        }
+
+    def save(self):
+        """Fold the append log into the JSON snapshot and write the counters, atomically"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._save_lock:
+                with self._lock:
+                    payload = {'entries': dict(self._entries), 'stats': self.stats()}
+                self._write_json(self.path, payload)
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                with open(self.log_path, 'w'):
+                    pass
+                self._logged = 0
+                self._write_json(self.stats_path, payload['stats'])
+                self._stats_written = time.monotonic()
+        except OSError as e:
+            self.logger.warning(f"Could not persist response cache: {e}")
+
+    def _insert(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _maybe_write_stats(self):
+        """Write the counters for the dashboard, at most every ``stats_interval`` seconds"""
+        if time.monotonic() - self._stats_written < self.stats_interval:
+            return
+        with self._lock:
+            stats = self.stats()
+        try:
+            with self._save_lock:
+                self._write_json(self.stats_path, stats)
+                self._stats_written = time.monotonic()
+        except OSError as e:
+            self.logger.warning(f"Could not write response cache stats: {e}")
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict):
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def _load(self):
+        payload = self._read_json(self.path)
+        now = time.time()
+        for key, entry in payload.get('entries', {}).items():
+            if entry.get('expires', 0) > now:
+                self._entries[key] = entry
+
+        # Answers added since the last snapshot
+        replayed = 0
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = record.pop('key')
+                    except (ValueError, KeyError):
+                        continue
+                    if record.get('expires', 0) > now:
+                        self._insert(key, record)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Ignoring unreadable response cache log: {e}")
+
+        stats = self._read_json(self.stats_path) or payload.get('stats', {})
+        self.hits = stats.get('hits', 0)
+        self.misses = stats.get('misses', 0)
+        self.bypassed = stats.get('bypassed', 0)
+        self.saved_seconds = stats.get('saved_seconds', 0.0)
+        if replayed:
+            self.save()
+        self.logger.info(f"Response cache loaded with {len(self._entries)} entries")
+
+    def _read_json(self, path: Path) -> Dict:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable {path.name}: {e}")
+            return {}
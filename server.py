@@ -0,0 +1,303 @@
+"""Headless multi-session HTTP/WebSocket server for JARVIS
+
+    python main.py --serve [--host 0.0.0.0 --port 8765]
+
+    POST   /sessions                  start a session -> {"session_id": ...}
+    GET    /sessions/{id}             session info and recent history
+    DELETE /sessions/{id}             end a session
+    POST   /sessions/{id}/turns       {"text": ..., "speak": false} or a WAV/FLAC/AIFF body
+    GET    /sessions/{id}/ws          WebSocket: JSON text turns or binary audio turns,
+                                      replies streamed sentence by sentence
+    GET    /health                    readiness, mode and load
+    GET    /metrics                   per-stage latency in Prometheus text format
+    GET    /traces                    recent turn traces as Chrome trace-event JSON
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from aiohttp import WSMsgType, web
+
+from sessions import Session, SessionLimitError, SessionManager
+
+AUDIO_TYPES = ('audio/wav', 'audio/x-wav', 'audio/wave', 'audio/flac', 'audio/x-flac',
+               'audio/aiff', 'audio/x-aiff')
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+HISTORY_TURNS = 20
+
+
+class TurnError(Exception):
+    """A turn that cannot be answered; carries the HTTP status to reply with"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AssistantServer:
+    """Serves text and audio turns from many clients with one ``HybridAssistant``.
+
+    Each client gets a ``Session`` with its own history and Gemini context,
+    while the intent model, answer index, caches and API clients are
+    shared. The server runs on the assistant's event loop, so online turns
+    from different sessions overlap and offline turns use the loop's
+    thread pool; turns within one session are answered in order. Remote
+    sessions can ask for the time, date and weather but never trigger
+    local actions such as opening applications or shutting down.
+    """
+
+    def __init__(self, assistant, host: str = '127.0.0.1', port: int = 8765, max_sessions: int = 100,
+                 idle_timeout: float = 1800.0, logger: Optional[logging.Logger] = None):
+        self.assistant = assistant
+        self.host = host
+        self.port = port
+        self.logger = logger or logging.getLogger(__name__)
+        self.sessions = SessionManager(
+            lambda session_id: assistant.new_session(session_id, remote=True),
+            max_sessions=max_sessions, idle_timeout=idle_timeout, logger=self.logger
+        )
+        self.turns = 0
+
+        self.app = web.Application(client_max_size=MAX_UPLOAD_BYTES)
+        self.app.add_routes([
+            web.get('/health', self.health),
+            web.post('/sessions', self.create_session),
+            web.get('/sessions/{session_id}', self.get_session),
+            web.delete('/sessions/{session_id}', self.delete_session),
+            web.post('/sessions/{session_id}/turns', self.post_turn),
+            web.get('/sessions/{session_id}/ws', self.websocket),
+            web.get('/metrics', self.metrics),
+            web.get('/traces', self.traces),
+        ])
+        self._runner: Optional[web.AppRunner] = None
+        self._expiry = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        """Start listening; must run on the assistant's event loop"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # Port 0 picks a free port
+        self.port = self._runner.addresses[0][1]
+        self._expiry = asyncio.ensure_future(self._expire_sessions())
+        self.logger.info(f"Assistant server listening on {self.url}")
+
+    async def stop(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def run_turn(self, session: Session, text: str,
+                       on_sentence: Optional[Callable[[str], None]] = None) -> Dict:
+        """Answer one turn for a session, online or offline depending on the assistant's mode"""
+        if not self.assistant.startup.is_ready('offline'):
+            raise TurnError(503, "assistant is starting")
+        assistant = self.assistant
+        lock = self._locks.setdefault(session.id, asyncio.Lock())
+        async with lock:
+            started = time.perf_counter()
+            if assistant.is_online:
+                response = await assistant.process_online_request(text, on_sentence=on_sentence, session=session)
+            else:
+                response = await assistant.runtime.run_blocking(assistant.process_offline_request, text, session)
+                if on_sentence:
+                    on_sentence(response)
+            latency = time.perf_counter() - started
+        self.turns += 1
+        turn = session.previous_turn() or {}
+        return {
+            'session_id': session.id,
+            'text': text,
+            'response': response,
+            'mode': turn.get('mode'),
+            'intent': turn.get('offline_command'),
+            'latency_ms': round(latency * 1000, 1),
+        }
+
+    async def transcribe(self, audio: bytes) -> str:
+        try:
+            text = await self.assistant.runtime.run_blocking(self.assistant.transcribe, audio)
+        except ValueError as e:
+            raise TurnError(415, f"unsupported audio: {e}")
+        except Exception as e:
+            raise TurnError(503, f"speech recognition unavailable: {e}")
+        if not text:
+            raise TurnError(422, "no speech recognized")
+        return text
+
+    async def speech_for(self, text: str) -> Optional[bytes]:
+        return await self.assistant.runtime.run_blocking(self.assistant.synthesize_speech, text)
+
+    async def health(self, request: web.Request) -> web.Response:
+        startup = self.assistant.startup
+        return web.json_response({
+            'status': 'ok' if startup.is_ready('offline') else 'starting',
+            'online': self.assistant.is_online,
+            'sessions': len(self.sessions),
+            'turns': self.turns,
+            'startup': startup.status(),
+        })
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.assistant.tracer.prometheus_text(),
+                            content_type='text/plain', charset='utf-8', headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def traces(self, request: web.Request) -> web.Response:
+        return web.json_response(self.assistant.tracer.chrome_trace())
+
+    async def create_session(self, request: web.Request) -> web.Response:
+        try:
+            session = self.sessions.create()
+        except SessionLimitError as e:
+            return web.json_response({'error': str(e)}, status=503)
+        return web.json_response({'session_id': session.id}, status=201)
+
+    async def get_session(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        info = session.info()
+        info['history'] = [
+            {key: turn.get(key) for key in ('timestamp', 'user_input', 'response', 'mode')}
+            for turn in session.history[-HISTORY_TURNS:]
+        ]
+        return web.json_response(info)
+
+    async def delete_session(self, request: web.Request) -> web.Response:
+        session_id = request.match_info['session_id']
+        if not self.sessions.close(session_id):
+            raise web.HTTPNotFound(text="unknown session")
+        self._locks.pop(session_id, None)
+        return web.Response(status=204)
+
+    async def post_turn(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        speak = request.query.get('speak') in ('1', 'true')
+        trace = self.assistant.tracer.start(session.id)
+        error = None
+        with self.assistant.tracer.activate(trace):
+            try:
+                if request.content_type in AUDIO_TYPES:
+                    text = await self.transcribe(await request.read())
+                else:
+                    try:
+                        body = await request.json()
+                    except ValueError:
+                        raise TurnError(400, "expected a JSON body or an audio clip")
+                    text = str(body.get('text') or '').strip()
+                    speak = speak or bool(body.get('speak'))
+                    if not text:
+                        raise TurnError(400, "missing 'text'")
+                result = await self.run_turn(session, text)
+                if speak:
+                    audio = await self.speech_for(result['response'])
+                    if audio is not None:
+                        result['audio'] = base64.b64encode(audio).decode('ascii')
+                        result['audio_format'] = 'mp3'
+            except BaseException as e:
+                error = e
+                if not isinstance(e, TurnError):
+                    raise
+            finally:
+                # Failed turns are closed and counted too
+                timings = await self._finish_trace(trace, error)
+        if error is not None:
+            return web.json_response(dict(timings, error=str(error)), status=error.status)
+        result.update(timings)
+        return web.json_response(result)
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        session = self._session(request)
+        ws = web.WebSocketResponse(heartbeat=30.0, max_msg_size=MAX_UPLOAD_BYTES)
+        await ws.prepare(request)
+
+        async for message in ws:
+            if message.type not in (WSMsgType.BINARY, WSMsgType.TEXT):
+                continue
+            trace = self.assistant.tracer.start(session.id)
+            error = None
+            audio = None
+            with self.assistant.tracer.activate(trace):
+                try:
+                    if message.type == WSMsgType.BINARY:
+                        text = await self.transcribe(message.data)
+                        await ws.send_json({'type': 'transcript', 'text': text})
+                        speak = False
+                    else:
+                        try:
+                            body = message.json()
+                        except ValueError:
+                            raise TurnError(400, "expected JSON")
+                        text = str(body.get('text') or '').strip()
+                        speak = bool(body.get('speak'))
+                        if not text:
+                            raise TurnError(400, "missing 'text'")
+                    result = await self._stream_turn(ws, session, text)
+                    if speak:
+                        audio = await self.speech_for(result['response'])
+                except BaseException as e:
+                    error = e
+                    if not isinstance(e, TurnError):
+                        raise
+                finally:
+                    timings = await self._finish_trace(trace, error)
+            # 'done' carries the finished trace's stage totals; the audio follows it
+            if error is not None:
+                await ws.send_json(dict(timings, type='error', status=error.status, error=str(error)))
+                continue
+            await ws.send_json(dict(result, type='done', **timings))
+            if audio is not None:
+                await ws.send_bytes(audio)
+        return ws
+
+    async def _stream_turn(self, ws: web.WebSocketResponse, session: Session, text: str) -> Dict:
+        """Run a turn, forwarding each sentence to the client as soon as it is ready"""
+        loop = asyncio.get_running_loop()
+        sentences = asyncio.Queue()
+        turn = asyncio.ensure_future(
+            self.run_turn(session, text, lambda sentence: loop.call_soon_threadsafe(sentences.put_nowait, sentence)))
+        try:
+            while not turn.done():
+                next_sentence = asyncio.ensure_future(sentences.get())
+                await asyncio.wait({next_sentence, turn}, return_when=asyncio.FIRST_COMPLETED)
+                if next_sentence.done():
+                    await ws.send_json({'type': 'sentence', 'text': next_sentence.result()})
+                else:
+                    next_sentence.cancel()
+            # Let sentences handed over just before the turn finished arrive
+            await asyncio.sleep(0)
+            while not sentences.empty():
+                await ws.send_json({'type': 'sentence', 'text': sentences.get_nowait()})
+            return turn.result()
+        finally:
+            turn.cancel()
+
+    async def _finish_trace(self, trace, error: Optional[BaseException] = None) -> Dict:
+        """Close a turn's trace, failed or not; returns its id and stage timings for the reply"""
+        reason = None
+        if error is not None:
+            reason = str(error) if isinstance(error, TurnError) else type(error).__name__
+        await self.assistant.runtime.run_blocking(self.assistant.finish_turn, trace, reason)
+        return {'trace_id': trace.id, 'timings_ms': trace.stage_totals()}
+
+    def _session(self, request: web.Request) -> Session:
+        session = self.sessions.get(request.match_info['session_id'])
+        if session is None:
+            raise web.HTTPNotFound(text="unknown session")
+        return session
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(60)
+            self.sessions.expire_idle()
+            for session_id in list(self._locks):
+                if session_id not in self.sessions:
+                    del self._locks[session_id]
@@ -0,0 +1,121 @@
+"""Per-client conversation sessions for JARVIS"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from prompt_context import PromptBuilder
+
+
+class Session:
+    """One client's conversation: its own history and Gemini context.
+
+    The Tk GUI drives a single local session; the headless server creates
+    one per client. Everything else (intent model, answer index, caches,
+    API clients) is shared by all sessions. ``allow_actions`` is off for
+    remote sessions so a kiosk can never open applications on, or shut
+    down, the machine the assistant runs on.
+    """
+
+    def __init__(self, session_id: str, prompt_builder: PromptBuilder, history: Iterable[Dict] = (),
+                 allow_actions: bool = True, max_history: Optional[int] = None):
+        self.id = session_id
+        self.prompt_builder = prompt_builder
+        self.history: List[Dict] = list(history)
+        self.allow_actions = allow_actions
+        self.max_history = max_history
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.turns = 0
+
+    def previous_turn(self) -> Optional[Dict]:
+        return self.history[-1] if self.history else None
+
+    def record(self, conversation: Dict):
+        """Add a finished turn to this session's history and Gemini context"""
+        self.history.append(conversation)
+        if self.max_history and len(self.history) > self.max_history:
+            del self.history[:len(self.history) - self.max_history]
+        self.prompt_builder.add_turn(conversation)
+        self.turns += 1
+        self.touch()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    @property
+    def idle(self) -> float:
+        """Seconds since the session was last used"""
+        return time.monotonic() - self.last_active
+
+    def info(self) -> Dict:
+        return {
+            'session_id': self.id,
+            'created_at': self.created_at,
+            'turns': self.turns,
+            'idle_s': round(self.idle, 1),
+        }
+
+
+class SessionLimitError(Exception):
+    """Raised when a new session would exceed the configured maximum"""
+
+
+class SessionManager:
+    """Creates, looks up and expires sessions; safe to use from any thread"""
+
+    def __init__(self, factory: Callable[[str], Session], max_sessions: int = 100,
+                 idle_timeout: float = 1800.0, logger: Optional[logging.Logger] = None):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def create(self) -> Session:
+        """Start a new session with a random id"""
+        self.expire_idle()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Session limit of {self.max_sessions} reached")
+            session = self.factory(uuid.uuid4().hex)
+            self._sessions[session.id] = session
+        self.logger.info(f"Session {session.id[:8]} started ({len(self._sessions)} active)")
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.logger.info(f"Session {session_id[:8]} closed after {session.turns} turns")
+        return session is not None
+
+    def expire_idle(self) -> int:
+        """Drop sessions idle for longer than ``idle_timeout``; returns how many were dropped"""
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if session.idle > self.idle_timeout]
+            for session_id in expired:
+                del self._sessions[session_id]
+        if expired:
+            self.logger.info(f"Expired {len(expired)} idle sessions")
+        return len(expired)
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [session.info() for session in self._sessions.values()]
@@ -0,0 +1,139 @@
+"""Sentence-pipelined speech output for JARVIS"""
+
+import contextvars
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+_SENTENCE_END = re.compile(r"([.!?]+[\"')\]]*)(\s+)|(\n+)")
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx"}
+# Only abbreviations when a number follows ("No. 5"); otherwise "No." is a whole reply
+_NUMBER_ABBREVIATIONS = {"no"}
+
+
+class SentenceSplitter:
+    """Cuts a stream of text chunks into complete sentences as they arrive"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk and return every sentence it completed"""
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            end = match.end(1) if match.group(1) else match.start(3)
+            candidate = self._buffer[start:end].strip()
+            following = self._buffer[match.end():match.end() + 1]
+            if match.group(1) and self._is_abbreviation(candidate, following):
+                continue
+            if candidate:
+                sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever text is left once the stream has ended"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+    @staticmethod
+    def _is_abbreviation(sentence: str, following: str) -> bool:
+        words = sentence.rstrip(".!?\"')]").split()
+        if not words or not sentence.endswith("."):
+            return False
+        word = words[-1].lower()
+        if word in _NUMBER_ABBREVIATIONS:
+            # Wait for the next chunk to tell "No. 5" from "No. It is"
+            return not following or following.isdigit()
+        return word in _ABBREVIATIONS
+
+
+def split_sentences(chunks: Iterator[str]) -> Iterator[str]:
+    """Yield complete sentences from an iterator of text chunks"""
+    splitter = SentenceSplitter()
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield from splitter.flush()
+
+
+class SpeechPipeline:
+    """Background queue that speaks sentences in order as soon as they are ready.
+
+    Each turn is opened with ``begin_turn``; the delay between that moment and
+    the first ``notify_audio_started`` call (wired to the audio backends) is
+    recorded as time-to-first-audio. ``speak`` may return before its audio has
+    finished if a ``drain`` callable is given to wait for playback instead.
+    """
+
+    def __init__(self, speak: Callable[[str], None], drain: Optional[Callable[[Optional[float]], bool]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.speak = speak
+        self.drain = drain
+        self.logger = logger or logging.getLogger(__name__)
+        self.last_ttfa: Optional[float] = None
+
+        self._queue = queue.Queue()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._turn_started: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name="speech-pipeline", daemon=True)
+        self._thread.start()
+
+    def begin_turn(self, started_at: Optional[float] = None):
+        """Mark the start of a turn for time-to-first-audio measurement"""
+        with self._lock:
+            self._turn_started = started_at if started_at is not None else time.perf_counter()
+
+    def notify_audio_started(self):
+        """Record time-to-first-audio if this is the first audio of the turn"""
+        with self._lock:
+            turn_started, self._turn_started = self._turn_started, None
+        if turn_started is not None:
+            self.last_ttfa = time.perf_counter() - turn_started
+            self.logger.info(f"Time to first audio: {self.last_ttfa:.3f}s")
+
+    def say(self, sentence: str):
+        """Queue a sentence for speaking; it is spoken in the caller's context (e.g. its turn trace)"""
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put((sentence, contextvars.copy_context()))
+
+    def cancel(self):
+        """Drop every sentence that has not started speaking yet"""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._mark_done()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued sentence has been spoken"""
+        if not self._idle.wait(timeout):
+            return False
+        return self.drain(timeout) if self.drain else True
+
+    def _mark_done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+
+    def _run(self):
+        while True:
+            sentence, context = self._queue.get()
+            try:
+                context.run(self.speak, sentence)
+            except Exception as e:
+                self.logger.error(f"Speech pipeline error: {e}")
+            finally:
+                self._mark_done()
@@ -0,0 +1,140 @@
+"""Lazy imports and cold-start profiling for JARVIS"""
+
+import builtins
+import importlib
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+
+class StartupProfiler:
+    """Records wall time of imports and named initialization phases.
+
+    Imports are timed inclusively at the outermost level, i.e. the time
+    charged to ``main`` importing ``sklearn`` includes everything sklearn
+    imports in turn. Lazily imported modules are charged when first used.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.imports: List[Tuple[str, float]] = []
+        self.phases: List[Tuple[str, float]] = []
+        self.milestones: List[Tuple[str, float]] = []
+        self._depth = threading.local()
+        self._original_import = None
+
+    def enable(self):
+        """Start recording, timing every import from here on"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def disable(self):
+        if self.enabled and self._original_import is not None:
+            builtins.__import__ = self._original_import
+        self.enabled = False
+
+    def record_import(self, name: str, seconds: float):
+        self.imports.append((name, seconds))
+
+    def mark(self, name: str):
+        """Record how long after process start ``name`` was reached"""
+        if self.enabled:
+            self.milestones.append((name, time.perf_counter() - self.started))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self, limit: int = 15) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"Startup profile: {total * 1000:.0f} ms to ready", "", "Slowest imports:"]
+        for name, seconds in sorted(self.imports, key=lambda item: -item[1])[:limit]:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+        lines.append("")
+        lines.append("Init phases:")
+        for name, seconds in self.phases:
+            lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+        if self.milestones:
+            lines.append("")
+            lines.append("Ready after:")
+            for name, seconds in self.milestones:
+                lines.append(f"  {seconds * 1000:9.1f} ms  {name}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'imports_ms': {name: round(seconds * 1000, 1) for name, seconds in self.imports},
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            'ready_ms': {name: round(seconds * 1000, 1) for name, seconds in self.milestones},
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        depth = getattr(self._depth, 'value', 0)
+        if depth or level or name in sys.modules:
+            self._depth.value = depth + 1
+            try:
+                return self._original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._depth.value = depth
+        started = time.perf_counter()
+        self._depth.value = 1
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth.value = 0
+            self.record_import(name, time.perf_counter() - started)
+
+
+profiler = StartupProfiler()
+
+
+def startup_phase(name: str):
+    """Context manager timing an init phase when profiling is enabled"""
+    return profiler.phase(name) if profiler.enabled else nullcontext()
+
+
+class LazyModule(ModuleType):
+    """Module proxy that performs the real import on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            if profiler.enabled:
+                profiler.record_import(f"{self.__name__} (lazy)", time.perf_counter() - started)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return ``name`` if it is already imported, otherwise a proxy that imports it on first use"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,136 @@
+"""Concurrent subsystem initialization with readiness futures for JARVIS"""
+
+import concurrent.futures
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from startup_profile import profiler, startup_phase
+
+
+class DependencyFailed(Exception):
+    """Raised for a step that did not run because a step it depends on failed"""
+
+
+class StartupTasks:
+    """Runs independent initialization steps concurrently.
+
+    Each step is registered under a name together with the steps it needs
+    and gets a ``concurrent.futures.Future`` that resolves with the step's
+    return value. A step starts on a worker thread as soon as everything it
+    depends on has succeeded; if a dependency fails, the step fails with
+    ``DependencyFailed`` without running. Dependencies must be registered
+    first, which rules out cycles.
+    """
+
+    def __init__(self, max_workers: int = 4, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="startup")
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, step: Callable[[], object], after: Iterable[str] = ()) -> concurrent.futures.Future:
+        """Register ``step`` to run once every step named in ``after`` is ready"""
+        with self._lock:
+            if name in self._futures:
+                raise ValueError(f"Startup step '{name}' is already registered")
+            dependencies = {dependency: self._futures[dependency] for dependency in after}
+            future = concurrent.futures.Future()
+            self._futures[name] = future
+
+        self._when_done(list(dependencies.values()),
+                        lambda: self._start(name, step, dependencies, future))
+        return future
+
+    def ready(self, name: str) -> concurrent.futures.Future:
+        """Future resolved when the named step has finished"""
+        return self._futures[name]
+
+    def is_ready(self, name: str) -> bool:
+        """Check whether the named step finished successfully (never blocks)"""
+        future = self._futures.get(name)
+        return future is not None and future.done() and self._succeeded(future)
+
+    def when_ready(self, names: Iterable[str], callback: Callable[[bool], None]):
+        """Call ``callback(ok)`` once all named steps have finished; ``ok`` is False if any failed.
+
+        The callback runs on whichever thread finished the last step.
+        """
+        futures = [self._futures[name] for name in names]
+        self._when_done(futures, lambda: callback(all(self._succeeded(f) for f in futures)))
+
+    def wait(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """Block until the named steps (default: all) have finished; True if all succeeded in time"""
+        futures = [self._futures[name] for name in names] if names is not None else list(self._futures.values())
+        done, pending = concurrent.futures.wait(futures, timeout=timeout)
+        return not pending and all(self._succeeded(f) for f in done)
+
+    def status(self) -> Dict[str, str]:
+        """State of every step: pending, running, ready or failed"""
+        states = {}
+        with self._lock:
+            for name, future in self._futures.items():
+                if not future.done():
+                    states[name] = 'running' if name in self._running else 'pending'
+                else:
+                    states[name] = 'ready' if self._succeeded(future) else 'failed'
+        return states
+
+    def failures(self) -> Dict[str, BaseException]:
+        """Exceptions of the steps that failed"""
+        return {name: future.exception() for name, future in self._futures.items()
+                if future.done() and not self._succeeded(future)}
+
+    def shutdown(self):
+        """Release the worker threads once no more steps will be added"""
+        self._executor.shutdown(wait=False)
+
+    @staticmethod
+    def _succeeded(future: concurrent.futures.Future) -> bool:
+        return not future.cancelled() and future.exception() is None
+
+    def _when_done(self, futures, callback: Callable[[], None]):
+        if not futures:
+            callback()
+            return
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                callback()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _start(self, name: str, step: Callable[[], object],
+               dependencies: Dict[str, concurrent.futures.Future], future: concurrent.futures.Future):
+        failed = [dependency for dependency, f in dependencies.items() if not self._succeeded(f)]
+        if failed:
+            future.set_exception(DependencyFailed(f"'{name}' skipped: {', '.join(failed)} failed"))
+            return
+        self._executor.submit(self._run, name, step, future)
+
+    def _run(self, name: str, step: Callable[[], object], future: concurrent.futures.Future):
+        if not future.set_running_or_notify_cancel():
+            return
+        with self._lock:
+            self._running.add(name)
+        try:
+            with startup_phase(name):
+                result = step()
+        except BaseException as e:
+            self.logger.error(f"Startup step '{name}' failed: {e}")
+            future.set_exception(e)
+        else:
+            self.logger.info(f"Startup step '{name}' ready")
+            profiler.mark(name)
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._running.discard(name)
@@ -0,0 +1,263 @@
+"""Per-turn latency tracing for JARVIS
+
+A ``Trace`` collects one span per stage of a turn (listen, recognize,
+connectivity, intent, prompt, llm, tts, playback, history, ...). The trace
+of the turn in progress is carried in a context variable, so code deep in
+the pipeline records spans with ``tracer.span(name)`` without the trace
+being passed around; ``AsyncRuntime`` and ``SpeechPipeline`` hand the
+context on to the threads and tasks that finish a turn.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from hedging import LatencyTracker
+
+_current: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('jarvis_trace', default=None)
+
+QUANTILES = (50, 95, 99)
+
+
+def current_trace() -> Optional['Trace']:
+    return _current.get()
+
+
+class Span(NamedTuple):
+    name: str
+    start: float  # seconds since the trace started
+    duration: float
+    thread: str
+
+
+class Trace:
+    """Spans of one turn, recorded from any thread"""
+
+    def __init__(self, session_id: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.spans: List[Span] = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, duration: float):
+        """Add a span that began at ``started`` (a ``time.perf_counter()`` value)"""
+        span = Span(name, started - self._t0, duration, threading.current_thread().name)
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_total(self, name: str) -> float:
+        with self._lock:
+            return sum(span.duration for span in self.spans if span.name == name)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Milliseconds spent per stage"""
+        totals = defaultdict(float)
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] += span.duration * 1000
+        return {name: round(total, 3) for name, total in totals.items()}
+
+    def finish(self, error: Optional[str] = None) -> float:
+        self.duration = time.perf_counter() - self._t0
+        self.error = error
+        return self.duration
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            spans = [{'name': span.name, 'start_ms': round(span.start * 1000, 3),
+                      'duration_ms': round(span.duration * 1000, 3), 'thread': span.thread}
+                     for span in self.spans]
+        data = {
+            'id': self.id,
+            'session': self.session_id,
+            'started_at': self.started_at,
+            'duration_ms': round((self.duration or 0.0) * 1000, 3),
+            'spans': spans,
+        }
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class Tracer:
+    """Records spans into the current trace and keeps rolling per-stage statistics.
+
+    Spans outside a turn (a history flush at shutdown, say) still count
+    towards the statistics. ``turn`` is the response time of a finished
+    trace: its whole duration minus the wait for the user's utterance.
+    Failed turns count towards it too, and are also counted in ``errors``.
+    """
+
+    def __init__(self, window: int = 500, keep: int = 200):
+        self.stats = LatencyTracker(window)
+        self.recent: deque = deque(maxlen=keep)
+        self.turns = 0
+        self.errors = 0
+        self._totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str) -> Trace:
+        return Trace(session_id)
+
+    @contextlib.contextmanager
+    def activate(self, trace: Optional[Trace]):
+        """Make ``trace`` the current trace for this thread or task"""
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter() - started)
+
+    def record(self, name: str, started: float, duration: float, trace: Optional[Trace] = None):
+        """Record a finished span in ``trace`` (default: the current one) and the statistics"""
+        trace = trace or _current.get()
+        if trace is not None:
+            trace.add(name, started, duration)
+        self._observe(name, duration)
+
+    def finish(self, trace: Trace, error: Optional[str] = None) -> Dict:
+        """Close a turn's trace, noting why it failed if it did; returns it as a dict"""
+        duration = trace.finish(error)
+        self._observe('turn', duration - trace.stage_total('listen'))
+        with self._lock:
+            self.turns += 1
+            if error is not None:
+                self.errors += 1
+        self.recent.append(trace)
+        return trace.to_dict()
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """Rolling p50/p95/p99 per stage, in seconds"""
+        with self._lock:
+            stages = list(self._totals)
+        summary = {}
+        for stage in stages:
+            stats = self.stats.percentiles(stage, QUANTILES)
+            if stats:
+                summary[stage] = stats
+        return summary
+
+    def status_line(self, stages: Iterable[str] = ('turn', 'recognize', 'llm', 'tts', 'playback')) -> str:
+        """Compact p50/p95/p99 summary for a status bar"""
+        summary = self.percentiles()
+        parts = [f"{stage} {stats['p50']:.2f}/{stats['p95']:.2f}/{stats['p99']:.2f}s"
+                 for stage, stats in ((stage, summary.get(stage)) for stage in stages) if stats]
+        return "Latency p50/p95/p99: " + (" | ".join(parts) if parts else "no turns yet")
+
+    def chrome_trace(self, traces: Optional[Iterable[Trace]] = None) -> Dict:
+        """Trace-event JSON (chrome://tracing, Perfetto) for recent or given traces"""
+        traces = list(self.recent if traces is None else traces)
+        thread_ids: Dict[str, int] = {}
+        events = []
+        for trace in traces:
+            data = trace.to_dict()
+            origin = data['started_at'] * 1e6
+            events.append({'name': 'turn', 'ph': 'X', 'pid': 1, 'tid': 0, 'ts': origin,
+                           'dur': data['duration_ms'] * 1000,
+                           'args': {'trace': data['id'], 'session': data['session']}})
+            for span in data['spans']:
+                tid = thread_ids.setdefault(span['thread'], len(thread_ids) + 1)
+                events.append({'name': span['name'], 'ph': 'X', 'pid': 1, 'tid': tid,
+                               'ts': origin + span['start_ms'] * 1000, 'dur': span['duration_ms'] * 1000,
+                               'args': {'trace': data['id']}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 0, 'args': {'name': 'turns'}})
+        for thread, tid in thread_ids.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': thread}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def prometheus_text(self) -> str:
+        """Rolling quantiles and cumulative totals per stage in Prometheus text format"""
+        summary = self.percentiles()
+        with self._lock:
+            totals = {stage: tuple(values) for stage, values in self._totals.items()}
+            turns = self.turns
+            errors = self.errors
+        lines = [
+            "# HELP jarvis_stage_latency_seconds Latency of each turn stage (rolling quantiles)",
+            "# TYPE jarvis_stage_latency_seconds summary",
+        ]
+        for stage in sorted(totals):
+            for point in QUANTILES:
+                if stage in summary:
+                    lines.append(f'jarvis_stage_latency_seconds{{stage="{stage}",quantile="{point / 100:g}"}} '
+                                 f'{summary[stage][f"p{point}"]:.6f}')
+            count, total = totals[stage]
+            lines.append(f'jarvis_stage_latency_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'jarvis_stage_latency_seconds_count{{stage="{stage}"}} {count}')
+        lines += [
+            "# HELP jarvis_turns_total Turns traced since start",
+            "# TYPE jarvis_turns_total counter",
+            f"jarvis_turns_total {turns}",
+            "# HELP jarvis_turn_errors_total Traced turns that failed",
+            "# TYPE jarvis_turn_errors_total counter",
+            f"jarvis_turn_errors_total {errors}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _observe(self, name: str, duration: float):
+        self.stats.record(name, duration)
+        with self._lock:
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += duration
+
+
+class TraceLog:
+    """Append-only JSONL file of finished traces, rotated to ``<file>.1`` when it grows too large"""
+
+    def __init__(self, path: str, max_bytes: int = 20 * 1024 * 1024, logger: Optional[logging.Logger] = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def append(self, trace: Dict):
+        line = json.dumps(trace) + "\n"
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+                with open(self.path, 'a') as f:
+                    f.write(line)
+            except OSError as e:
+                self.logger.warning(f"Could not write trace log: {e}")
+
+
+def write_text_atomic(path: str, text: str):
+    """Replace a file's contents without readers ever seeing it half-written.
+
+    Each call writes its own temp file, so concurrent writers of the same
+    path never clobber each other's half-written data.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=target.parent, prefix=target.name + '.',
+                                     suffix='.tmp', delete=False) as tmp:
+        tmp.write(text)
+    try:
+        os.replace(tmp.name, target)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
@@ -0,0 +1,183 @@
+"""Content-addressed text-to-speech audio cache for JARVIS"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+
+class TTSCache:
+    """Two-level (memory + disk) LRU cache of synthesized audio clips.
+
+    Clips are addressed by a hash of everything that affects the audio: text,
+    voice, speaking rate and engine. Both levels are bounded by total bytes;
+    the least recently used clips are evicted first.
+    """
+
+    def __init__(self, directory: str, max_disk_bytes: int = 100 * 1024 * 1024,
+                 max_memory_bytes: int = 16 * 1024 * 1024, extension: str = "mp3",
+                 logger: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.extension = extension
+        self.logger = logger or logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan_disk()
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: float, engine: str) -> str:
+        """Content address of a clip"""
+        material = "\x1f".join([engine, voice, f"{rate:.3f}", text.strip()])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio, promoting it in both LRU levels"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._touch_disk(key)
+                self.hits += 1
+                return audio
+            if key not in self._disk:
+                self.misses += 1
+                return None
+
+        try:
+            audio = self._path(key).read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._touch_disk(key)
+            self._remember(key, audio)
+            self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        """Store a clip on disk and in memory"""
+        # A private temp file per writer, so warm-up and speech can store the same clip at once
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as tmp:
+            tmp.write(audio)
+        try:
+            os.replace(tmp.name, self._path(key))
+        except OSError:
+            os.unlink(tmp.name)
+            raise
+
+        with self._lock:
+            self._forget_disk(key)
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            self._remember(key, audio)
+            self._evict_disk()
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes,
+                'clips': len(self._disk),
+            }
+
+    def warm_up(self, texts: Iterable[str], make_key: Callable[[str], str],
+                synthesize: Callable[[str], bytes]) -> threading.Thread:
+        """Pre-synthesize every missing text on a background thread"""
+        def run():
+            created = 0
+            for text in dict.fromkeys(t for t in texts if t and t.strip()):
+                key = make_key(text)
+                if self.contains(key):
+                    continue
+                try:
+                    self.put(key, synthesize(text))
+                    created += 1
+                except Exception as e:
+                    self.logger.warning(f"TTS warm-up stopped: {e}")
+                    break
+            self.logger.info(f"TTS cache warm-up finished, {created} clips synthesized")
+
+        thread = threading.Thread(target=run, name="tts-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.{self.extension}"
+
+    def _scan_disk(self):
+        # Temp files left behind by a crash mid-write
+        for path in self.directory.glob("*.tmp"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        entries = []
+        for path in self.directory.glob(f"*.{self.extension}"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _touch_disk(self, key: str):
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            try:
+                now = time.time()
+                os.utime(self._path(key), (now, now))
+            except OSError:
+                pass
+
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted = self._memory.pop(key, None)
+            if evicted is not None:
+                self._memory_bytes -= len(evicted)
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
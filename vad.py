@@ -0,0 +1,118 @@
+"""Voice activity detection and streaming endpointing for JARVIS"""
+
+from typing import Iterable, Optional, Tuple
+
+from startup_profile import lazy_import
+
+np = lazy_import('numpy')
+
+
+def frame_features(frame: bytes) -> Tuple[float, float]:
+    """RMS energy and zero-crossing rate of a 16-bit PCM frame"""
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    if samples.size < 2:
+        return 0.0, 0.0
+    energy = float(np.sqrt(np.mean(samples * samples)))
+    signs = np.signbit(samples)
+    zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / (samples.size - 1)
+    return energy, zcr
+
+
+class VADEndpointer:
+    """Decides end-of-utterance from frame energy and zero-crossing statistics.
+
+    A frame counts as speech when its energy clears the adaptive noise floor by
+    ``energy_ratio`` and its zero-crossing rate stays below ``zcr_max`` (hiss
+    and fricative-only noise cross zero far more often than voiced speech);
+    very loud frames count regardless of ZCR. Speech starts after ``onset_ms``
+    of consecutive speech frames and ends after ``hangover_ms`` without any.
+    Segments are reported as ``(start, end)`` frame indices the moment the
+    hangover expires, so there is no fixed timeout or phrase limit other than
+    the ``max_utterance_s`` safety cap. While ``echo`` is set (the assistant
+    is playing audio) the threshold is raised by ``echo_ratio`` and the noise
+    floor is frozen, so the speaker's echo is not taken for speech but a user
+    talking over it still is.
+    """
+
+    def __init__(self, frame_seconds: float, energy_ratio: float = 3.0, strong_energy_ratio: float = 8.0,
+                 min_energy: float = 300.0, zcr_max: float = 0.35, onset_ms: float = 60.0,
+                 hangover_ms: float = 300.0, preroll_ms: float = 300.0, max_utterance_s: float = 60.0,
+                 adapt_rate: float = 0.05, echo_ratio: float = 2.5):
+        self.frame_seconds = frame_seconds
+        self.energy_ratio = energy_ratio
+        self.strong_energy_ratio = strong_energy_ratio
+        self.min_energy = min_energy
+        self.zcr_max = zcr_max
+        self.adapt_rate = adapt_rate
+        self.echo_ratio = echo_ratio
+        self.echo = False
+        self.onset_frames = max(1, round(onset_ms / 1000.0 / frame_seconds))
+        self.hangover_frames = max(1, round(hangover_ms / 1000.0 / frame_seconds))
+        self.preroll_frames = round(preroll_ms / 1000.0 / frame_seconds)
+        self.max_frames = max(1, round(max_utterance_s / frame_seconds))
+
+        self.noise_floor = 0.0
+        self.reset()
+
+    @property
+    def threshold(self) -> float:
+        threshold = max(self.min_energy, self.noise_floor * self.energy_ratio)
+        return threshold * self.echo_ratio if self.echo else threshold
+
+    def reset(self):
+        """Forget any utterance in progress"""
+        self._onset_run = 0
+        self._start: Optional[int] = None
+        self._last_speech: Optional[int] = None
+
+    @property
+    def in_speech(self) -> bool:
+        return self._start is not None
+
+    def calibrate(self, frames: Iterable[bytes]):
+        """Set the initial noise floor from frames known to contain no speech"""
+        energies = [frame_features(frame)[0] for frame in frames]
+        if energies:
+            self.noise_floor = sum(energies) / len(energies)
+
+    def is_speech(self, energy: float, zcr: float) -> bool:
+        """Classify a single frame from its features"""
+        if energy < self.threshold:
+            return False
+        return zcr <= self.zcr_max or energy >= self.noise_floor * self.strong_energy_ratio
+
+    def process(self, index: int, frame: bytes) -> Optional[Tuple[int, int]]:
+        """Feed one frame; returns the frame range of an utterance that just ended"""
+        energy, zcr = frame_features(frame)
+        speech = self.is_speech(energy, zcr)
+
+        if self._start is None:
+            if speech:
+                self._onset_run += 1
+                if self._onset_run >= self.onset_frames:
+                    first = index - self._onset_run + 1
+                    self._start = max(0, first - self.preroll_frames)
+                    self._last_speech = index
+            else:
+                self._onset_run = 0
+                # Background recalibration from non-speech frames, but not from the assistant's own audio
+                if not self.echo:
+                    self.noise_floor += self.adapt_rate * (energy - self.noise_floor)
+            return None
+
+        if speech:
+            self._last_speech = index
+        if index - self._last_speech >= self.hangover_frames or index + 1 - self._start >= self.max_frames:
+            return self._finish(index + 1)
+        return None
+
+    def flush(self, end: int) -> Optional[Tuple[int, int]]:
+        """Close an utterance still in progress when the stream ends"""
+        if self._start is None:
+            return None
+        return self._finish(end)
+
+    def _finish(self, end: int) -> Tuple[int, int]:
+        segment = (self._start, end)
+        self.reset()
+        return segment
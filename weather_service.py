@@ -0,0 +1,174 @@
+"""Cached, prefetched weather for JARVIS"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional
+
+from startup_profile import lazy_import
+
+aiohttp = lazy_import('aiohttp')
+
+DEFAULT_API_URL = "https://api.openweathermap.org/data/2.5/weather"
+UNIT_SYMBOLS = {'metric': '°C', 'imperial': '°F', 'standard': 'K'}
+
+
+def spoken_time(timestamp: float, now: Optional[datetime] = None) -> str:
+    """When a snapshot was taken, with the day whenever it was not today"""
+    taken = datetime.fromtimestamp(timestamp)
+    days = ((now or datetime.now()).date() - taken.date()).days
+    clock = taken.strftime("%H:%M")
+    if days == 0:
+        return clock
+    if days == 1:
+        return f"yesterday at {clock}"
+    return f"{taken:%B} {taken.day} at {clock}"
+
+
+class WeatherSnapshot(NamedTuple):
+    location: str
+    temperature: float
+    description: str
+    units: str
+    fetched_at: float
+    query: str = ''
+
+    def describe(self) -> str:
+        return f"{self.temperature:.0f}{UNIT_SYMBOLS.get(self.units, '')} with {self.description}"
+
+
+class WeatherService:
+    """Keeps the latest weather for one location in memory.
+
+    Questions are answered from the in-memory snapshot without any I/O.
+    A prefetch task on the assistant's event loop refreshes it shortly
+    before it expires, but only while ``is_idle`` and ``can_fetch`` allow,
+    and every successful fetch is persisted so that offline mode can still
+    say what the weather was and when. ``api_url`` can point at a local
+    stub server.
+    """
+
+    def __init__(self, runtime, api_key: Optional[str], location: str, snapshot_file: str,
+                 api_url: str = DEFAULT_API_URL, units: str = 'metric', ttl: float = 600.0,
+                 poll_interval: float = 30.0, timeout: float = 5.0,
+                 can_fetch: Optional[Callable[[], bool]] = None,
+                 is_idle: Optional[Callable[[], bool]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.runtime = runtime
+        self.api_key = api_key
+        self.location = location
+        self.snapshot_file = Path(snapshot_file)
+        self.api_url = api_url
+        self.units = units
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.can_fetch = can_fetch or (lambda: True)
+        self.is_idle = is_idle or (lambda: True)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.snapshot: Optional[WeatherSnapshot] = None
+        self._refreshing: Optional[asyncio.Future] = None
+        self._prefetch = None
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def age(self) -> float:
+        """Seconds since the snapshot was fetched (infinite if there is none)"""
+        if self.snapshot is None:
+            return float('inf')
+        return time.time() - self.snapshot.fetched_at
+
+    def is_fresh(self) -> bool:
+        return self.age() < self.ttl
+
+    def answer(self) -> str:
+        """Spoken weather answer from memory; schedules a refresh if the data is stale"""
+        snapshot = self.snapshot
+        if snapshot is not None and self.is_fresh():
+            return f"The current weather in {snapshot.location} is {snapshot.describe()}."
+
+        if self.enabled and self.can_fetch():
+            self.request_refresh()
+        if snapshot is None:
+            return ("I don't have any weather information yet. "
+                    "Check your weather app or try again once I'm online.")
+        return f"As of {spoken_time(snapshot.fetched_at)}, it was {snapshot.describe()} in {snapshot.location}."
+
+    def request_refresh(self):
+        """Refresh in the background unless a refresh is already running"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = self.runtime.submit(self.refresh())
+
+    def start(self):
+        """Start prefetching on the event loop"""
+        if self.enabled and self._prefetch is None:
+            self._prefetch = self.runtime.submit(self._prefetch_loop())
+
+    def stop(self):
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
+
+    async def refresh(self) -> Optional[WeatherSnapshot]:
+        """Fetch the current weather, keep it in memory and persist it"""
+        params = {'q': self.location, 'appid': self.api_key, 'units': self.units}
+        try:
+            async with self.runtime.http.get(self.api_url, params=params,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                response.raise_for_status()
+                data = await response.json()
+            snapshot = WeatherSnapshot(
+                location=data.get('name') or self.location,
+                temperature=float(data['main']['temp']),
+                description=data['weather'][0]['description'],
+                units=self.units,
+                fetched_at=time.time(),
+                query=self.location,
+            )
+        except Exception as e:
+            self.logger.warning(f"Weather refresh failed: {e}")
+            return None
+
+        self.snapshot = snapshot
+        await self.runtime.run_blocking(self._save, snapshot)
+        return snapshot
+
+    async def _prefetch_loop(self):
+        # Refresh a little before expiry so answers stay fresh, never mid-conversation
+        refresh_after = self.ttl * 0.8
+        while True:
+            if self.age() >= refresh_after and self.can_fetch() and self.is_idle():
+                await self.refresh()
+            await asyncio.sleep(self.poll_interval)
+
+    def _save(self, snapshot: WeatherSnapshot):
+        tmp = self.snapshot_file.with_suffix(self.snapshot_file.suffix + ".tmp")
+        try:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(snapshot._asdict(), f)
+            os.replace(tmp, self.snapshot_file)
+        except OSError as e:
+            self.logger.warning(f"Could not persist weather snapshot: {e}")
+
+    def _load(self):
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                data: Dict = json.load(f)
+            snapshot = WeatherSnapshot(**data)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable weather snapshot: {e}")
+            return
+        # A snapshot for a different location or unit system is no use
+        if snapshot.units == self.units and snapshot.query == self.location:
+            self.snapshot = snapshot